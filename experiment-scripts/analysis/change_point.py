@@ -0,0 +1,258 @@
+import os
+import sys
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import experiment_journal
+from analysis.traffic_power_join import load_power
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default seconds of power samples before and after every step searched for its shift
+DEFAULT_PRE = 20.0
+DEFAULT_POST = 40.0
+
+# Default minimum score (mean shift over the noise level) and size in watts of a detected shift
+DEFAULT_THRESHOLD = 6.0
+DEFAULT_MIN_SHIFT = 0.5
+
+# Noise floor in watts, so that flat windows do not give infinite scores
+NOISE_FLOOR = 1e-3
+
+
+def journal_steps(path: str) -> pd.DataFrame:
+    """
+    Schedule steps of an experiment journal.
+
+    The time of a step is when its flows were started or stopped (the first flow_start or
+    flow_stop event of the step), or the step event itself for steps without flow changes.
+
+    Args:
+        path (str): Experiment journal (journals/journal_<timestamp>.jsonl)
+
+    Returns:
+        pd.DataFrame: step, epoch, active_flows and flow_delta (change of active flows)
+    """
+    with open(path, 'rb') as f:
+        events = experiment_journal.parse_journal(f.read())
+
+    steps = {}
+    changes = {}
+    for event in events:
+        if event['event'] == experiment_journal.SCHEDULE_STEP:
+            steps[event['step']] = (event['epoch'], event['active_flows'])
+        elif event['event'] in (experiment_journal.FLOW_START, experiment_journal.FLOW_STOP) and event.get('step') is not None:
+            changes.setdefault(event['step'], event['epoch'])
+            # The final stop of the schedule has no step event
+            if event['step'] not in steps and not event.get('interrupted'):
+                steps[event['step']] = (event['epoch'], 0)
+
+    table = pd.DataFrame([(step, changes.get(step, epoch), active_flows) for step, (epoch, active_flows) in sorted(steps.items())],
+                         columns=['step', 'epoch', 'active_flows'])
+    table['flow_delta'] = table['active_flows'].diff().fillna(table['active_flows']).astype(int)
+    return table
+
+
+def schedule_steps(begin: float, variation_interval: float, simultaneous_flows: list) -> pd.DataFrame:
+    """
+    Planned schedule steps, for experiments without journal.
+
+    Args:
+        begin (float): Epoch of the first step
+        variation_interval (float): Time interval in seconds between flow changes
+        simultaneous_flows (list): Array of flow counts per interval
+
+    Returns:
+        pd.DataFrame: step, epoch, active_flows and flow_delta, as journal_steps
+    """
+    active_flows = np.asarray(simultaneous_flows, dtype=int)
+    return pd.DataFrame({
+        'step': np.arange(len(active_flows)),
+        'epoch': begin + np.arange(len(active_flows)) * variation_interval,
+        'active_flows': active_flows,
+        'flow_delta': np.diff(active_flows, prepend=0)
+    })
+
+
+def power_grid(power: pd.DataFrame, period: float = None) -> tuple:
+    """
+    Resample the power series of every router onto a common regular time grid.
+
+    Samples are assigned to the nearest grid point (averaged if several fall on the same one)
+    and missing points are filled with the previous sample of the router.
+
+    Args:
+        power (pd.DataFrame): Output of traffic_power_join.load_power
+        period (float): Grid period in seconds (defaults to the median sampling period)
+
+    Returns:
+        tuple: (routers (R,), grid epochs (T,), power values (R, T), NaN before the first sample)
+    """
+    routers, router_index = np.unique(power['router_id'].to_numpy(), return_inverse=True)
+    epochs = power['epoch'].to_numpy(dtype=float)
+    if period is None:
+        ordered = power.sort_values(['router_id', 'epoch'], kind='stable')
+        period = float(np.nanmedian(ordered.groupby('router_id')['epoch'].diff()))
+
+    origin = epochs.min()
+    slots = np.rint((epochs - origin) / period).astype(int)
+    grid = origin + np.arange(slots.max() + 1) * period
+
+    sums = np.zeros((len(routers), len(grid)))
+    counts = np.zeros((len(routers), len(grid)))
+    np.add.at(sums, (router_index, slots), power['power_consumption_watts'].to_numpy(dtype=float))
+    np.add.at(counts, (router_index, slots), 1)
+    with np.errstate(invalid='ignore'):
+        values = sums / counts
+
+    # Forward fill along time: index of the last filled slot of every point
+    filled = np.where(counts > 0, np.arange(len(grid)), 0)
+    np.maximum.accumulate(filled, axis=1, out=filled)
+    values = np.take_along_axis(values, filled, axis=1)
+    values[np.cumsum(counts, axis=1) == 0] = np.nan
+    return routers, grid, values
+
+
+def detect_shifts(values: np.ndarray, grid: np.ndarray, step_epochs: np.ndarray, pre: float = DEFAULT_PRE,
+                  post: float = DEFAULT_POST) -> dict:
+    """
+    Locate the most likely mean shift of every router around every step.
+
+    The window of each step (pre seconds before to post seconds after it) is split at the
+    point maximizing the CUSUM statistic sqrt(k (W - k) / W) |mean(x[:k]) - mean(x[k:])|,
+    computed for all routers, steps and split points at once from cumulative sums. The noise
+    level of each window is estimated from the median absolute first difference, which a
+    single shift barely affects.
+
+    Args:
+        values (np.ndarray): (R, T) power values on the grid
+        grid (np.ndarray): (T,) grid epochs
+        step_epochs (np.ndarray): (S,) epochs of the steps
+        pre (float): Seconds before each step included in its window
+        post (float): Seconds after each step included in its window
+
+    Returns:
+        dict: (R, S) arrays: change_epoch (first sample at the new level), shift_w (new minus
+              old mean), score (statistic over noise level) and valid (window fully covered)
+    """
+    period = grid[1] - grid[0] if len(grid) > 1 else 1.0
+    width = max(int(round((pre + post) / period)), 2)
+    first = np.rint((np.asarray(step_epochs, dtype=float) - pre - grid[0]) / period).astype(int)
+    index = first[:, None] + np.arange(width)
+    in_range = (index >= 0).all(axis=1) & (index < len(grid)).all(axis=1)
+    windows = values[:, np.clip(index, 0, len(grid) - 1)]                      # (R, S, W)
+    valid = in_range[None, :] & ~np.isnan(windows).any(axis=2)
+    windows = np.where(valid[:, :, None], windows, 0.0)
+
+    k = np.arange(1, width)
+    cumulative = np.cumsum(windows, axis=2)
+    left = cumulative[:, :, :-1] / k
+    right = (cumulative[:, :, -1:] - cumulative[:, :, :-1]) / (width - k)
+    statistic = np.sqrt(k * (width - k) / width) * np.abs(right - left)
+    split = np.argmax(statistic, axis=2)
+
+    noise = np.median(np.abs(np.diff(windows, axis=2)), axis=2) / (0.6745 * np.sqrt(2))
+    best = np.take_along_axis(statistic, split[:, :, None], axis=2)[:, :, 0]
+    shift = np.take_along_axis(right - left, split[:, :, None], axis=2)[:, :, 0]
+    return {
+        'change_epoch': grid[np.clip(first[None, :] + split + 1, 0, len(grid) - 1)],
+        'shift_w': np.where(valid, shift, np.nan),
+        'score': np.where(valid, best / np.maximum(noise, NOISE_FLOOR), np.nan),
+        'valid': valid
+    }
+
+
+def reaction_delays(power: pd.DataFrame, steps: pd.DataFrame, pre: float = DEFAULT_PRE, post: float = DEFAULT_POST,
+                    threshold: float = DEFAULT_THRESHOLD, min_shift: float = DEFAULT_MIN_SHIFT,
+                    period: float = None) -> pd.DataFrame:
+    """
+    Reaction delay of the power of every router to every schedule step.
+
+    Args:
+        power (pd.DataFrame): Output of traffic_power_join.load_power for one experiment
+        steps (pd.DataFrame): Output of journal_steps or schedule_steps
+        pre (float): Seconds before each step searched for its shift
+        post (float): Seconds after each step searched for its shift
+        threshold (float): Minimum score of a detected shift
+        min_shift (float): Minimum size in watts of a detected shift
+        period (float): Grid period in seconds (defaults to the median sampling period)
+
+    Returns:
+        pd.DataFrame: One row per router and step with the step columns, change_epoch, delay_s
+                      (resolution of one sampling period), shift_w, score and detected
+    """
+    routers, grid, values = power_grid(power, period)
+    shifts = detect_shifts(values, grid, steps['epoch'].to_numpy(), pre, post)
+    detected = shifts['valid'] & (shifts['score'] >= threshold) & (np.abs(shifts['shift_w']) >= min_shift)
+
+    n_routers, n_steps = detected.shape
+    table = pd.DataFrame({
+        'router_id': np.repeat(routers, n_steps),
+        'step': np.tile(steps['step'].to_numpy(), n_routers),
+        'step_epoch': np.tile(steps['epoch'].to_numpy(), n_routers),
+        'active_flows': np.tile(steps['active_flows'].to_numpy(), n_routers),
+        'flow_delta': np.tile(steps['flow_delta'].to_numpy(), n_routers),
+        'change_epoch': np.where(detected, shifts['change_epoch'], np.nan).ravel(),
+        'shift_w': shifts['shift_w'].ravel(),
+        'score': shifts['score'].ravel(),
+        'detected': detected.ravel()
+    })
+    table.insert(5, 'delay_s', table['change_epoch'] - table['step_epoch'])
+    return table
+
+
+def summarize(delays: pd.DataFrame) -> pd.DataFrame:
+    """Detected steps and median/p95/max reaction delay of every router"""
+    detected = delays[delays['detected']]
+    keys = ['experiment_id', 'router_id'] if 'experiment_id' in delays.columns else ['router_id']
+    summary = detected.groupby(keys)['delay_s'].agg(median_s='median', p95_s=lambda d: d.quantile(0.95), max_s='max')
+    summary.insert(0, 'detected', delays.groupby(keys)['detected'].sum())
+    summary.insert(1, 'steps', delays.groupby(keys)['step'].count())
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Reaction delay of the router power to the flow changes of experiments')
+    parser.add_argument('--power', nargs='+', required=True, help='Aggregated power CSV file of every experiment')
+    parser.add_argument('--journal', nargs='+', help='Experiment journal of every experiment, in --power order')
+    parser.add_argument('--begin', type=float, nargs='+', help='Epoch of the first step of every experiment without journal')
+    parser.add_argument('--variation-interval', type=float, default=60, help='Seconds between steps (without journal)')
+    parser.add_argument('--simultaneous-flows', type=int, nargs='+', help='Flow counts per step (without journal)')
+    parser.add_argument('--pre', type=float, default=DEFAULT_PRE, help='Seconds before each step in its window')
+    parser.add_argument('--post', type=float, default=DEFAULT_POST, help='Seconds after each step in its window')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Minimum shift score')
+    parser.add_argument('--min-shift', type=float, default=DEFAULT_MIN_SHIFT, help='Minimum shift in watts')
+    parser.add_argument('-o', '--output', default="reaction_delays.csv", help='Output CSV file of the delays per router and step')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    if args.journal:
+        if len(args.journal) != len(args.power):
+            parser.error("one --journal is required per --power file")
+        schedules = [journal_steps(path) for path in args.journal]
+    elif args.begin and args.simultaneous_flows:
+        if len(args.begin) != len(args.power):
+            parser.error("one --begin is required per --power file")
+        schedules = [schedule_steps(begin, args.variation_interval, args.simultaneous_flows) for begin in args.begin]
+    else:
+        parser.error("either --journal or --begin and --simultaneous-flows are required")
+
+    results = []
+    for path, steps in zip(args.power, schedules):
+        delays = reaction_delays(load_power(path), steps, args.pre, args.post, args.threshold, args.min_shift)
+        delays.insert(0, 'experiment_id', os.path.splitext(os.path.basename(path))[0])
+        logger.info(f"{path}: {delays['detected'].sum()}/{len(delays)} router steps with a detected shift")
+        results.append(delays)
+
+    delays = pd.concat(results, ignore_index=True)
+    delays.to_csv(args.output, index=False)
+    logger.info(f"Reaction delays saved to {args.output}")
+    print(summarize(delays).round(2).to_string())
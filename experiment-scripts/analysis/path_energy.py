@@ -0,0 +1,283 @@
+import os
+import sys
+import heapq
+import argparse
+import logging
+import itertools
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topology.clab import Topology, load_topology
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default number of candidate paths per pair
+DEFAULT_K = 3
+
+
+def costs_from_means(path: str, topology: Topology, hour: int = None) -> np.ndarray:
+    """
+    Power of every topology node from a per-router means CSV of the experiment analysis.
+
+    Args:
+        path (str): CSV file with a router_id column and one column per hour
+                    (e.g. power_means_per_router_energy-aware.csv), or a single value column
+                    (e.g. power_means_per_router_24h_avg_energy-aware.csv)
+        topology (Topology): Topology whose nodes get the costs
+        hour (int): Hour column to use (defaults to the mean of all value columns)
+
+    Returns:
+        np.ndarray: Watts of every node in topology order (0 for nodes missing in the file)
+    """
+    means = pd.read_csv(path).set_index('router_id')
+    values = means[str(hour)] if hour is not None else means.mean(axis=1)
+    return values.reindex(topology.nodes).fillna(0.0).to_numpy(dtype=float)
+
+
+def costs_from_model(model, topology: Topology, load: float, base_load: dict = None) -> np.ndarray:
+    """
+    Extra power of every topology node when it carries a given load, from a power model.
+
+    Args:
+        model: analysis.power_model_fit.PowerModel with a single load column
+        topology (Topology): Topology whose nodes get the costs
+        load (float): Load added by the evaluated flow, in the unit of the model load column
+        base_load (dict): Load already carried by every router (defaults to none)
+
+    Returns:
+        np.ndarray: Watts of every node in topology order (0 for nodes without model)
+    """
+    base_load = base_load or {}
+    costs = np.zeros(len(topology))
+    for i, node in enumerate(topology.nodes):
+        if node in model.index:
+            base = base_load.get(node, 0.0)
+            before, after = model.predict(node, [base, base + load])
+            costs[i] = after - before
+    return costs
+
+
+class PathEnergyEstimator:
+    """
+    Energy cost of the candidate paths between routers of a topology.
+
+    Candidate paths are the k shortest loopless paths (Yen's algorithm over the link weights)
+    and depend only on the topology, so they are computed once per pair and cached as rows of
+    a padded node index matrix. The energy of a path is the sum of the costs of its nodes,
+    evaluated for all cached paths at once with one gather, so the same candidates can be
+    priced under many cost vectors (hours, loads, power models) in microseconds.
+    """
+
+    def __init__(self, topology: Topology, costs: np.ndarray = None):
+        """
+        Args:
+            topology (Topology): Topology of the paths
+            costs (np.ndarray): Cost in watts of every node in topology order
+        """
+        self.topology = topology
+        self.costs = np.zeros(len(topology)) if costs is None else np.asarray(costs, dtype=float)
+        self.cache = {}
+
+    def _shortest(self, source: int, target: int, banned_nodes: set, banned_links: set) -> tuple:
+        """Dijkstra over the CSR adjacency, returning (weight, path) or None"""
+        topology = self.topology
+        distance = {source: 0.0}
+        previous = {}
+        queue = [(0.0, source)]
+        while queue:
+            d, u = heapq.heappop(queue)
+            if u == target:
+                path = [u]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                return d, path[::-1]
+            if d > distance[u]:
+                continue
+            for position in range(topology.indptr[u], topology.indptr[u + 1]):
+                v = int(topology.indices[position])
+                if v in banned_nodes or (u, v) in banned_links:
+                    continue
+                candidate = d + topology.weights[position]
+                if candidate < distance.get(v, np.inf):
+                    distance[v] = candidate
+                    previous[v] = u
+                    heapq.heappush(queue, (candidate, v))
+        return None
+
+    def _weight(self, path: list) -> float:
+        topology = self.topology
+        total = 0.0
+        for u, v in zip(path, path[1:]):
+            neighbors = topology.indices[topology.indptr[u]:topology.indptr[u + 1]]
+            total += topology.weights[topology.indptr[u] + int(np.flatnonzero(neighbors == v)[0])]
+        return total
+
+    def k_shortest(self, source: str, target: str, k: int = DEFAULT_K) -> list:
+        """
+        Up to k loopless paths between two nodes by increasing weight (cached).
+
+        Args:
+            source (str): First node
+            target (str): Last node
+            k (int): Maximum number of paths
+
+        Returns:
+            list: Paths as lists of node indices (ValueError for nodes not in the topology)
+        """
+        key = (source, target, k)
+        if key in self.cache:
+            return self.cache[key]
+        for node in (source, target):
+            if node not in self.topology.index:
+                raise ValueError(f"Unknown router {node} (routers: {', '.join(self.topology.nodes)})")
+
+        s, t = self.topology.index[source], self.topology.index[target]
+        first = self._shortest(s, t, set(), set())
+        paths = [first[1]] if first else []
+        candidates = []
+        counter = itertools.count()
+        while paths and len(paths) < k:
+            last = paths[-1]
+            for i in range(len(last) - 1):
+                root = last[:i + 1]
+                banned_links = {(p[i], p[i + 1]) for p in paths if p[:i + 1] == root}
+                spur = self._shortest(root[-1], t, set(root[:-1]), banned_links)
+                if spur is None:
+                    continue
+                path = root[:-1] + spur[1]
+                if path not in paths and all(path != c[2] for c in candidates):
+                    heapq.heappush(candidates, (self._weight(path), next(counter), path))
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[2])
+
+        self.cache[key] = paths
+        return paths
+
+    def path_matrix(self, paths: list) -> np.ndarray:
+        """Padded (P, L) node index matrix of paths, -1 after the last node"""
+        matrix = np.full((len(paths), max((len(path) for path in paths), default=0)), -1, dtype=np.int64)
+        for row, path in enumerate(paths):
+            matrix[row, :len(path)] = path
+        return matrix
+
+    def energy(self, matrix: np.ndarray, costs: np.ndarray = None) -> np.ndarray:
+        """
+        Energy cost of every path of a path matrix.
+
+        Args:
+            matrix (np.ndarray): (P, L) output of path_matrix
+            costs (np.ndarray): (N,) node costs, or (C, N) to price C cost vectors at once
+                                (defaults to the costs of the estimator)
+
+        Returns:
+            np.ndarray: (P,) or (C, P) watts
+        """
+        costs = self.costs if costs is None else np.asarray(costs, dtype=float)
+        padded = np.concatenate([costs, np.zeros(costs.shape[:-1] + (1,))], axis=-1)
+        return padded[..., matrix].sum(axis=-1)
+
+    def candidates(self, source: str, target: str, k: int = DEFAULT_K) -> pd.DataFrame:
+        """
+        Candidate paths between two nodes with their weight and energy.
+
+        Returns:
+            pd.DataFrame: rank, hops, weight, energy_w and path (node names joined by '-')
+        """
+        paths = self.k_shortest(source, target, k)
+        energy = self.energy(self.path_matrix(paths)) if paths else np.zeros(0)
+        return pd.DataFrame({
+            'source': source,
+            'target': target,
+            'rank': np.arange(len(paths)),
+            'hops': [len(path) - 1 for path in paths],
+            'weight': [self._weight(path) for path in paths],
+            'energy_w': energy,
+            'path': ['-'.join(self.topology.nodes[i] for i in path) for path in paths]
+        })
+
+    def all_pairs(self, nodes: list = None, k: int = DEFAULT_K) -> pd.DataFrame:
+        """
+        Candidate paths of every ordered pair of nodes.
+
+        Args:
+            nodes (list): Endpoints of the pairs (defaults to all nodes)
+            k (int): Maximum number of paths per pair
+
+        Returns:
+            pd.DataFrame: Rows of candidates for every pair, with min_energy marking the
+                          cheapest path of each pair
+        """
+        nodes = nodes or self.topology.nodes
+        tables = [self.candidates(a, b, k) for a, b in itertools.permutations(nodes, 2)]
+        table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+        if not table.empty:
+            table['min_energy'] = table['energy_w'] == table.groupby(['source', 'target'])['energy_w'].transform('min')
+        return table
+
+    def policy_energy(self, routes: list, costs: np.ndarray = None) -> float:
+        """
+        Energy of a routing policy: cost of the distinct nodes used by its routes.
+
+        A router powered on serves every flow through it, so a policy that concentrates
+        routes on fewer routers (letting the rest hibernate) costs less than the sum of the
+        energy of its paths.
+
+        Args:
+            routes (list): Paths as lists of node names
+            costs (np.ndarray): Node costs (defaults to the costs of the estimator)
+
+        Returns:
+            float: Watts
+        """
+        costs = self.costs if costs is None else np.asarray(costs, dtype=float)
+        used = np.zeros(len(self.topology), dtype=bool)
+        for route in routes:
+            used[[self.topology.index[node] for node in route]] = True
+        return float(costs[used].sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Energy cost of the candidate paths of a topology')
+    parser.add_argument('--topology', required=True, help='Containerlab (.clab.yml) or NetworkInfo (.json) file')
+    parser.add_argument('--filter', default="^r", help='Regular expression of the router names (default: "^r")')
+    parser.add_argument('--means', help='Per-router power means CSV of the experiment analysis')
+    parser.add_argument('--hour', type=int, help='Hour column of --means (default: mean of all hours)')
+    parser.add_argument('--model', help='Power model JSON saved by analysis.power_model_fit (instead of --means)')
+    parser.add_argument('--load', type=float, default=100.0, help='Load of the evaluated flow for --model')
+    parser.add_argument('--source', help='First router (default: all pairs)')
+    parser.add_argument('--target', help='Last router (default: all pairs)')
+    parser.add_argument('--endpoints', nargs='+', help='Endpoints of the all-pairs enumeration (e.g. ru rg rc)')
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help='Candidate paths per pair')
+    parser.add_argument('-o', '--output', help='Also save the candidates to this CSV file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    topology = load_topology(args.topology, args.filter)
+    unknown = [node for node in [args.source, args.target] + (args.endpoints or []) if node and node not in topology.index]
+    if unknown:
+        parser.error(f"unknown router(s) {', '.join(unknown)}; routers of {args.topology} matching --filter "
+                     f"{args.filter!r}: {', '.join(topology.nodes) or 'none'}")
+    if args.model:
+        from analysis.power_model_fit import PowerModel
+        costs = costs_from_model(PowerModel.load(args.model), topology, args.load)
+    elif args.means:
+        costs = costs_from_means(args.means, topology, args.hour)
+    else:
+        parser.error("either --means or --model is required")
+
+    estimator = PathEnergyEstimator(topology, costs)
+    if args.source and args.target:
+        table = estimator.candidates(args.source, args.target, args.k)
+    else:
+        table = estimator.all_pairs(args.endpoints, args.k)
+    logger.info(f"{len(table)} candidate paths on {len(topology)} routers")
+    print(table.round(2).to_string(index=False))
+    if args.output:
+        table.to_csv(args.output, index=False)
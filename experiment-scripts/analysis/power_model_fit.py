@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.traffic_power_join import load_power
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default seconds after a rate change before power samples are used, so the telemetry
+# pipeline reflects the new load
+DEFAULT_SETTLE = 10.0
+
+# Number of candidate breakpoints evaluated per router by the automatic piecewise fit
+AUTO_BREAKPOINT_CANDIDATES = 16
+
+
+def load_sweep(path: str) -> pd.DataFrame:
+    """
+    Load the steps of a rate sweep saved by sequential_rate_test.
+
+    Args:
+        path (str): results/sweep_<timestamp>.json file
+
+    Returns:
+        pd.DataFrame: rate_mbps, start_epoch, stop_epoch, and the measured tx_mbps/rx_mbps of every step
+    """
+    with open(path) as f:
+        sweep = json.load(f)
+    steps = pd.DataFrame(sweep['results'])
+    duration = (steps['stop_epoch'] - steps['start_epoch']).to_numpy()
+    steps['tx_mbps'] = steps['bytes_tx'] * 8 / 1e6 / duration
+    steps['rx_mbps'] = steps['bytes_rx'] * 8 / 1e6 / duration
+    return steps.sort_values('start_epoch').reset_index(drop=True)
+
+
+def sweep_samples(steps: pd.DataFrame, power: pd.DataFrame, settle: float = DEFAULT_SETTLE,
+                  include_idle: bool = True) -> pd.DataFrame:
+    """
+    Label the power samples taken during a sweep with the load of the step they belong to.
+
+    Samples from settle seconds after the start of a step until its stop get the measured
+    rates of the step. With include_idle, samples from settle seconds after a stop until the
+    next start get zero load, which anchors the static power. Other samples are dropped.
+
+    Args:
+        steps (pd.DataFrame): Output of load_sweep
+        power (pd.DataFrame): Output of traffic_power_join.load_power
+        settle (float): Seconds ignored after every rate change
+        include_idle (bool): Keep the samples between steps as zero-load samples
+
+    Returns:
+        pd.DataFrame: router_id, epoch, power_consumption_watts, tx_mbps and rx_mbps
+    """
+    starts = steps['start_epoch'].to_numpy()
+    stops = steps['stop_epoch'].to_numpy()
+    epochs = power['epoch'].to_numpy()
+
+    # Last step started at or before each sample
+    step = np.searchsorted(starts, epochs, side='right') - 1
+    valid = step >= 0
+    step_index = np.where(valid, step, 0)
+
+    loaded = valid & (epochs >= starts[step_index] + settle) & (epochs <= stops[step_index])
+    idle = valid & (epochs >= stops[step_index] + settle)
+    # Idle samples must end before the next start (the last step has no next start)
+    next_start = np.append(starts[1:], np.inf)[step_index]
+    idle &= epochs < next_start
+
+    keep = loaded | (idle if include_idle else False)
+    samples = power.loc[keep, ['router_id', 'epoch', 'power_consumption_watts']].reset_index(drop=True)
+    for column in ('tx_mbps', 'rx_mbps'):
+        samples[column] = np.where(loaded[keep], steps[column].to_numpy()[step_index[keep]], 0.0)
+    return samples
+
+
+def _features(load: np.ndarray, breakpoints: np.ndarray) -> np.ndarray:
+    """
+    Design matrix of the linear model: intercept, load columns and hinges of the first column.
+
+    Args:
+        load (np.ndarray): (N, K) load matrix
+        breakpoints (np.ndarray): (N, B) breakpoint of every sample (NaN hinges are zero)
+
+    Returns:
+        np.ndarray: (N, 1 + K + B) features
+    """
+    hinges = np.nan_to_num(np.maximum(load[:, :1] - breakpoints, 0.0))
+    return np.hstack([np.ones((len(load), 1)), load, hinges])
+
+
+def _batched_lstsq(features: np.ndarray, target: np.ndarray, groups: np.ndarray, n_groups: int) -> tuple:
+    """
+    Solve one least squares problem per group at once through its normal equations.
+
+    Returns:
+        tuple: (coefficients (G, P), sum of squared errors (G,), sample count (G,))
+    """
+    p = features.shape[1]
+    gram = np.zeros((n_groups, p, p))
+    moment = np.zeros((n_groups, p))
+    np.add.at(gram, groups, features[:, :, None] * features[:, None, :])
+    np.add.at(moment, groups, features * target[:, None])
+    # The pseudo-inverse keeps rank-deficient groups (e.g. a single load level) solvable
+    coefficients = np.einsum('gij,gj->gi', np.linalg.pinv(gram), moment)
+
+    residuals = target - np.einsum('np,np->n', features, coefficients[groups])
+    sse = np.bincount(groups, weights=residuals ** 2, minlength=n_groups)
+    counts = np.bincount(groups, minlength=n_groups)
+    return coefficients, sse, counts
+
+
+class PowerModel:
+    """
+    Per-router linear power model: power = static + dynamic · load (+ hinge terms).
+
+    The coefficients of all routers are held in one (routers, parameters) array, so
+    predictions for any number of load vectors are a single matrix product. Piecewise models
+    add one hinge term max(0, load[0] - breakpoint) per breakpoint of the first load column.
+    """
+
+    def __init__(self, routers: list, load_columns: list, coefficients: np.ndarray, breakpoints: np.ndarray,
+                 metrics: dict = None):
+        """
+        Args:
+            routers (list): Router IDs, in coefficient order
+            load_columns (list): Names of the load columns
+            coefficients (np.ndarray): (R, 1 + K + B) static, dynamic and hinge coefficients
+            breakpoints (np.ndarray): (R, B) breakpoints of every router (NaN if unused)
+            metrics (dict): Fit quality of every router (r2, rmse_w, samples)
+        """
+        self.routers = list(routers)
+        self.load_columns = list(load_columns)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.breakpoints = np.asarray(breakpoints, dtype=float).reshape(len(self.routers), -1)
+        self.metrics = metrics or {}
+        self.index = {router: i for i, router in enumerate(self.routers)}
+
+    def static(self, router: str) -> float:
+        """Power in watts at zero load"""
+        return float(self.coefficients[self.index[router], 0])
+
+    def dynamic(self, router: str) -> np.ndarray:
+        """Watts per unit of every load column (below the first breakpoint)"""
+        return self.coefficients[self.index[router], 1:1 + len(self.load_columns)]
+
+    def predict(self, router: str, load_matrix) -> np.ndarray:
+        """
+        Predict the power of a router.
+
+        Args:
+            router (str): Router ID
+            load_matrix: (N, K) array of load values in load_columns order, or (N,) for one column
+
+        Returns:
+            np.ndarray: (N,) power in watts
+        """
+        i = self.index[router]
+        load = np.asarray(load_matrix, dtype=float).reshape(-1, len(self.load_columns))
+        breakpoints = np.broadcast_to(self.breakpoints[i], (len(load), self.breakpoints.shape[1]))
+        return _features(load, breakpoints) @ self.coefficients[i]
+
+    def predict_all(self, load_matrix) -> np.ndarray:
+        """
+        Predict the power of every router for the same loads.
+
+        Returns:
+            np.ndarray: (R, N) power in watts, in routers order
+        """
+        return np.vstack([self.predict(router, load_matrix) for router in self.routers])
+
+    def evaluate(self, samples: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compare the model with power samples (e.g. the ML stack estimates).
+
+        Args:
+            samples (pd.DataFrame): router_id, power_consumption_watts and the load columns
+
+        Returns:
+            pd.DataFrame: Bias, MAE and RMSE in watts per router
+        """
+        samples = samples[samples['router_id'].isin(self.index)]
+        router_index = samples['router_id'].map(self.index).to_numpy()
+        load = samples[self.load_columns].to_numpy(dtype=float)
+        features = _features(load, self.breakpoints[router_index])
+        error = samples['power_consumption_watts'].to_numpy() - np.einsum('np,np->n', features, self.coefficients[router_index])
+        return (pd.DataFrame({'router_id': samples['router_id'].to_numpy(), 'error': error})
+                .groupby('router_id')['error']
+                .agg(bias_w='mean', mae_w=lambda e: np.abs(e).mean(), rmse_w=lambda e: np.sqrt((e ** 2).mean())))
+
+    def summary(self) -> pd.DataFrame:
+        """Coefficients and fit quality of every router"""
+        table = pd.DataFrame({'static_w': self.coefficients[:, 0]}, index=pd.Index(self.routers, name='router_id'))
+        for k, column in enumerate(self.load_columns):
+            table[f'dynamic_w_per_{column}'] = self.coefficients[:, 1 + k]
+        for b in range(self.breakpoints.shape[1]):
+            table[f'breakpoint_{b}'] = self.breakpoints[:, b]
+            table[f'hinge_{b}'] = self.coefficients[:, 1 + len(self.load_columns) + b]
+        for name in ('r2', 'rmse_w', 'samples'):
+            table[name] = [self.metrics.get(router, {}).get(name) for router in self.routers]
+        return table
+
+    def to_dict(self) -> dict:
+        return {
+            'routers': self.routers,
+            'load_columns': self.load_columns,
+            'coefficients': self.coefficients.tolist(),
+            'breakpoints': np.where(np.isnan(self.breakpoints), None, self.breakpoints).tolist(),
+            'metrics': self.metrics
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PowerModel':
+        breakpoints = np.array(data['breakpoints'], dtype=float).reshape(len(data['routers']), -1)
+        return cls(data['routers'], data['load_columns'], np.array(data['coefficients']), breakpoints, data.get('metrics'))
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def load(cls, path: str) -> 'PowerModel':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def fit_power_models(samples: pd.DataFrame, load_columns: list = ('rx_mbps',), breakpoints: list = None,
+                     auto_breakpoint: bool = False) -> PowerModel:
+    """
+    Fit the static and dynamic power of every router with batched least squares.
+
+    Args:
+        samples (pd.DataFrame): router_id, power_consumption_watts and the load columns
+                                (output of sweep_samples or traffic_power_join.join_traffic_power)
+        load_columns (list): Load columns used as regressors
+        breakpoints (list): Breakpoints of the first load column shared by all routers (piecewise fit)
+        auto_breakpoint (bool): Search one breakpoint per router among quantiles of its load,
+                                keeping it only if it lowers the error
+
+    Returns:
+        PowerModel: Fitted model
+    """
+    samples = samples.dropna(subset=['router_id', 'power_consumption_watts', *load_columns])
+    routers, groups = np.unique(samples['router_id'].to_numpy(), return_inverse=True)
+    load = samples[list(load_columns)].to_numpy(dtype=float)
+    target = samples['power_consumption_watts'].to_numpy(dtype=float)
+    n_groups = len(routers)
+
+    router_breakpoints = np.full((n_groups, len(breakpoints or [])), np.nan)
+    if breakpoints:
+        router_breakpoints[:] = breakpoints
+
+    coefficients, sse, counts = _batched_lstsq(_features(load, router_breakpoints[groups]), target, groups, n_groups)
+
+    if auto_breakpoint and not breakpoints:
+        # Candidates are inner quantiles of the load of every router, evaluated for all routers at once
+        order = np.argsort(groups, kind='stable')
+        primary = pd.Series(load[order, 0]).groupby(groups[order])
+        quantiles = np.linspace(0.1, 0.9, AUTO_BREAKPOINT_CANDIDATES)
+        candidates = np.vstack([primary.quantile(q).reindex(range(n_groups)).to_numpy() for q in quantiles]).T
+
+        best_sse = sse.copy()
+        best = np.full((n_groups, 1), np.nan)
+        best_coefficients = np.hstack([coefficients, np.zeros((n_groups, 1))])
+        for c in range(candidates.shape[1]):
+            candidate = candidates[:, c:c + 1]
+            c_coefficients, c_sse, _ = _batched_lstsq(_features(load, candidate[groups]), target, groups, n_groups)
+            better = c_sse < best_sse * (1 - 1e-6)
+            best_sse[better] = c_sse[better]
+            best[better] = candidate[better]
+            best_coefficients[better] = c_coefficients[better]
+        router_breakpoints, coefficients, sse = best, best_coefficients, best_sse
+
+    total = np.bincount(groups, weights=(target - (np.bincount(groups, weights=target) / np.maximum(counts, 1))[groups]) ** 2,
+                        minlength=n_groups)
+    metrics = {
+        router: {
+            'r2': float(1 - sse[i] / total[i]) if total[i] > 0 else None,
+            'rmse_w': float(np.sqrt(sse[i] / counts[i])) if counts[i] else None,
+            'samples': int(counts[i])
+        }
+        for i, router in enumerate(routers)
+    }
+    return PowerModel(routers, load_columns, coefficients, router_breakpoints, metrics)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fit per-router power vs throughput models')
+    parser.add_argument('--power', help='Aggregated power CSV file (with --sweep)')
+    parser.add_argument('--sweep', help='Sweep results file saved by sequential_rate_test (results/sweep_*.json)')
+    parser.add_argument('--joined', help='Joined samples saved by analysis.traffic_power_join, instead of --power/--sweep')
+    parser.add_argument('--load-columns', nargs='+', default=['rx_mbps'], help='Load columns used as regressors')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE, help='Seconds ignored after every rate change')
+    parser.add_argument('--no-idle', action='store_true', help='Do not use the samples between sweep steps')
+    parser.add_argument('--breakpoints', type=float, nargs='+', help='Breakpoints of the first load column (piecewise fit)')
+    parser.add_argument('--auto-breakpoint', action='store_true', help='Search one breakpoint per router')
+    parser.add_argument('-o', '--output', default="power_model.json", help='Output JSON file of the model')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    if args.joined:
+        samples = pd.read_csv(args.joined)
+    elif args.power and args.sweep:
+        samples = sweep_samples(load_sweep(args.sweep), load_power(args.power), args.settle, not args.no_idle)
+    else:
+        parser.error("either --joined or both --power and --sweep are required")
+
+    model = fit_power_models(samples, args.load_columns, args.breakpoints, args.auto_breakpoint)
+    model.save(args.output)
+    logger.info(f"Model of {len(model.routers)} routers fitted on {len(samples)} samples, saved to {args.output}")
+    print(model.summary().round(4).to_string())
@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flow_metrics_recorder import FLOW_METRICS_HEADERS
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Columns of the aggregated power CSV files used by the join
+POWER_COLUMNS = ["experiment_id", "router_id", "power_consumption_watts", "node_exporter_collector_timestamp"]
+
+# Traffic rate columns computed from the flow counters
+RATE_COLUMNS = ["tx_mbps", "rx_mbps", "tx_fps", "rx_fps"]
+
+# Default maximum distance in seconds between a power sample and the traffic poll joined to it
+DEFAULT_TOLERANCE = 5.0
+
+
+def load_power(path: str) -> pd.DataFrame:
+    """
+    Load the power samples of an aggregated experiment CSV file.
+
+    The experiment duration section written after the samples by the aggregators is dropped.
+
+    Args:
+        path (str): CSV file with the POWER_CONSUMPTION_HEADERS columns of the aggregators
+
+    Returns:
+        pd.DataFrame: experiment_id, router_id, power_consumption_watts and epoch (sample time)
+    """
+    power = pd.read_csv(path, usecols=POWER_COLUMNS)
+    power["power_consumption_watts"] = pd.to_numeric(power["power_consumption_watts"], errors="coerce")
+    power["epoch"] = pd.to_numeric(power.pop("node_exporter_collector_timestamp"), errors="coerce")
+    return power.dropna(subset=["router_id", "power_consumption_watts", "epoch"]).reset_index(drop=True)
+
+
+def load_flow_metrics(path: str) -> pd.DataFrame:
+    """
+    Load a flow metrics time series recorded by FlowMetricsRecorder.
+
+    Args:
+        path (str): CSV file with the FLOW_METRICS_HEADERS columns
+
+    Returns:
+        pd.DataFrame: One row per flow and poll
+    """
+    dtypes = {name: "float64" for name in FLOW_METRICS_HEADERS}
+    dtypes.update({"flow_name": "category", "transmit": "category"})
+    return pd.read_csv(path, dtype=dtypes)
+
+
+def traffic_rates(metrics: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the rates of every flow between consecutive polls from its cumulative counters.
+
+    The first poll of every flow and counter decreases (counters are reset when the
+    configuration is pushed again) give no rate (NaN) for that interval instead of a
+    negative one.
+
+    Args:
+        metrics (pd.DataFrame): Flow metrics time series
+
+    Returns:
+        pd.DataFrame: epoch, flow_name and RATE_COLUMNS, one row per flow and poll
+    """
+    metrics = metrics.sort_values(["flow_name", "epoch"], kind="stable")
+    grouped = metrics.groupby("flow_name", sort=False, observed=True)
+    dt = grouped["epoch"].diff().to_numpy(copy=True)
+    dt[~(dt > 0)] = np.nan
+
+    rates = pd.DataFrame({"epoch": metrics["epoch"].to_numpy(), "flow_name": metrics["flow_name"].to_numpy()})
+    for column, counter, scale in (("tx_mbps", "bytes_tx", 8 / 1e6), ("rx_mbps", "bytes_rx", 8 / 1e6),
+                                   ("tx_fps", "frames_tx", 1.0), ("rx_fps", "frames_rx", 1.0)):
+        delta = grouped[counter].diff().to_numpy(copy=True)
+        delta[delta < 0] = np.nan
+        rates[column] = delta * scale / dt
+    return rates
+
+
+def aggregate_traffic(rates: pd.DataFrame, flow_routers: dict = None) -> pd.DataFrame:
+    """
+    Sum the rates of all flows of each poll, per router if the routers of each flow are known.
+
+    Polls where a flow has no rate (see traffic_rates) have no aggregate rate either, instead
+    of a partial sum that would understate the load.
+
+    Args:
+        rates (pd.DataFrame): Output of traffic_rates
+        flow_routers (dict): Routers traversed by each flow name (e.g. from the path of its
+                             destination); without it the total traffic applies to every router
+
+    Returns:
+        pd.DataFrame: epoch, [router_id,] RATE_COLUMNS and active_flows (flows transmitting)
+    """
+    rates = rates.assign(active_flows=(rates["tx_fps"] > 0).astype("int64"))
+    keys = ["epoch"]
+    if flow_routers is not None:
+        routes = pd.DataFrame([(flow_name, router) for flow_name, routers in flow_routers.items() for router in routers],
+                              columns=["flow_name", "router_id"])
+        rates = rates.astype({"flow_name": str}).merge(routes, on="flow_name", how="inner")
+        keys = ["router_id", "epoch"]
+    grouped = rates.groupby(keys, sort=False)
+    traffic = grouped[RATE_COLUMNS + ["active_flows"]].sum()
+    incomplete = rates[RATE_COLUMNS].isna().groupby([rates[key] for key in keys], sort=False).any()
+    traffic[RATE_COLUMNS] = traffic[RATE_COLUMNS].mask(incomplete)
+    traffic = traffic.reset_index()
+    return traffic.sort_values("epoch", kind="stable").reset_index(drop=True)
+
+
+def join_traffic_power(power: pd.DataFrame, traffic: pd.DataFrame, tolerance: float = DEFAULT_TOLERANCE,
+                       direction: str = "backward") -> pd.DataFrame:
+    """
+    Align every power sample with the traffic poll at the same time with an as-of merge.
+
+    Args:
+        power (pd.DataFrame): Output of load_power
+        traffic (pd.DataFrame): Output of aggregate_traffic
+        tolerance (float): Maximum seconds between a power sample and its traffic poll;
+                           samples without a poll within it get NaN rates
+        direction (str): 'backward' joins the last poll at or before the sample (the load that
+                         produced it), 'nearest' the closest one, 'forward' the next one
+
+    Returns:
+        pd.DataFrame: Power samples with the concurrent RATE_COLUMNS and active_flows, sorted
+                      by router_id and epoch
+    """
+    power = power.sort_values("epoch", kind="stable")
+    traffic = traffic.rename(columns={"epoch": "traffic_epoch"})
+    traffic["epoch"] = traffic["traffic_epoch"]
+    by = "router_id" if "router_id" in traffic.columns else None
+
+    joined = pd.merge_asof(power, traffic, on="epoch", by=by, tolerance=tolerance, direction=direction,
+                           allow_exact_matches=True)
+    return joined.sort_values(["router_id", "epoch"], kind="stable").reset_index(drop=True)
+
+
+def power_by_load(joined: pd.DataFrame, bin_mbps: float = 10.0, rate: str = "rx_mbps") -> pd.DataFrame:
+    """
+    Per-router table of mean power for each load bin.
+
+    Args:
+        joined (pd.DataFrame): Output of join_traffic_power
+        bin_mbps (float): Width of the load bins
+        rate (str): Rate column used as load
+
+    Returns:
+        pd.DataFrame: Routers as rows, lower bound of the load bins as columns
+    """
+    joined = joined.dropna(subset=[rate])
+    bins = (np.floor(joined[rate].to_numpy() / bin_mbps) * bin_mbps)
+    return joined.assign(load_bin=bins).pivot_table(index="router_id", columns="load_bin",
+                                                     values="power_consumption_watts", aggfunc="mean")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Join a recorded flow metrics time series with per-router power samples')
+    parser.add_argument('--power', required=True, help='Aggregated power CSV file')
+    parser.add_argument('--traffic', required=True, help='Flow metrics CSV file recorded by FlowMetricsRecorder')
+    parser.add_argument('--flow-routers', help='JSON file mapping each flow name to the routers it traverses')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Maximum join distance (s)')
+    parser.add_argument('--direction', choices=('backward', 'nearest', 'forward'), default='backward', help='As-of direction')
+    parser.add_argument('--bin-mbps', type=float, default=10.0, help='Load bin width of the summary table')
+    parser.add_argument('-o', '--output', default="traffic_power.csv", help='Output CSV file of the joined samples')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    flow_routers = None
+    if args.flow_routers:
+        with open(args.flow_routers) as f:
+            flow_routers = json.load(f)
+
+    power = load_power(args.power)
+    traffic = aggregate_traffic(traffic_rates(load_flow_metrics(args.traffic)), flow_routers)
+    joined = join_traffic_power(power, traffic, args.tolerance, args.direction)
+    joined.to_csv(args.output, index=False)
+
+    matched = joined["rx_mbps"].notna().sum()
+    logger.info(f"{matched}/{len(joined)} power samples joined with traffic, saved to {args.output}")
+    print(power_by_load(joined, args.bin_mbps).round(2).to_string())
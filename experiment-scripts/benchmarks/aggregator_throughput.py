@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import logging
+
+# Run from the experiment-scripts directory: python -m benchmarks.aggregator_throughput
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulators import s3_server
+from emulators.telemetry_generator import TelemetryGenerator
+from s3_select import EXTRACTION_MODE_ENV, EXTRACTION_MODES
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Aggregator scripts of the csv-aggregation directory
+AGGREGATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "csv-aggregation")
+AGGREGATORS = (
+    'csv-aggregator.py',
+    'csv-aggregator-with-flows-definition-file-time-limit.py'
+)
+
+# Bucket of the synthetic experiment
+BENCHMARK_BUCKET = "aggregator-benchmark"
+
+# Default dataset sizes (number of ML objects)
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def count_csv_rows(path: str) -> int:
+    """Number of power consumption rows of an aggregated CSV file (up to the first empty line)"""
+    rows = 0
+    with open(path) as f:
+        next(f, None)
+        for line in f:
+            if not line.strip():
+                break
+            rows += 1
+    return rows
+
+
+def run_aggregator(script: str, endpoint: str, workdir: str, timeout: float = None, extraction: str = "select") -> dict:
+    """
+    Run an aggregator script against the S3 stand-in.
+
+    Args:
+        script (str): File name of the aggregator in AGGREGATION_DIR
+        endpoint (str): S3 endpoint of the stand-in
+        workdir (str): Working directory, where the CSV file is written
+        timeout (float): Maximum seconds of the run
+        extraction (str): Extraction mode of the metrics files ("select" or "get")
+
+    Returns:
+        dict: Exit code, wall seconds and number of CSV rows
+    """
+    env = dict(os.environ, S3_ENDPOINT=endpoint, S3_ACCESS_KEY="benchmark", S3_SECRET_KEY="benchmark",
+               S3_BUCKET=BENCHMARK_BUCKET, **{EXTRACTION_MODE_ENV: extraction})
+    env.pop('S3_JOURNAL_KEY', None)
+
+    started = time.monotonic()
+    # Aggregators log every object, which is part of their cost but not worth keeping
+    process = subprocess.run([sys.executable, os.path.join(AGGREGATION_DIR, script)], cwd=workdir, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+    wall = time.monotonic() - started
+
+    csv_path = os.path.join(workdir, f"{BENCHMARK_BUCKET}.csv")
+    rows = count_csv_rows(csv_path) if os.path.exists(csv_path) else 0
+    return {'returncode': process.returncode, 'wall_s': wall, 'rows': rows}
+
+
+def benchmark_size(size: int, aggregators: list, routers: int, workdir: str, timeout: float = None,
+                   extractions: list = EXTRACTION_MODES) -> list:
+    """
+    Generate a dataset of size objects and run every aggregator on it with every extraction mode.
+
+    Returns:
+        list: One result dict per aggregator
+    """
+    samples = max(1, size // routers)
+    generator = TelemetryGenerator(routers, samples, seed=size)
+
+    root = os.path.join(workdir, "s3")
+    store = s3_server.FileSystemStore(root)
+    store.create_bucket(Bucket=BENCHMARK_BUCKET)
+
+    started = time.monotonic()
+    objects = generator.write(store, BENCHMARK_BUCKET)
+    generation = time.monotonic() - started
+    logger.info(f"{objects} objects generated in {generation:.1f}s")
+
+    server = s3_server.start_server(root)
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    results = []
+    try:
+        for script in aggregators:
+            for extraction in extractions:
+                logger.info(f"Running {script} on {objects} objects ({extraction})")
+                result = run_aggregator(script, endpoint, workdir, timeout, extraction)
+                result.update({
+                    'aggregator': script,
+                    'extraction': extraction,
+                    'objects': objects,
+                    'generation_s': generation,
+                    'objects_per_s': objects / result['wall_s'] if result['wall_s'] > 0 else 0.0
+                })
+                if result['returncode'] != 0:
+                    logger.error(f"{script} exited with code {result['returncode']}")
+                elif result['rows'] != objects:
+                    logger.warning(f"{script} aggregated {result['rows']} of {objects} objects")
+                results.append(result)
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def format_results(results: list) -> str:
+    """Table of the benchmark results"""
+    lines = [f"{'Aggregator':<58} {'Mode':<7} {'Objects':>9} {'Rows':>9} {'Gen (s)':>9} {'Wall (s)':>9} {'Objects/s':>10}"]
+    for r in results:
+        lines.append(f"{r['aggregator']:<58} {r['extraction']:<7} {r['objects']:9} {r['rows']:9} {r['generation_s']:9.1f} "
+                     f"{r['wall_s']:9.1f} {r['objects_per_s']:10.0f}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Throughput benchmark of the CSV aggregators on synthetic telemetry')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Dataset sizes (objects)')
+    parser.add_argument('-a', '--aggregators', nargs='+', choices=AGGREGATORS, default=list(AGGREGATORS), help='Aggregators to run')
+    parser.add_argument('-e', '--extraction', nargs='+', choices=EXTRACTION_MODES, default=list(EXTRACTION_MODES),
+                        help='Extraction modes of the metrics files (S3 Select or full downloads)')
+    parser.add_argument('--routers', type=int, default=11, help='Routers of the synthetic experiment')
+    parser.add_argument('--timeout', type=float, help='Maximum seconds of each aggregator run')
+    parser.add_argument('--workdir', help='Directory of the datasets and CSV files (default: temporary directory)')
+    parser.add_argument('-o', '--output', help='Also save the results as JSON to this file')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for size in args.sizes:
+            results.extend(benchmark_size(size, args.aggregators, args.routers, workdir, args.timeout, args.extraction))
+
+    print(format_results(results))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
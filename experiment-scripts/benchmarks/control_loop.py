@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib
+import logging
+
+# Run from the experiment-scripts directory: python -m benchmarks.control_loop
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulators import otg_server, ncs_server
+from emulators.s3_server import FileSystemStore
+from otg_setup import create_base_config, define_flows
+from config import local_clab as config
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Bucket of the uploads and NCS snapshots in the benchmark store
+BENCHMARK_BUCKET = "benchmark"
+
+# Benchmarked flow definition modules
+MODULES = (
+    'fixed_packet_size_fixed_rate_mbps_continuous',
+    'fixed_packet_size_fixed_rate_mbps_interval',
+    'sequential_rate_test',
+    'repeated_fixed_rate_test'
+)
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+class ControlLoopBenchmark:
+    """
+    Run every flow definition module against the local OTG and NCS emulators.
+
+    For each module the wall time is compared with the nominal duration of its scenario (the
+    time traffic and configured delays account for), giving the control-loop overhead. API
+    calls are counted per endpoint, and the schedule skew of timeline-driven modules is taken
+    from their TimelineScheduler records. S3 uploads and NCS flows snapshots are written to a
+    filesystem-backed store under s3_root.
+    """
+
+    def __init__(self, s3_root: str, interval: float = 1.0, flow_duration: float = 1.0, ncs_delay: float = 0.2,
+                 readiness_probe: bool = False, packet_latency: float = 0.05, loss: float = 0.0,
+                 api_latency: float = 0.0, install_latency: float = 0.1):
+        self.interval = interval
+        self.flow_duration = flow_duration
+        self.ncs_delay = ncs_delay
+        self.readiness_probe = readiness_probe
+        self.store = FileSystemStore(s3_root)
+        self.store.create_bucket(Bucket=BENCHMARK_BUCKET)
+        self.otg = otg_server.start_server(api_latency=api_latency, packet_latency=packet_latency, loss=loss)
+        self.ncs = ncs_server.start_server(store=self.store, bucket=BENCHMARK_BUCKET,
+                                           install_latency=install_latency, install_jitter=install_latency / 5)
+        self.otg_location = f"http://127.0.0.1:{self.otg.server_port}"
+        self.ncs_location = f"http://127.0.0.1:{self.ncs.server_port}"
+
+        import snappi
+        self.api = snappi.api(location=self.otg_location, verify=False)
+
+    def _build_config(self, module_name: str, flow_module):
+        cfg, r1Ip, r2Ip = create_base_config(self.api, config.R1_MAC, config.R2_MAC, config.R1_IP, config.R2_IP,
+                                             config.R1_GATEWAY, config.R2_GATEWAY, config.IP_PREFIX)
+        define_flows(cfg, flow_module.define_flow, module_name, r1Ip, r2Ip, 669, 21, config.SRC_IP,
+                     config.DST_IPS, config.DST_IPS[0], config.SRC_MAC, config.DST_MAC)
+        self.api.set_config(cfg)
+        return cfg
+
+    def run_module(self, module_name: str) -> dict:
+        """
+        Benchmark one flow definition module.
+
+        Returns:
+            dict: Wall, nominal and overhead seconds, skew statistics and API call counts
+        """
+        flow_module = importlib.import_module(f"flow_definitions.{module_name}")
+        cfg = self._build_config(module_name, flow_module)
+        self.otg.emulator.calls.clear()
+        self.ncs.emulator.calls.clear()
+        schedulers = []
+
+        started = time.monotonic()
+        if module_name == 'fixed_packet_size_fixed_rate_mbps_interval':
+            nominal = self._run_interval(flow_module, cfg, schedulers)
+        elif module_name == 'fixed_packet_size_fixed_rate_mbps_continuous':
+            nominal = self._run_continuous(cfg)
+        else:
+            nominal = self._run_rate_test(module_name, flow_module, cfg)
+        wall = time.monotonic() - started
+
+        skews = [record['skew'] * 1000 for scheduler in schedulers for record in scheduler.records]
+        return {
+            'module': module_name,
+            'wall_s': wall,
+            'nominal_s': nominal,
+            'overhead_s': wall - nominal,
+            'skew_p50_ms': _percentile(skews, 0.50),
+            'skew_p95_ms': _percentile(skews, 0.95),
+            'skew_max_ms': max(skews) if skews else 0.0,
+            'otg_calls': dict(self.otg.emulator.stats()),
+            'ncs_calls': dict(self.ncs.emulator.calls)
+        }
+
+    def _run_interval(self, flow_module, cfg, schedulers: list) -> float:
+        from minio_flow_uploader import S3BackgroundWriter
+
+        simultaneous_flows = [2, 4, 6, 3, 1, 0]
+
+        # Keep the schedulers of the module to read their skew records
+        class RecordingScheduler(flow_module.TimelineScheduler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                schedulers.append(self)
+
+        flow_module.TimelineScheduler = RecordingScheduler
+        flow_module.s3_writer = S3BackgroundWriter(self.store, BENCHMARK_BUCKET)
+
+        thread, _ = flow_module.variation_function(self.api, cfg, self.ncs_location, self.interval,
+                                                   simultaneous_flows, ncs_lead_time=self.ncs_delay)
+        thread.join()
+        return (len(simultaneous_flows) - 1) * self.interval
+
+    def _run_continuous(self, cfg) -> float:
+        from ncs_client import get_ncs_client
+        from counter_stabilization import wait_for_stable_counters
+
+        ncs_client = get_ncs_client(self.ncs_location)
+        dst_ips = [flow.name[len("flow_"):] for flow in cfg.flows]
+        requested_at = time.monotonic()
+        ncs_client.post_flows(dst_ips)
+        if self.readiness_probe:
+            ncs_client.wait_for_routes(dst_ips, requested_at, self.ncs_delay)
+        else:
+            time.sleep(self.ncs_delay)
+
+        cs = self.api.control_state()
+        cs.traffic.flow_transmit.flow_names = []
+        cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
+        self.api.set_control_state(cs)
+        time.sleep(self.flow_duration)
+        cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
+        self.api.set_control_state(cs)
+
+        ncs_client.delete_flows(dst_ips)
+        wait_for_stable_counters(self.api)
+        return self.ncs_delay + self.flow_duration
+
+    def _run_rate_test(self, module_name: str, flow_module, cfg) -> float:
+        if module_name == 'sequential_rate_test':
+            rate_min, rate_max, rate_step = 10, 30, 10
+            iterations = len(range(rate_min, rate_max + 1, rate_step))
+        else:
+            rate_min, rate_max, rate_step = 10, 10, 3
+            iterations = rate_step
+
+        thread, _ = flow_module.variation_function(
+            self.api, cfg, self.ncs_location, rate_min, rate_max, rate_step, self.flow_duration, self.ncs_delay,
+            src_ip=config.SRC_IP, dst_ip=config.DST_IPS[0], src_mac=config.SRC_MAC, dst_mac=config.DST_MAC,
+            packet_size=669, readiness_probe=self.readiness_probe
+        )
+        thread.join()
+        return iterations * (self.flow_duration + self.ncs_delay)
+
+    def close(self):
+        self.otg.shutdown()
+        self.ncs.shutdown()
+
+
+def format_results(results: list) -> str:
+    """Table of the benchmark results"""
+    lines = [f"{'Module':<46} {'Wall (s)':>9} {'Nominal':>9} {'Overhead':>9} {'Skew p50':>9} {'p95':>8} {'max':>8} "
+             f"{'OTG calls':>10} {'NCS calls':>10}"]
+    for r in results:
+        lines.append(f"{r['module']:<46} {r['wall_s']:9.2f} {r['nominal_s']:9.2f} {r['overhead_s']:9.2f} "
+                     f"{r['skew_p50_ms']:8.2f}ms {r['skew_p95_ms']:6.2f}ms {r['skew_max_ms']:6.2f}ms "
+                     f"{sum(r['otg_calls'].values()):10} {sum(r['ncs_calls'].values()):10}")
+        for endpoint, count in sorted(r['otg_calls'].items()):
+            lines.append(f"    {endpoint:<42} {count}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Control-loop benchmark of the flow definition modules against a local OTG emulator')
+    parser.add_argument('-m', '--modules', nargs='+', choices=MODULES, default=list(MODULES), help='Modules to benchmark')
+    parser.add_argument('--interval', type=float, default=1.0, help='Variation interval of the interval module (s)')
+    parser.add_argument('--flow-duration', type=float, default=1.0, help='Traffic duration of rate tests (s)')
+    parser.add_argument('--ncs-delay', type=float, default=0.2, help='NCS to flow delay (s)')
+    parser.add_argument('--readiness-probe', action='store_true', help='Start flows when NCS reports routes installed')
+    parser.add_argument('--install-latency', type=float, default=0.1, help='Emulated NCS route install latency (s)')
+    parser.add_argument('--packet-latency', type=float, default=0.05, help='Emulated packet latency (s)')
+    parser.add_argument('--loss', type=float, default=0.0, help='Emulated packet loss fraction')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='Emulated OTG API response time (s)')
+    parser.add_argument('-o', '--output', help='Also save the results as JSON to this file')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # Rate tests write their result files to the working directory
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        benchmark = ControlLoopBenchmark(os.path.join(workdir, "s3"), args.interval, args.flow_duration,
+                                         args.ncs_delay, args.readiness_probe, args.packet_latency, args.loss,
+                                         args.api_latency, args.install_latency)
+        try:
+            for module_name in args.modules:
+                results.append(benchmark.run_module(module_name))
+        finally:
+            os.chdir(cwd)
+            benchmark.close()
+
+    print(format_results(results))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
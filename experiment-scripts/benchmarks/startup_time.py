@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+import logging
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Directory the entry points are run from (experiment-scripts)
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points and the arguments of a quick invocation of each of them
+ENTRY_POINTS = {
+    'ixia_GUI --help': ['ixia_GUI.py', '--help'],
+    'run_experiment --help': ['run_experiment.py', '--help'],
+    'run_experiment --check': ['run_experiment.py', '--check', 'experiments/example.yaml'],
+    'import minio_flow_uploader': ['-c', 'import minio_flow_uploader'],
+    'import ncs_client': ['-c', 'import ncs_client'],
+    'import flow_definitions (interval)': ['-c', 'import flow_definitions.fixed_packet_size_fixed_rate_mbps_interval'],
+    'emulators.otg_server --help': ['-m', 'emulators.otg_server', '--help'],
+    'emulators.ncs_server --help': ['-m', 'emulators.ncs_server', '--help'],
+    'emulators.telemetry_replay --help': ['-m', 'emulators.telemetry_replay', '--help'],
+    'analysis.traffic_power_join --help': ['-m', 'analysis.traffic_power_join', '--help'],
+    'topology.clab --help': ['-m', 'topology.clab', '--help']
+}
+
+# Number of heaviest top-level imports reported per entry point
+TOP_IMPORTS = 3
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """
+    Total import time and top-level imports of a -X importtime report.
+
+    Args:
+        stderr (str): Standard error of a python -X importtime run
+
+    Returns:
+        tuple: (total import time in ms, list of (module, cumulative ms) of the top-level imports)
+    """
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module importing them
+        if not name[1:].startswith(' '):
+            top_level.append((name.strip(), int(cumulative) / 1000))
+    return sum(ms for _, ms in top_level), top_level
+
+
+def measure(args: list, repeat: int = 5, python: str = sys.executable) -> dict:
+    """
+    Start an entry point repeatedly in fresh interpreters.
+
+    Args:
+        args (list): Interpreter arguments (script, -m module or -c code, and its arguments)
+        repeat (int): Number of runs
+        python (str): Python interpreter
+
+    Returns:
+        dict: Wall time of the first (coldest) run, minimum and median wall time, median
+              import time and heaviest top-level imports of the last run, in ms
+    """
+    walls = []
+    imports = []
+    top_level = []
+    returncode = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([python, '-X', 'importtime', *args], cwd=SCRIPTS_DIR, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        walls.append((time.perf_counter() - started) * 1000)
+        total, top_level = parse_importtime(result.stderr)
+        imports.append(total)
+        returncode = result.returncode
+
+    return {
+        'first_ms': walls[0],
+        'min_ms': min(walls),
+        'median_ms': statistics.median(walls),
+        'import_ms': statistics.median(imports),
+        'top_imports': sorted(top_level, key=lambda item: -item[1])[:TOP_IMPORTS],
+        'returncode': returncode
+    }
+
+
+def format_results(results: dict, baseline: dict = None) -> str:
+    """Table of the startup time of every entry point, with the change from a baseline"""
+    lines = [f"{'Entry point':<40} {'first':>8} {'median':>8} {'imports':>8} {'vs base':>8}  heaviest imports"]
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline:
+            change = f"{result['median_ms'] / baseline[name]['median_ms']:.2f}x"
+        heaviest = ", ".join(f"{module} {ms:.0f}" for module, ms in result['top_imports'])
+        failed = f" (exit {result['returncode']})" if result['returncode'] else ""
+        lines.append(f"{name:<40} {result['first_ms']:>8.0f} {result['median_ms']:>8.0f} {result['import_ms']:>8.0f} "
+                     f"{change:>8}  {heaviest}{failed}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cold-start time of the entry points, based on python -X importtime')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='Runs per entry point')
+    parser.add_argument('-e', '--entry-points', nargs='+', choices=list(ENTRY_POINTS), metavar='NAME',
+                        help='Entry points to measure (default: all)')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('-o', '--output', help='Also save the results as JSON to this file')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name in args.entry_points or ENTRY_POINTS:
+        logger.debug(f"Measuring {name}")
+        results[name] = measure(ENTRY_POINTS[name], args.repeat)
+
+    print("Startup time in ms (first run, median of all runs, median time spent importing)")
+    print(format_results(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,91 @@
+import time
+import threading
+import logging
+
+# Import span tracer of the experiment timeline
+from span_tracer import tracer
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default stabilization parameters (in seconds)
+STABILIZATION_POLL_INTERVAL = 0.2   # Interval between two counter reads
+STABILIZATION_QUIET_PERIOD = 1.0    # Time counters must stay unchanged to be considered settled
+STABILIZATION_MAX_WAIT = 15.0       # Maximum time to wait for counters to settle
+
+# Counters compared between consecutive reads
+STABILIZATION_COUNTERS = ('frames_tx', 'frames_rx', 'bytes_tx', 'bytes_rx')
+
+
+def _read_counters(api, flow_names: list) -> tuple:
+    """Read the flow metrics and the compared counters of the given flows"""
+    mr = api.metrics_request()
+    mr.flow.flow_names = flow_names
+    flow_metrics = list(api.get_metrics(mr).flow_metrics)
+    counters = {m.name: tuple(getattr(m, c) for c in STABILIZATION_COUNTERS) for m in flow_metrics}
+    return flow_metrics, counters
+
+
+def _all_received(counters: dict) -> bool:
+    """True if every flow received exactly what it transmitted"""
+    return all(frames_tx == frames_rx and bytes_tx == bytes_rx
+               for frames_tx, frames_rx, bytes_tx, bytes_rx in counters.values())
+
+
+@tracer.traced("wait for stable counters", "otg")
+def wait_for_stable_counters(
+    api,
+    flow_names: list = None,
+    quiet_period: float = STABILIZATION_QUIET_PERIOD,
+    poll_interval: float = STABILIZATION_POLL_INTERVAL,
+    max_wait: float = STABILIZATION_MAX_WAIT,
+    stop_event: threading.Event = None
+) -> tuple:
+    """
+    Wait for flow counters to settle after traffic has been stopped.
+
+    Counters are polled every poll_interval seconds and are considered settled once they have
+    not changed for quiet_period seconds. If every flow already received all transmitted frames
+    and bytes, two identical consecutive reads are enough since no packet is left in flight.
+    The wait never exceeds max_wait seconds; the last read metrics are returned in any case.
+
+    Args:
+        api: Snappi API object
+        flow_names (list): Names of the flows to watch (None or empty list means all flows)
+        quiet_period (float): Seconds counters must stay unchanged
+        poll_interval (float): Seconds between two counter reads
+        max_wait (float): Maximum seconds to wait
+        stop_event (threading.Event): Event that aborts the wait when set
+
+    Returns:
+        tuple: (list of flow metric objects from the last read, True if counters settled,
+                seconds waited)
+    """
+    started = time.monotonic()
+    flow_metrics, counters = _read_counters(api, flow_names or [])
+    last_change = started
+
+    while True:
+        elapsed = time.monotonic() - started
+        if elapsed >= max_wait:
+            logger.warning(f"Counters did not settle within {max_wait}s, using last read values")
+            return flow_metrics, False, elapsed
+
+        if stop_event is not None:
+            if stop_event.wait(poll_interval):
+                return flow_metrics, False, time.monotonic() - started
+        else:
+            time.sleep(poll_interval)
+
+        previous = counters
+        flow_metrics, counters = _read_counters(api, flow_names or [])
+        now = time.monotonic()
+
+        if counters != previous:
+            last_change = now
+            continue
+
+        if _all_received(counters) or now - last_change >= quiet_period:
+            elapsed = now - started
+            logger.debug(f"Counters settled after {elapsed:.2f}s")
+            return flow_metrics, True, elapsed
@@ -1,5 +1,5 @@
 __name__ = "B5G-ACROSS-TC32 -- Experiment data to CSV aggregator"
-__version__ = "0.2.3"
+__version__ = "0.3.0"
 __author__ = "David Martínez García <https://github.com/david-martinez-garcia>"
 __credits__ = [
     "GIROS DIT-UPM <https://github.com/giros-dit>",
@@ -16,10 +16,18 @@ __credits__ = [
 import boto3
 import csv
 from datetime import datetime
-import json
 import logging
 import os
 import re
+import sys
+
+# Experiment journal helpers are shared with the traffic drivers (parent directory).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from experiment_journal import JOURNAL_PREFIX, parse_journal, experiment_window, window_overlaps
+# Opt-in profiling of the aggregation phases (EXPERIMENT_PROFILE=1).
+from profiling import get_profiler
+# Extraction of the metrics with S3 Select, falling back to full downloads (S3_EXTRACTION_MODE).
+from s3_select import MetricsExtractor
 
 ## -- END IMPORT STATEMENTS -- ##
 
@@ -45,6 +53,11 @@ S3_SECRET_KEY = os.environ.get("S3_SECRET_KEY")
 # Experiment data are saved in independent buckets.
 # The name of the bucket will be the name/ID of the experiment.
 S3_BUCKET = os.environ.get("S3_BUCKET")
+
+# Optional key of the experiment journal (e.g., journal/journal_20251106_101500.jsonl).
+# The latest journal of the bucket is used if not set. A journal that does not overlap
+# the flows files of the experiment is ignored.
+S3_JOURNAL_KEY = os.environ.get("S3_JOURNAL_KEY")
 S3_FLOWS_FILE_DATETIME_PREFIX = os.environ.get("S3_FLOWS_FILE_DATETIME_PREFIX")  # e.g., "flows_20251106"
 
 ### --- --- ###
@@ -77,6 +90,9 @@ logger.info("Script executed.")
 
 logger.info("---")
 
+# Profiles are written next to the output CSV file when enabled.
+profiler = get_profiler("csv-aggregator-with-flows-definition-file-time-limit")
+
 # Initialize S3 client:
 logger.info("Initializing S3 client...")
 s3_client = boto3.client(
@@ -86,6 +102,8 @@ s3_client = boto3.client(
     aws_secret_access_key = S3_SECRET_KEY,
     region_name = "local" 
 )
+# Only the aggregated fields of every metrics file are transferred when S3 Select is available.
+extractor = MetricsExtractor(s3_client, S3_BUCKET)
 logger.info("Done.")
 
 logger.info("---")
@@ -122,36 +140,81 @@ try:
 
     logger.info("---")
 
+    # The flows files bound the experiment window when no journal is used, and tell whether
+    # the journal found belongs to this experiment.
     keys = []
-    for page in paginator.paginate(Bucket = S3_BUCKET, Prefix = "flows"):
-        for object in page.get("Contents"):
+    for page in profiler.iterate("listing", paginator.paginate(Bucket = S3_BUCKET, Prefix = "flows")):
+        for object in page.get("Contents", []):
             key = object.get("Key")
-            if key.startswith("flows/" + S3_FLOWS_FILE_DATETIME_PREFIX):
+            if key.startswith("flows/" + (S3_FLOWS_FILE_DATETIME_PREFIX or "")) and re.search(r'flows_(\d{8}_\d{6})\.json$', key):
                 keys.append(key)
         
     
-    first_flows_file = keys[0]
-    last_flows_file = keys[-1]
+    if keys:
+        first_flows_file = keys[0]
+        last_flows_file = keys[-1]
     
-    first_flows_file_regex = re.search(r'flows_(\d{8}_\d{6})\.json$', first_flows_file)
-    if first_flows_file_regex:
-        first_flows_file_match = first_flows_file_regex.group(1)
-        first_flows_file_datetime = datetime.strptime(first_flows_file_match, "%Y%m%d_%H%M%S")
+        first_flows_file_regex = re.search(r'flows_(\d{8}_\d{6})\.json$', first_flows_file)
+        if first_flows_file_regex:
+            first_flows_file_match = first_flows_file_regex.group(1)
+            first_flows_file_datetime = datetime.strptime(first_flows_file_match, "%Y%m%d_%H%M%S")
 
-        logger.info("First flows file timestamp:" + first_flows_file_match)
-        logger.info("First flows file datetime:" + str(first_flows_file_datetime))
+            logger.info("First flows file timestamp:" + first_flows_file_match)
+            logger.info("First flows file datetime:" + str(first_flows_file_datetime))
     
-    last_flows_file_regex = re.search(r'flows_(\d{8}_\d{6})\.json$', last_flows_file)
-    if last_flows_file_regex:
-        last_flows_file_match = last_flows_file_regex.group(1)
-        last_flows_file_datetime = datetime.strptime(last_flows_file_match, "%Y%m%d_%H%M%S")
+        last_flows_file_regex = re.search(r'flows_(\d{8}_\d{6})\.json$', last_flows_file)
+        if last_flows_file_regex:
+            last_flows_file_match = last_flows_file_regex.group(1)
+            last_flows_file_datetime = datetime.strptime(last_flows_file_match, "%Y%m%d_%H%M%S")
+
+            logger.info("Last flows file timestamp:" + last_flows_file_match)
+            logger.info("Last flows file datetime:" + str(last_flows_file_datetime))
+
+    logger.info("---")
 
-        logger.info("Last flows file timestamp:" + last_flows_file_match)
-        logger.info("Last flows file datetime:" + str(last_flows_file_datetime))
+    # The experiment journal uploaded by the traffic drivers gives the exact experiment window.
+    # If no usable journal is found, the window is inferred from the flows files.
+    logger.info("Trying to retrieve experiment journal...")
+    journal_window = None
+    try:
+        journal_key = S3_JOURNAL_KEY
+        if not journal_key:
+            # Journal names embed their creation datetime, so the last one is the latest experiment.
+            journal_keys = []
+            for page in profiler.iterate("listing", paginator.paginate(Bucket = S3_BUCKET, Prefix = JOURNAL_PREFIX)):
+                for object in page.get("Contents", []):
+                    journal_keys.append(object.get("Key"))
+            journal_key = max(journal_keys) if journal_keys else None
+        if journal_key:
+            with profiler.phase("fetch"):
+                data = s3_client.get_object(Bucket = S3_BUCKET, Key = journal_key)
+                journal_content = data["Body"].read()
+            with profiler.phase("parse"):
+                journal_window = experiment_window(parse_journal(journal_content))
+    except Exception as e:
+        logger.warning(f"Could not retrieve experiment journal: {e}")
+    # Not every driver records a journal, so the latest one may belong to an earlier run.
+    if journal_window is not None and keys and not window_overlaps(journal_window, first_flows_file_datetime.timestamp(), last_flows_file_datetime.timestamp()):
+        logger.warning("Journal " + journal_key + " does not overlap the flows files of the experiment, ignoring it.")
+        journal_window = None
+    if journal_window is not None:
+        logger.info("Experiment window from journal " + journal_key + ": " + str(journal_window[0]) + " - " + str(journal_window[1]))
+    else:
+        logger.info("No usable experiment journal found, falling back to flows files.")
+    logger.info("Done.")
+
+    logger.info("---")
+
+    if journal_window is not None:
+        # Exact window, compared with the sub-second epoch timestamps of the metrics files.
+        first_flows_file_datetime = datetime.fromtimestamp(journal_window[0])
+        last_flows_file_datetime = datetime.fromtimestamp(journal_window[1])
+        logger.info("Experiment begin datetime:" + str(first_flows_file_datetime))
+        logger.info("Experiment finish datetime:" + str(last_flows_file_datetime))
 
     logger.info("Trying to retrieve metrics files...")
     logger.info("---")
-    for page in paginator.paginate(Bucket = S3_BUCKET, Prefix = "ML_r"):
+    for page in profiler.iterate("listing", paginator.paginate(Bucket = S3_BUCKET, Prefix = "ML_r")):
         for object in page.get("Contents"):
             key = object.get("Key")
             logger.info("File retrieved: " + key)
@@ -165,44 +228,49 @@ try:
                 if pattern.match(key):
                     logger.info("File key/name matches regular expression.")
                     logger.info("Trying to retrieve data from JSON file...")
-                    data = s3_client.get_object(Bucket = S3_BUCKET, Key = key)
-                    metrics_content = json.loads(data["Body"].read().decode("utf-8").strip())
+                    with profiler.phase("fetch"):
+                        # Compacted files hold several metrics records, one per line.
+                        metrics_records = extractor.records(key)
                     logger.info("Done.")
 
                 # For every retrieved JSON file, parse it to get metrics and write them to output CSV file.
-                logger.info("Trying to parse JSON data and retrieve desired metrics...")
-                experiment_id = metrics_content["experiment_id"]
-                router_id = metrics_content["node_exporter"].split(":")[0]
-                logger.info("Router id: " + router_id)
-                node_exporter_collector_timestamp = metrics_content["debug_params"]["metric_timestamp"]
-                kafka_producer_timestamp = metrics_content["debug_params"]["collector_timestamp"]
-                flink_aggregation_timestamp = metrics_content["debug_params"]["process_timestamp"]
-                ml_timestamp = metrics_content["debug_params"]["ml_timestamp"]
-                metric_epoch_timestamp = metrics_content["epoch_timestamp"]
-                telemetry_datetime = datetime.fromtimestamp(float(metric_epoch_timestamp)).strftime('%d-%m-%YT%H:%M:%S')
-                for output_ml_metric in metrics_content["output_ml_metrics"]:
-                    if output_ml_metric["name"] == "node_network_power_consumption_wats":
-                        power_consumption_watts = output_ml_metric["value"][0]
-                csv_metrics = [
-                    experiment_id,
-                    router_id,
-                    power_consumption_watts,
-                    node_exporter_collector_timestamp,
-                    kafka_producer_timestamp,
-                    flink_aggregation_timestamp,
-                    ml_timestamp,
-                    telemetry_datetime
-                ]
-                logger.info("Done.")
+                for metrics_content in metrics_records:
+                    logger.info("Trying to parse JSON data and retrieve desired metrics...")
+                    with profiler.phase("parse"):
+                        experiment_id = metrics_content["experiment_id"]
+                        router_id = metrics_content["node_exporter"].split(":")[0]
+                        logger.info("Router id: " + router_id)
+                        node_exporter_collector_timestamp = metrics_content["debug_params"]["metric_timestamp"]
+                        kafka_producer_timestamp = metrics_content["debug_params"]["collector_timestamp"]
+                        flink_aggregation_timestamp = metrics_content["debug_params"]["process_timestamp"]
+                        ml_timestamp = metrics_content["debug_params"]["ml_timestamp"]
+                        metric_epoch_timestamp = metrics_content["epoch_timestamp"]
+                        telemetry_datetime = datetime.fromtimestamp(float(metric_epoch_timestamp)).strftime('%d-%m-%YT%H:%M:%S')
+                        for output_ml_metric in metrics_content["output_ml_metrics"]:
+                            if output_ml_metric["name"] == "node_network_power_consumption_wats":
+                                power_consumption_watts = output_ml_metric["value"][0]
+                        csv_metrics = [
+                            experiment_id,
+                            router_id,
+                            power_consumption_watts,
+                            node_exporter_collector_timestamp,
+                            kafka_producer_timestamp,
+                            flink_aggregation_timestamp,
+                            ml_timestamp,
+                            telemetry_datetime
+                        ]
+                    logger.info("Done.")
 
-                logger.info("Trying to write metrics to output CSV file...")
-                csv_writer.writerow(csv_metrics)
-                logger.info("Done.")
+                    logger.info("Trying to write metrics to output CSV file...")
+                    with profiler.phase("write"):
+                        csv_writer.writerow(csv_metrics)
+                    logger.info("Done.")
 
                 logger.info("---")
             else:
                 logger.info(f"File {key} with datetime {file_datetime} is OUTSIDE the time window")
 
+    logger.info(extractor.summary())
     logger.info("Done.")
 
     logger.info("---")
@@ -217,38 +285,45 @@ try:
 
     logger.info("---")
 
-    logger.info("Trying to retrieve flows files...")
-    logger.info("---")
-    flows_files_timestamps = []
-    for page in paginator.paginate(Bucket = S3_BUCKET, Prefix = "flows"):
-        for object in page.get("Contents"):
-            key = object.get("Key")
-            timestamp_iso = object.get("LastModified") # In ISO format.
-            # Timestamp is converted to UNIX epoch format.
-            timestamp_epoch = str(datetime.fromisoformat(str(timestamp_iso)).timestamp())
-            logger.info("File retrieved: " + key)
-            logger.info("File timestamp (ISO): " + str(timestamp_iso))
-            logger.info("File timestamp (epoch): " + timestamp_epoch)
-            logger.info("Saving flows file timestamp to temporary list...")
-            flows_files_timestamps.append(timestamp_epoch)
-            logger.info("Done.")
+    if journal_window is not None:
+        logger.info("Using experiment duration from journal...")
+        experiment_duration = [str(journal_window[0]), str(journal_window[1])]
+        logger.info("Done.")
+
+        logger.info("---")
+    else:
+        logger.info("Trying to retrieve flows files...")
+        logger.info("---")
+        flows_files_timestamps = []
+        for page in profiler.iterate("listing", paginator.paginate(Bucket = S3_BUCKET, Prefix = "flows")):
+            for object in page.get("Contents"):
+                key = object.get("Key")
+                timestamp_iso = object.get("LastModified") # In ISO format.
+                # Timestamp is converted to UNIX epoch format.
+                timestamp_epoch = str(datetime.fromisoformat(str(timestamp_iso)).timestamp())
+                logger.info("File retrieved: " + key)
+                logger.info("File timestamp (ISO): " + str(timestamp_iso))
+                logger.info("File timestamp (epoch): " + timestamp_epoch)
+                logger.info("Saving flows file timestamp to temporary list...")
+                flows_files_timestamps.append(timestamp_epoch)
+                logger.info("Done.")
 
-            logger.info("---")
+                logger.info("---")
 
-    logger.info("Done.")
+        logger.info("Done.")
 
-    logger.info("---")
+        logger.info("---")
 
-    logger.info("Sorting flows timestamps to extract experiment duration...")
-    # List is sorted in ascending order: from the lowest to the highest timestamp.
-    flows_files_timestamps.sort()
-    # flows_files_timestamps[0] should be the timestamp of the file "flows_initial.json", which is skipped.
-    begin_timestamp = flows_files_timestamps[1]
-    finish_timestamp = flows_files_timestamps[-1]
-    experiment_duration = [begin_timestamp, finish_timestamp]
-    logger.info("Done.")
+        logger.info("Sorting flows timestamps to extract experiment duration...")
+        # List is sorted in ascending order: from the lowest to the highest timestamp.
+        flows_files_timestamps.sort()
+        # flows_files_timestamps[0] should be the timestamp of the file "flows_initial.json", which is skipped.
+        begin_timestamp = flows_files_timestamps[1]
+        finish_timestamp = flows_files_timestamps[-1]
+        experiment_duration = [begin_timestamp, finish_timestamp]
+        logger.info("Done.")
 
-    logger.info("---")
+        logger.info("---")
 
     logger.info("Writing experiment duration to output CSV file...")
     csv_writer.writerow(experiment_duration)
@@ -260,6 +335,10 @@ try:
     logger.info("Closing output CSV file...")
     csv_output_file.close()
     logger.info("Done.")
+
+    logger.info("---")
+
+    profiler.save()
     
     logger.info("---")
 except Exception as e:
@@ -2,4 +2,5 @@ export S3_ENDPOINT=<MinIO_server_endpoint>
 export S3_ACCESS_KEY=<MinIO_access_key>
 export S3_SECRET_KEY=<MinIO_secret_key>
 export S3_BUCKET=energy-aware-1
-export S3_FLOWS_FILE_DATETIME_PREFIX=<flows_file_datetime_prefix> # e.g., flows_20251106
\ No newline at end of file
+export S3_FLOWS_FILE_DATETIME_PREFIX=<flows_file_datetime_prefix> # e.g., flows_20251106
+export S3_JOURNAL_KEY=<experiment_journal_key> # Optional, e.g., journal/journal_20251106_101500.jsonl (latest journal if unset, ignored unless it overlaps the flows files)
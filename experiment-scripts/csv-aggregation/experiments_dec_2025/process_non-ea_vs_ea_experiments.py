@@ -1,10 +1,20 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import os
+import sys
 
+# Perfilado opcional de las fases del análisis (EXPERIMENT_PROFILE=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from profiling import get_profiler
+
+profiler = get_profiler(os.path.splitext(os.path.basename(__file__))[0])
+
+profiler.mark("load")
 # Dataset Energy-Aware
 df_ea = pd.read_csv('energy-aware-3-processed.csv')
 
+profiler.mark("bucketing")
 # Agrupar por router_id y luego por bloques de 12 filas dentro de cada router
 df_ea_grouped = (
     df_ea.groupby('router_id', group_keys=False)
@@ -27,14 +37,16 @@ df_ea_grouped.columns = new_cols
 
 print("Energy comsumption per hour and router (EA)")
 print(df_ea_grouped)
-df_ea_grouped.to_csv("datasets/power_means_per_router_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_grouped.to_csv("datasets/power_means_per_router_energy-aware.csv", index=False)
 
 # Calcular la suma total por hora
 df_ea_sum = pd.DataFrame(df_ea_grouped.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print("Total energy comsumption per hour (EA)")
 print(df_ea_sum)
-df_ea_sum.to_csv("datasets/power_means_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_sum.to_csv("datasets/power_means_energy-aware.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -46,7 +58,8 @@ df_ea_avg_per_router = pd.DataFrame({
 
 print("Average energy energy comsumption per hour during a day (EA)")
 print(df_ea_avg_per_router)
-df_ea_avg_per_router.to_csv("datasets/power_means_per_router_24h_avg_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_avg_per_router.to_csv("datasets/power_means_per_router_24h_avg_energy-aware.csv", index=False)
 
 df_ea_sum_per_router = pd.DataFrame({
     "router_id": df_ea_grouped["router_id"],
@@ -55,11 +68,14 @@ df_ea_sum_per_router = pd.DataFrame({
 
 print("Sum of energy energy comsumption per hour during a day (EA)")
 print(df_ea_sum_per_router)
-df_ea_sum_per_router.to_csv("datasets/power_means_per_router_24h_sum_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_sum_per_router.to_csv("datasets/power_means_per_router_24h_sum_energy-aware.csv", index=False)
 
+profiler.mark("load")
 # Dataset No-Energy-Aware
 df_nea = pd.read_csv('no-energy-aware-3-processed.csv')
 
+profiler.mark("bucketing")
 # Agrupar por router_id y luego por bloques de 12 filas dentro de cada router
 df_nea_grouped = (
     df_nea.groupby('router_id', group_keys=False)
@@ -82,14 +98,16 @@ df_nea_grouped.columns = new_cols
 
 print("Energy comsumption per hour and router (Non-EA)")
 print(df_nea_grouped)
-df_nea_grouped.to_csv("datasets/power_means_per_router_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_grouped.to_csv("datasets/power_means_per_router_no-energy-aware.csv", index=False)
 
 # Calcular la suma total por hora
 df_nea_sum = pd.DataFrame(df_nea_grouped.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print("Total energy comsumption per hour (Non-EA)")
 print(df_nea_sum)
-df_nea_sum.to_csv("datasets/power_means_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_sum.to_csv("datasets/power_means_no-energy-aware.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -101,7 +119,8 @@ df_nea_avg_per_router = pd.DataFrame({
 
 print("Average energy energy comsumption per hour during a day (Non-EA)")
 print(df_nea_avg_per_router)
-df_nea_avg_per_router.to_csv("datasets/power_means_per_router_24h_avg_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_avg_per_router.to_csv("datasets/power_means_per_router_24h_avg_no-energy-aware.csv", index=False)
 
 df_nea_sum_per_router = pd.DataFrame({
     "router_id": df_nea_grouped["router_id"],
@@ -110,8 +129,10 @@ df_nea_sum_per_router = pd.DataFrame({
 
 print("Sum of energy energy comsumption per hour during a day (Non-EA)")
 print(df_nea_sum_per_router)
-df_nea_sum_per_router.to_csv("datasets/power_means_per_router_24h_sum_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_sum_per_router.to_csv("datasets/power_means_per_router_24h_sum_no-energy-aware.csv", index=False)
 
+profiler.mark("comparison")
 # Extraer valores y columnas
 blocks = df_ea_sum.columns
 values_energy = df_ea_sum.iloc[0].values
@@ -126,7 +147,8 @@ diff_values = (values_no_energy - values_energy)/values_no_energy * 100  # Difer
 df_diff = pd.DataFrame([diff_values], columns=blocks)
 
 # Guardar CSV con la diferencia
-df_diff.to_csv("datasets/power_means_difference_per_hour.csv", index=False)
+with profiler.phase("write"):
+    df_diff.to_csv("datasets/power_means_difference_per_hour.csv", index=False)
 
 # Calcular la diferencia total (No-Energy-Aware - Energy-Aware)
 sum_difference = (sum_no_energy - sum_energy)/sum_no_energy * 100  # Diferencia porcentual total
@@ -139,7 +161,8 @@ df_total_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_total_diff.to_csv("datasets/power_means_difference_total.csv", index=False)
+with profiler.phase("write"):
+    df_total_diff.to_csv("datasets/power_means_difference_total.csv", index=False)
 
 # Calcular la diferencia total por router (No-Energy-Aware - Energy-Aware)
 router_avg_difference = (df_nea_avg_per_router["power_avg"] - df_ea_avg_per_router["power_avg"]) / df_nea_avg_per_router["power_avg"] * 100  # Diferencia porcentual total por router
@@ -151,7 +174,8 @@ df_router_avg_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_avg_diff.to_csv("datasets/power_means_avg_difference_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_router_avg_diff.to_csv("datasets/power_means_avg_difference_per_router.csv", index=False)
 
 router_sum_difference = (df_nea_sum_per_router["power_sum"] - df_ea_sum_per_router["power_sum"]) / df_nea_sum_per_router["power_sum"] * 100  # Diferencia porcentual total por router
 
@@ -162,7 +186,8 @@ df_router_sum_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_sum_diff.to_csv("datasets/power_means_sum_difference_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_router_sum_diff.to_csv("datasets/power_means_sum_difference_per_router.csv", index=False)
 
 # Calcular la diferencia total por router y por hora (No-Energy-Aware - Energy-Aware)
 hour_columns = [str(i) for i in range(1, 25)]
@@ -172,8 +197,10 @@ df_router_hourly_diff = df_ea_grouped.copy()
 df_router_hourly_diff[hour_columns] = (df_nea_grouped[hour_columns] - df_ea_grouped[hour_columns]) / df_nea_grouped[hour_columns] * 100  # Diferencia porcentual por router y hora
     
 # Guardar CSV con la diferencia
-df_router_hourly_diff.to_csv("datasets/power_means_difference_per_router_and_hour.csv", index=False)
+with profiler.phase("write"):
+    df_router_hourly_diff.to_csv("datasets/power_means_difference_per_router_and_hour.csv", index=False)
 
+profiler.mark("plotting")
 # Gráficas de barras comparativas
 x = np.arange(len(blocks))  # posiciones de las columnas
 width = 0.35  # ancho de las barras
@@ -309,4 +336,6 @@ plt.legend(title="Routers", ncol=4)
 plt.tight_layout()
 
 plt.savefig("graphics/consumption_by_hour_all_routers_nea.png", dpi=300)
-plt.close()
\ No newline at end of file
+plt.close()
+
+profiler.save()
@@ -1,6 +1,14 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import os
+import sys
+
+# Perfilado opcional de las fases del análisis (EXPERIMENT_PROFILE=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from profiling import get_profiler
+
+profiler = get_profiler(os.path.splitext(os.path.basename(__file__))[0])
 
 selected_router_ids = ["r1", "r2", "r3", "r4", "r7"]
 
@@ -22,16 +30,20 @@ def first_decil(group):
 
     return decil_10
 
+profiler.mark("load")
 # Dataset Energy-Aware
 df_ea = pd.read_csv('energy-aware-3-processed.csv')
 df_ea = df_ea[df_ea['router_id'].isin(selected_router_ids)]
-df_ea.to_csv("datasets-with-selected-routers/energy-aware-3-processed-with-selected-routers.csv", index=False)
+with profiler.phase("write"):
+    df_ea.to_csv("datasets-with-selected-routers/energy-aware-3-processed-with-selected-routers.csv", index=False)
 
 # Dataset No-Energy-Aware
 df_nea = pd.read_csv('no-energy-aware-3-processed.csv')
 df_nea = df_nea[df_nea['router_id'].isin(selected_router_ids)]
-df_nea.to_csv("datasets-with-selected-routers/no-energy-aware-3-processed-with-selected-routers.csv", index=False)
+with profiler.phase("write"):
+    df_nea.to_csv("datasets-with-selected-routers/no-energy-aware-3-processed-with-selected-routers.csv", index=False)
 
+profiler.mark("baseline")
 # Concatenar ambos CSV
 df_all = pd.concat([df_ea, df_nea], ignore_index=True)
 
@@ -42,7 +54,8 @@ df_min_consumption = (
           .reset_index(name="min_power_consumption_watts")
 )
 
-df_min_consumption.to_csv("datasets-with-selected-routers/min_consumption_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_min_consumption.to_csv("datasets-with-selected-routers/min_consumption_per_router.csv", index=False)
 
 # Convertir a diccionario
 router_map_base_consumption = dict(zip(df_min_consumption["router_id"], df_min_consumption["min_power_consumption_watts"]))
@@ -56,7 +69,8 @@ df_first_decil = (
          .reset_index(name="mean_power_first_decil")
 )
 
-df_first_decil.to_csv("datasets-with-selected-routers/first_decil_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_first_decil.to_csv("datasets-with-selected-routers/first_decil_per_router.csv", index=False)
 
 # Convertir a diccionario
 router_map_first_decil = dict(
@@ -68,6 +82,7 @@ print(router_map_first_decil)
 
 # Preprocesado Energy-Aware
 
+profiler.mark("bucketing")
 # Agrupar por router_id y luego por bloques de 12 filas dentro de cada router
 df_ea_grouped = (
     df_ea.groupby('router_id', group_keys=False)
@@ -90,14 +105,16 @@ df_ea_grouped.columns = new_cols
 
 print("Energy comsumption per hour and router (EA)")
 print(df_ea_grouped)
-df_ea_grouped.to_csv("datasets-with-selected-routers/power_means_per_router_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_grouped.to_csv("datasets-with-selected-routers/power_means_per_router_energy-aware.csv", index=False)
 
 # Calcular la suma total por hora
 df_ea_sum = pd.DataFrame(df_ea_grouped.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print("Total energy comsumption per hour (EA)")
 print(df_ea_sum)
-df_ea_sum.to_csv("datasets-with-selected-routers/power_means_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_sum.to_csv("datasets-with-selected-routers/power_means_energy-aware.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -109,7 +126,8 @@ df_ea_avg_per_router = pd.DataFrame({
 
 print("Average energy energy comsumption per hour during a day (EA)")
 print(df_ea_avg_per_router)
-df_ea_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_energy-aware.csv", index=False)
 
 df_ea_sum_per_router = pd.DataFrame({
     "router_id": df_ea_grouped["router_id"],
@@ -118,8 +136,10 @@ df_ea_sum_per_router = pd.DataFrame({
 
 print("Sum of energy energy comsumption per hour during a day (EA)")
 print(df_ea_sum_per_router)
-df_ea_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_ea_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_energy-aware.csv", index=False)
 
+profiler.mark("baseline")
 # Obtener el ajuste por consumo base
 df_ea_aux = df_ea.copy()
 value_cols = ["power_consumption_watts"]
@@ -143,8 +163,10 @@ for rid, subtract_value in router_map_first_decil.items():
     df_ea_aux.loc[mask, value_cols] = df_subset
 
 print(df_ea_aux)
-df_ea_aux.to_csv("datasets-with-selected-routers/energy-aware-3-processed_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_ea_aux.to_csv("datasets-with-selected-routers/energy-aware-3-processed_with_base_energy_consumption_decil.csv", index=False)
 
+profiler.mark("bucketing")
 # Agrupar por router_id y luego por bloques de 12 filas dentro de cada router
 df_ea_grouped_aux = (
     df_ea_aux.groupby('router_id', group_keys=False)
@@ -166,13 +188,15 @@ new_cols = ['router_id'] + [f"{i}" for i in range(1, len(df_ea_grouped_aux.colum
 df_ea_grouped_aux.columns = new_cols
 
 print(df_ea_grouped_aux)
-df_ea_grouped_aux.to_csv("datasets-with-selected-routers/power_means_per_router_energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_ea_grouped_aux.to_csv("datasets-with-selected-routers/power_means_per_router_energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular la suma total por hora
 df_ea_aux_sum = pd.DataFrame(df_ea_grouped_aux.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print(df_ea_aux_sum)
-df_ea_aux_sum.to_csv("datasets-with-selected-routers/power_means_energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_ea_aux_sum.to_csv("datasets-with-selected-routers/power_means_energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -183,7 +207,8 @@ df_ea_aux_avg_per_router = pd.DataFrame({
 })
 
 print(df_ea_aux_avg_per_router)
-df_ea_aux_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_ea_aux_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 df_ea_aux_sum_per_router = pd.DataFrame({
     "router_id": df_ea_grouped_aux["router_id"],
@@ -191,7 +216,8 @@ df_ea_aux_sum_per_router = pd.DataFrame({
 })
 
 print(df_ea_aux_sum_per_router)
-df_ea_aux_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_ea_aux_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 # Preprocesado No-Energy-Aware
 
@@ -217,14 +243,16 @@ df_nea_grouped.columns = new_cols
 
 print("Energy comsumption per hour and router (Non-EA)")
 print(df_nea_grouped)
-df_nea_grouped.to_csv("datasets-with-selected-routers/power_means_per_router_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_grouped.to_csv("datasets-with-selected-routers/power_means_per_router_no-energy-aware.csv", index=False)
 
 # Calcular la suma total por hora
 df_nea_sum = pd.DataFrame(df_nea_grouped.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print("Total energy comsumption per hour (Non-EA)")
 print(df_nea_sum)
-df_nea_sum.to_csv("datasets-with-selected-routers/power_means_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_sum.to_csv("datasets-with-selected-routers/power_means_no-energy-aware.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -236,7 +264,8 @@ df_nea_avg_per_router = pd.DataFrame({
 
 print("Average energy energy comsumption per hour during a day (Non-EA)")
 print(df_nea_avg_per_router)
-df_nea_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_no-energy-aware.csv", index=False)
 
 df_nea_sum_per_router = pd.DataFrame({
     "router_id": df_nea_grouped["router_id"],
@@ -245,8 +274,10 @@ df_nea_sum_per_router = pd.DataFrame({
 
 print("Sum of energy energy comsumption per hour during a day (Non-EA)")
 print(df_nea_sum_per_router)
-df_nea_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_no-energy-aware.csv", index=False)
+with profiler.phase("write"):
+    df_nea_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_no-energy-aware.csv", index=False)
 
+profiler.mark("baseline")
 # Obtener el ajuste por consumo base
 df_nea_aux = df_nea.copy()
 value_cols = ["power_consumption_watts"]
@@ -269,8 +300,10 @@ for rid, subtract_value in router_map_first_decil.items():
     df_nea_aux.loc[mask, value_cols] = df_subset
     
 print(df_nea_aux)
-df_nea_aux.to_csv("datasets-with-selected-routers/no-energy-aware-3-processed_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_nea_aux.to_csv("datasets-with-selected-routers/no-energy-aware-3-processed_with_base_energy_consumption_decil.csv", index=False)
 
+profiler.mark("bucketing")
 # Agrupar por router_id y luego por bloques de 12 filas dentro de cada router
 df_nea_grouped_aux = (
     df_nea_aux.groupby('router_id', group_keys=False)
@@ -292,13 +325,15 @@ new_cols = ['router_id'] + [f"{i}" for i in range(1, len(df_nea_grouped_aux.colu
 df_nea_grouped_aux.columns = new_cols
 
 print(df_nea_grouped_aux)
-df_nea_grouped_aux.to_csv("datasets-with-selected-routers/power_means_per_router_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_nea_grouped_aux.to_csv("datasets-with-selected-routers/power_means_per_router_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular la suma total por hora
 df_nea_aux_sum = pd.DataFrame(df_nea_grouped_aux.drop(columns='router_id').sum()).T  # Transpuesta para fila única
 
 print(df_nea_aux_sum)
-df_nea_aux_sum.to_csv("datasets-with-selected-routers/power_means_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_nea_aux_sum.to_csv("datasets-with-selected-routers/power_means_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular el promedio de las 24 horas para cada router
 hour_columns = [str(i) for i in range(1, 25)]
@@ -309,7 +344,8 @@ df_nea_aux_avg_per_router = pd.DataFrame({
 })
 
 print(df_nea_aux_avg_per_router)
-df_nea_aux_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_nea_aux_avg_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_avg_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
 df_nea_aux_sum_per_router = pd.DataFrame({
     "router_id": df_nea_grouped_aux["router_id"],
@@ -317,8 +353,10 @@ df_nea_aux_sum_per_router = pd.DataFrame({
 })
 
 print(df_nea_aux_sum_per_router)
-df_nea_aux_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_nea_aux_sum_per_router.to_csv("datasets-with-selected-routers/power_means_per_router_24h_sum_no-energy-aware_with_base_energy_consumption_decil.csv", index=False)
 
+profiler.mark("comparison")
 # Extraer valores y columnas
 blocks = df_ea_sum.columns
 values_energy = df_ea_sum.iloc[0].values
@@ -333,7 +371,8 @@ diff_values = (values_no_energy - values_energy)/values_no_energy * 100  # Difer
 df_diff = pd.DataFrame([diff_values], columns=blocks)
 
 # Guardar CSV con la diferencia
-df_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_hour.csv", index=False)
+with profiler.phase("write"):
+    df_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_hour.csv", index=False)
 
 # Calcular la diferencia total (No-Energy-Aware - Energy-Aware)
 sum_difference = (sum_no_energy - sum_energy)/sum_no_energy * 100  # Diferencia porcentual total
@@ -346,7 +385,8 @@ df_total_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_total_diff.to_csv("datasets-with-selected-routers/power_means_difference_total.csv", index=False)
+with profiler.phase("write"):
+    df_total_diff.to_csv("datasets-with-selected-routers/power_means_difference_total.csv", index=False)
 
 # Calcular la diferencia total por router (No-Energy-Aware - Energy-Aware)
 router_avg_difference = (df_nea_avg_per_router["power_avg"] - df_ea_avg_per_router["power_avg"]) / df_nea_avg_per_router["power_avg"] * 100  # Diferencia porcentual total por router
@@ -358,7 +398,8 @@ df_router_avg_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_avg_diff.to_csv("datasets-with-selected-routers/power_means_avg_difference_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_router_avg_diff.to_csv("datasets-with-selected-routers/power_means_avg_difference_per_router.csv", index=False)
 
 router_sum_difference = (df_nea_sum_per_router["power_sum"] - df_ea_sum_per_router["power_sum"]) / df_nea_sum_per_router["power_sum"] * 100  # Diferencia porcentual total por router
 
@@ -369,8 +410,10 @@ df_router_sum_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_sum_diff.to_csv("datasets-with-selected-routers/power_means_sum_difference_per_router.csv", index=False)
+with profiler.phase("write"):
+    df_router_sum_diff.to_csv("datasets-with-selected-routers/power_means_sum_difference_per_router.csv", index=False)
 
+profiler.mark("plotting")
 # Gráficas de barras comparativas
 x = np.arange(len(blocks))  # posiciones de las columnas
 width = 0.35  # ancho de las barras
@@ -511,6 +554,7 @@ plt.tight_layout()
 plt.savefig("graphics-with-selected-routers/consumption_by_hour_all_routers_nea.png", dpi=300)
 plt.close()
 
+profiler.mark("comparison")
 # Extraer valores y bloques con ajuste por consumo base
 blocks = df_ea_aux_sum.columns
 values_energy = df_ea_aux_sum.iloc[0].values
@@ -525,7 +569,8 @@ diff_values = (values_no_energy - values_energy)/values_no_energy * 100  # Difer
 df_diff = pd.DataFrame([diff_values], columns=blocks)
 
 # Guardar CSV con la diferencia
-df_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_hour_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_hour_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular la diferencia total (No-Energy-Aware - Energy-Aware)
 sum_difference = (sum_no_energy - sum_energy)/(sum_no_energy) * 100  # Diferencia porcentual total
@@ -538,7 +583,8 @@ df_total_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_total_diff.to_csv("datasets-with-selected-routers/power_means_difference_total_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_total_diff.to_csv("datasets-with-selected-routers/power_means_difference_total_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular la diferencia total por router (No-Energy-Aware - Energy-Aware)
 router_avg_difference = (df_nea_aux_avg_per_router["power_avg"] - df_ea_aux_avg_per_router["power_avg"]) / df_nea_aux_avg_per_router["power_avg"] * 100  # Diferencia porcentual total por router
@@ -550,7 +596,8 @@ df_router_avg_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_avg_diff.to_csv("datasets-with-selected-routers//power_means_avg_difference_per_router_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_router_avg_diff.to_csv("datasets-with-selected-routers//power_means_avg_difference_per_router_with_base_energy_consumption_decil.csv", index=False)
 
 router_sum_difference = (df_nea_aux_sum_per_router["power_sum"] - df_ea_aux_sum_per_router["power_sum"]) / df_nea_aux_sum_per_router["power_sum"] * 100  # Diferencia porcentual total por router
 
@@ -561,7 +608,8 @@ df_router_sum_diff = pd.DataFrame({
 })
 
 # Guardar CSV con la diferencia
-df_router_sum_diff.to_csv("datasets-with-selected-routers//power_means_sum_difference_per_router_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_router_sum_diff.to_csv("datasets-with-selected-routers//power_means_sum_difference_per_router_with_base_energy_consumption_decil.csv", index=False)
 
 # Calcular la diferencia total por router y por hora (No-Energy-Aware - Energy-Aware)
 hour_columns = [str(i) for i in range(1, 25)]
@@ -571,8 +619,10 @@ df_router_hourly_diff = df_ea_grouped_aux.copy()
 df_router_hourly_diff[hour_columns] = (df_nea_grouped_aux[hour_columns] - df_ea_grouped_aux[hour_columns]) / df_nea_grouped_aux[hour_columns] * 100  # Diferencia porcentual por router y hora
     
 # Guardar CSV con la diferencia
-df_router_hourly_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_router_and_hour_with_base_energy_consumption_decil.csv", index=False)
+with profiler.phase("write"):
+    df_router_hourly_diff.to_csv("datasets-with-selected-routers/power_means_difference_per_router_and_hour_with_base_energy_consumption_decil.csv", index=False)
 
+profiler.mark("plotting")
 # Gráficas de barras comparativa con ajuste por consumo base
 x = np.arange(len(blocks))  # posiciones de las columnas
 width = 0.35  # ancho de las barras
@@ -707,4 +757,6 @@ plt.legend(title="Routers", ncol=4)
 plt.tight_layout()
 
 plt.savefig("graphics-with-selected-routers/increased_consumption_by_hour_all_routers_nea_decil.png", dpi=300)
-plt.close()
\ No newline at end of file
+plt.close()
+
+profiler.save()
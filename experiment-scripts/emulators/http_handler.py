@@ -0,0 +1,9 @@
+from http.server import BaseHTTPRequestHandler
+
+
+class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+    """Base of the emulator request handlers, serving persistent HTTP/1.1 connections"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, avoid delayed ACK stalls on keep-alive connections
+    disable_nagle_algorithm = True
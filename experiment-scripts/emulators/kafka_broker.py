@@ -0,0 +1,267 @@
+import json
+import time
+import argparse
+import threading
+import logging
+import urllib.parse
+from http.server import ThreadingHTTPServer
+
+# Import keep-alive base of the emulator request handlers
+from emulators.http_handler import KeepAliveRequestHandler
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default maximum number of records returned by a fetch
+DEFAULT_MAX_RECORDS = 500
+
+
+class TopicLog:
+    """Append-only log of a single-partition topic"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records = []
+        self.condition = threading.Condition()
+
+    @property
+    def end_offset(self) -> int:
+        return len(self.records)
+
+    def append(self, value, key: str = None, timestamp: float = None) -> int:
+        with self.condition:
+            offset = len(self.records)
+            self.records.append({
+                'offset': offset,
+                'key': key,
+                'value': value,
+                'timestamp': timestamp if timestamp is not None else time.time(),
+                'append_time': time.time()
+            })
+            self.condition.notify_all()
+        return offset
+
+    def read(self, offset: int, max_records: int = DEFAULT_MAX_RECORDS, timeout: float = 0.0) -> list:
+        """Records from offset, waiting up to timeout seconds if there are none yet"""
+        with self.condition:
+            if offset >= len(self.records) and timeout > 0:
+                self.condition.wait_for(lambda: offset < len(self.records), timeout)
+            return self.records[offset:offset + max_records]
+
+
+class Broker:
+    """
+    In-memory stand-in of a Kafka broker for local tests of telemetry consumers.
+
+    Topics are created on first use and hold a single partition, so records of a topic keep
+    their production order. Consumers fetch records from an offset with optional long polling,
+    and consumer groups commit their position per topic, which gives their lag as the distance
+    to the end of the log. It does not implement the Kafka wire protocol: clients use this
+    class in-process or the HTTP front end of start_server.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.topics = {}
+        self.committed = {}     # (group, topic) -> next offset to consume
+
+    def topic(self, name: str) -> TopicLog:
+        with self.lock:
+            if name not in self.topics:
+                self.topics[name] = TopicLog(name)
+            return self.topics[name]
+
+    def produce(self, topic: str, value, key: str = None, timestamp: float = None) -> int:
+        """
+        Append a record to a topic.
+
+        Args:
+            topic (str): Topic name
+            value: JSON-serializable record value
+            key (str): Record key
+            timestamp (float): Epoch of the record (defaults to the append time)
+
+        Returns:
+            int: Offset of the record
+        """
+        return self.topic(topic).append(value, key, timestamp)
+
+    def fetch(self, topic: str, offset: int = None, group: str = None, max_records: int = DEFAULT_MAX_RECORDS,
+              timeout: float = 0.0) -> list:
+        """
+        Read records of a topic.
+
+        Args:
+            topic (str): Topic name
+            offset (int): First offset to read (defaults to the committed offset of group, or 0)
+            group (str): Consumer group whose position is advanced past the returned records
+            max_records (int): Maximum number of records
+            timeout (float): Seconds to wait for records if there are none
+
+        Returns:
+            list: Record dicts with offset, key, value, timestamp and append_time
+        """
+        if offset is None:
+            with self.lock:
+                offset = self.committed.get((group, topic), 0)
+        records = self.topic(topic).read(offset, max_records, timeout)
+        if group is not None and records:
+            self.commit(group, topic, records[-1]['offset'] + 1)
+        return records
+
+    def commit(self, group: str, topic: str, offset: int):
+        with self.lock:
+            self.committed[(group, topic)] = max(offset, self.committed.get((group, topic), 0))
+
+    def offsets(self) -> dict:
+        """
+        End offset of every topic and committed offset and lag of every consumer group.
+
+        The lag of a group covers every topic, counting from offset 0 on the topics where the
+        group has not committed an offset yet.
+        """
+        with self.lock:
+            topics = dict(self.topics)
+            committed = dict(self.committed)
+        end_offsets = {name: log.end_offset for name, log in topics.items()}
+        groups = {}
+        for group in {group for group, _ in committed}:
+            for topic, end_offset in end_offsets.items():
+                offset = committed.get((group, topic), 0)
+                groups.setdefault(group, {})[topic] = {'committed': offset, 'lag': end_offset - offset}
+        return {'topics': end_offsets, 'groups': groups}
+
+
+class BrokerRequestHandler(KeepAliveRequestHandler):
+    """
+    HTTP front end of a Broker (set as the 'broker' attribute of the server).
+
+    POST /topics/<topic> appends the records of a JSON list ({'key', 'value', 'timestamp'} each),
+    GET /topics/<topic>?offset=&group=&max_records=&timeout= fetches records, and GET /offsets
+    returns end offsets and consumer group lag.
+    """
+
+    def _reply(self, status: int, payload):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _topic(self, url) -> str:
+        return urllib.parse.unquote(url.path[len('/topics/'):]) if url.path.startswith('/topics/') else None
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        topic = self._topic(url)
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            records = json.loads(self.rfile.read(length) or b'[]')
+            if not topic or not isinstance(records, list):
+                self._reply(400, {'error': "Expected a JSON list of records on /topics/<topic>"})
+                return
+            offsets = [self.server.broker.produce(topic, record.get('value'), record.get('key'), record.get('timestamp'))
+                       for record in records]
+            self._reply(200, {'offsets': offsets})
+        except (ValueError, AttributeError) as e:
+            self._reply(400, {'error': str(e)})
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = {name: values[0] for name, values in urllib.parse.parse_qs(url.query).items()}
+        broker = self.server.broker
+        if url.path == '/offsets':
+            self._reply(200, broker.offsets())
+            return
+        topic = self._topic(url)
+        if not topic:
+            self._reply(404, {'error': f"GET {url.path} not implemented by the broker"})
+            return
+        try:
+            records = broker.fetch(topic, int(query['offset']) if 'offset' in query else None, query.get('group'),
+                                   int(query.get('max_records', DEFAULT_MAX_RECORDS)), float(query.get('timeout', 0)))
+            self._reply(200, {'records': records})
+        except ValueError as e:
+            self._reply(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class BrokerClient:
+    """HTTP client of a broker started with start_server, with the produce/fetch/offsets methods of Broker"""
+
+    def __init__(self, location: str):
+        import requests
+
+        self.location = location.rstrip('/')
+        self.session = requests.Session()
+
+    def _url(self, topic: str) -> str:
+        return f"{self.location}/topics/{urllib.parse.quote(topic, safe='')}"
+
+    def produce_batch(self, topic: str, records: list) -> list:
+        """Append several {'key', 'value', 'timestamp'} records to a topic in one request"""
+        response = self.session.post(self._url(topic), json=records, timeout=10)
+        response.raise_for_status()
+        return response.json()['offsets']
+
+    def produce(self, topic: str, value, key: str = None, timestamp: float = None) -> int:
+        return self.produce_batch(topic, [{'key': key, 'value': value, 'timestamp': timestamp}])[0]
+
+    def fetch(self, topic: str, offset: int = None, group: str = None, max_records: int = DEFAULT_MAX_RECORDS,
+              timeout: float = 0.0) -> list:
+        params = {'max_records': max_records, 'timeout': timeout}
+        if offset is not None:
+            params['offset'] = offset
+        if group is not None:
+            params['group'] = group
+        response = self.session.get(self._url(topic), params=params, timeout=timeout + 10)
+        response.raise_for_status()
+        return response.json()['records']
+
+    def offsets(self) -> dict:
+        response = self.session.get(f"{self.location}/offsets", timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, broker: Broker = None) -> ThreadingHTTPServer:
+    """
+    Start the HTTP front end of a broker in a background thread.
+
+    Args:
+        host (str): Listening address
+        port (int): Listening port (0 picks a free port)
+        broker (Broker): Broker to serve (a new one by default)
+
+    Returns:
+        ThreadingHTTPServer: Running server; its broker is available as server.broker
+    """
+    server = ThreadingHTTPServer((host, port), BrokerRequestHandler)
+    server.daemon_threads = True
+    server.broker = broker if broker is not None else Broker()
+    threading.Thread(target=server.serve_forever, name="kafka-broker", daemon=True).start()
+    logger.info(f"Broker stand-in listening on http://{host}:{server.server_port}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='In-memory Kafka broker stand-in with an HTTP front end (not the Kafka protocol)')
+    parser.add_argument('--host', default="127.0.0.1", help='Listening address')
+    parser.add_argument('--port', type=int, default=9092, help='Listening port')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    server = start_server(args.host, args.port)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import logging
+import urllib.parse
+from collections import Counter
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ncs_client import LatencyHistogram
+from emulators.http_handler import KeepAliveRequestHandler
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default emulation parameters
+DEFAULT_INSTALL_LATENCY = 0.5   # Mean seconds between a flow request and its route being installed
+DEFAULT_INSTALL_JITTER = 0.1    # Maximum deviation in seconds from the mean install latency
+DEFAULT_FAILURE_RATE = 0.0      # Fraction of flow requests whose route is never installed
+DEFAULT_ERROR_RATE = 0.0        # Fraction of requests answered with 503 Service Unavailable
+
+# S3 prefix of the flows snapshots, read by the aggregators
+FLOWS_PREFIX = "flows/"
+
+
+class NCSEmulator:
+    """
+    In-memory flow table of the emulated Network Control Stack.
+
+    Every POST on a flow schedules its route installation after a random latency, after which
+    GET on the flow reports the status 'installed' (or 'failed' for the configured fraction of
+    requests), following the contract of ncs_client.route_status. After every change of
+    the flow table, a snapshot of the active flows is written to the store as
+    flows/flows_<YYYYmmdd_HHMMSS>.json, in the format of the initial flows file of
+    minio_flow_uploader. Request counts and handling times are recorded per method.
+    """
+
+    def __init__(self, store=None, bucket: str = None, install_latency: float = DEFAULT_INSTALL_LATENCY,
+                 install_jitter: float = DEFAULT_INSTALL_JITTER, failure_rate: float = DEFAULT_FAILURE_RATE,
+                 error_rate: float = DEFAULT_ERROR_RATE, seed: int = None):
+        """
+        Args:
+            store: Object with a boto3-like put_object method (FileSystemStore or boto3 client),
+                   or None to keep no snapshots
+            bucket (str): Bucket of the snapshots
+            install_latency (float): Mean route install latency in seconds
+            install_jitter (float): Maximum deviation from the mean latency in seconds
+            failure_rate (float): Fraction of flows whose route installation fails
+            error_rate (float): Fraction of requests rejected with 503
+            seed (int): Seed of the random generator, for reproducible runs
+        """
+        self.store = store
+        self.bucket = bucket
+        self.install_latency = install_latency
+        self.install_jitter = install_jitter
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.flows = {}
+        self.calls = Counter()
+        self.latency = {}
+        self.snapshots = 0
+
+    def rejects_request(self) -> bool:
+        """Draw whether the current request is answered with an injected error"""
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def post_flow(self, dst_ip: str) -> tuple:
+        now = time.time()
+        with self.lock:
+            latency = max(0.0, self.install_latency + self.random.uniform(-self.install_jitter, self.install_jitter))
+            existing = dst_ip in self.flows
+            self.flows[dst_ip] = {
+                '_id': dst_ip,
+                'version': 2,
+                'install_at': now + latency,
+                'fails': self.random.random() < self.failure_rate,
+                'timestamps': {'ts_api_created': now}
+            }
+            self._write_snapshot()
+        return 200, {'message': f"Flow {dst_ip} {'updated' if existing else 'created'}"}
+
+    def get_flow(self, dst_ip: str) -> tuple:
+        with self.lock:
+            flow = self.flows.get(dst_ip)
+            if flow is None:
+                return 404, {'error': f"Flow {dst_ip} not found"}
+            return 200, {'flow': self._describe(flow, time.time())}
+
+    def list_flows(self) -> tuple:
+        now = time.time()
+        with self.lock:
+            return 200, {'flows': [self._describe(flow, now) for flow in self.flows.values()]}
+
+    def delete_flow(self, dst_ip: str) -> tuple:
+        with self.lock:
+            if self.flows.pop(dst_ip, None) is None:
+                return 404, {'error': f"Flow {dst_ip} not found"}
+            self._write_snapshot()
+        return 200, {'message': f"Flow {dst_ip} deleted"}
+
+    def _describe(self, flow: dict, now: float) -> dict:
+        """Public view of a flow, with the status of its route at time now"""
+        timestamps = dict(flow['timestamps'])
+        if now < flow['install_at']:
+            status = 'pending'
+        elif flow['fails']:
+            status = 'failed'
+        else:
+            status = 'installed'
+            timestamps['ts_route_installed'] = flow['install_at']
+        return {'_id': flow['_id'], 'version': flow['version'], 'status': status, 'timestamps': timestamps}
+
+    def _write_snapshot(self):
+        """Write the active flows to the store (called with the lock held)"""
+        if self.store is None:
+            return
+        flows_data = {
+            "flows": [{'_id': flow['_id'], 'version': flow['version'], 'timestamps': flow['timestamps']}
+                      for flow in self.flows.values()],
+            "inactive_routers": []
+        }
+        file_key = f"{FLOWS_PREFIX}flows_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            self.store.put_object(Bucket=self.bucket, Key=file_key, Body=json.dumps(flows_data, indent=4).encode("utf-8"))
+            self.snapshots += 1
+        except Exception as e:
+            logger.error(f"Error writing flows snapshot {file_key}: {e}")
+
+    def observe(self, method: str, seconds: float):
+        """Record the handling time of a request"""
+        with self.lock:
+            self.calls[method] += 1
+            histogram = self.latency.setdefault(method, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def stats(self) -> dict:
+        """Request counts and handling times per method, and size of the flow table"""
+        with self.lock:
+            return {
+                'calls': dict(self.calls),
+                'latency': {method: {'count': histogram.count,
+                                     'p50': histogram.percentile(0.50),
+                                     'p95': histogram.percentile(0.95),
+                                     'max': histogram.max}
+                            for method, histogram in self.latency.items()},
+                'active_flows': len(self.flows),
+                'snapshots': self.snapshots
+            }
+
+
+class NCSRequestHandler(KeepAliveRequestHandler):
+    """HTTP front end of an NCSEmulator (set as the 'emulator' attribute of the server)"""
+
+    def _handle(self, method: str):
+        started = time.monotonic()
+        emulator = self.server.emulator
+        path = urllib.parse.unquote(self.path.split('?')[0]).rstrip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        if path == '/emulator/stats' and method == 'GET':
+            self._reply(200, emulator.stats())
+            return
+
+        if emulator.rejects_request():
+            status, payload = 503, {'error': "Injected error"}
+        elif path == '/flows' and method == 'GET':
+            status, payload = emulator.list_flows()
+        elif path.startswith('/flows/'):
+            dst_ip = path[len('/flows/'):]
+            handler = {'POST': emulator.post_flow, 'GET': emulator.get_flow, 'DELETE': emulator.delete_flow}[method]
+            status, payload = handler(dst_ip)
+        else:
+            status, payload = 404, {'error': f"{method} {path} not implemented by the emulator"}
+
+        self._reply(status, payload)
+        emulator.observe(method, time.monotonic() - started)
+
+    def _reply(self, status: int, payload: dict):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **emulator_args) -> ThreadingHTTPServer:
+    """
+    Start an emulated NCS server in a background thread.
+
+    Args:
+        host (str): Listening address
+        port (int): Listening port (0 picks a free port)
+        **emulator_args: Arguments of the NCSEmulator
+
+    Returns:
+        ThreadingHTTPServer: Running server; its location is f"http://{host}:{server.server_port}"
+    """
+    server = ThreadingHTTPServer((host, port), NCSRequestHandler)
+    server.daemon_threads = True
+    server.emulator = NCSEmulator(**emulator_args)
+    threading.Thread(target=server.serve_forever, name="ncs-emulator", daemon=True).start()
+    logger.info(f"NCS emulator listening on http://{host}:{server.server_port}")
+    return server
+
+
+if __name__ == "__main__":
+    from emulators import s3_server
+
+    parser = argparse.ArgumentParser(description='Local NCS emulator for offline runs of the traffic scripts')
+    parser.add_argument('--host', default="127.0.0.1", help='Listening address')
+    parser.add_argument('--port', type=int, default=5000, help='Listening port')
+    parser.add_argument('--install-latency', type=float, default=DEFAULT_INSTALL_LATENCY, help='Mean route install latency (s)')
+    parser.add_argument('--install-jitter', type=float, default=DEFAULT_INSTALL_JITTER, help='Maximum deviation of the install latency (s)')
+    parser.add_argument('--failure-rate', type=float, default=DEFAULT_FAILURE_RATE, help='Fraction of route installations that fail')
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_ERROR_RATE, help='Fraction of requests answered with 503')
+    parser.add_argument('--seed', type=int, help='Random seed')
+    parser.add_argument('--s3-root', help='Directory of the filesystem-backed S3 stand-in (no snapshots if not set)')
+    parser.add_argument('--s3-port', type=int, default=9000, help='Port of the S3 stand-in (0 to not serve it over HTTP)')
+    parser.add_argument('--bucket', default="experiment", help='Bucket of the flows snapshots')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # Serve the snapshots over S3 so the uploader and the aggregators can use the same bucket
+    store = None
+    servers = []
+    if args.s3_root:
+        if args.s3_port:
+            servers.append(s3_server.start_server(args.s3_root, args.host, args.s3_port, [args.bucket]))
+            store = servers[-1].store
+        else:
+            store = s3_server.FileSystemStore(args.s3_root)
+            store.create_bucket(Bucket=args.bucket)
+
+    servers.append(start_server(args.host, args.port, store=store, bucket=args.bucket,
+                                install_latency=args.install_latency, install_jitter=args.install_jitter,
+                                failure_rate=args.failure_rate, error_rate=args.error_rate, seed=args.seed))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
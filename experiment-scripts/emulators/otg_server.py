@@ -0,0 +1,358 @@
+import json
+import time
+import argparse
+import threading
+import logging
+from collections import Counter
+from http.server import ThreadingHTTPServer
+
+# Import keep-alive base of the emulator request handlers
+from emulators.http_handler import KeepAliveRequestHandler
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default emulation parameters
+DEFAULT_LINE_RATE_GBPS = 10.0   # Port speed used for percentage rates
+DEFAULT_PACKET_LATENCY = 0.05   # Seconds between a packet being sent and received
+DEFAULT_LOSS = 0.0              # Fraction of packets lost
+DEFAULT_API_LATENCY = 0.0       # Seconds added to every API response
+
+# Mean size of the predefined IMIX weight pairs
+IMIX_MEAN_SIZE = 353.83
+
+
+def _mean_frame_size(size: dict) -> float:
+    """Mean frame size in bytes of an OTG flow size object"""
+    choice = size.get('choice', 'fixed')
+    if choice == 'fixed':
+        return float(size.get('fixed', 64))
+    if choice == 'increment':
+        increment = size.get('increment', {})
+        return (increment.get('start', 64) + increment.get('end', 1518)) / 2
+    if choice == 'random':
+        random = size.get('random', {})
+        return (random.get('min', 64) + random.get('max', 1518)) / 2
+    if choice == 'weight_pairs':
+        weight_pairs = size.get('weight_pairs', {})
+        pairs = weight_pairs.get('custom', []) if weight_pairs.get('choice') == 'custom' else []
+        total_weight = sum(pair.get('weight', 1) for pair in pairs)
+        if total_weight > 0:
+            return sum(pair.get('size', 64) * pair.get('weight', 1) for pair in pairs) / total_weight
+        return IMIX_MEAN_SIZE
+    return 64.0
+
+
+def _frame_rate(rate: dict, frame_size: float, line_rate_bps: float) -> float:
+    """Frame rate in frames per second of an OTG flow rate object"""
+    # 64-bit values are serialized as strings
+    choice = rate.get('choice', 'pps')
+    bits_per_frame = frame_size * 8
+    if choice == 'pps':
+        return float(rate.get('pps', 1000))
+    if choice == 'bps':
+        return float(rate.get('bps', 1_000_000_000)) / bits_per_frame
+    if choice == 'kbps':
+        return float(rate.get('kbps', 1_000_000)) * 1e3 / bits_per_frame
+    if choice == 'mbps':
+        return float(rate.get('mbps', 1_000)) * 1e6 / bits_per_frame
+    if choice == 'gbps':
+        return float(rate.get('gbps', 1)) * 1e9 / bits_per_frame
+    if choice == 'percentage':
+        return float(rate.get('percentage', 100)) / 100 * line_rate_bps / bits_per_frame
+    return 1000.0
+
+
+class EmulatedFlow:
+    """
+    Counters of one configured flow, integrated from its rate over the transmission periods.
+
+    Frames are received packet_latency seconds after being sent, and a fixed fraction of them
+    is lost, so receive counters keep moving for a short time after the flow is stopped.
+    """
+
+    def __init__(self, flow: dict, line_rate_bps: float):
+        self.name = flow['name']
+        tx_rx = flow.get('tx_rx', {})
+        if tx_rx.get('choice') == 'port':
+            self.tx_port = tx_rx['port'].get('tx_name', '')
+            self.rx_port = (tx_rx['port'].get('rx_names') or [''])[0]
+        else:
+            self.tx_port = (tx_rx.get('device', {}).get('tx_names') or [''])[0]
+            self.rx_port = (tx_rx.get('device', {}).get('rx_names') or [''])[0]
+        self.periods = []       # (start, stop, frame_rate) of closed transmission periods
+        self.started_at = None  # Start of the current transmission period
+        self.first_start = None
+        self.line_rate_bps = line_rate_bps
+        self.configure(flow)
+
+    def configure(self, flow: dict):
+        """Apply the size, rate and duration of the flow, closing the current period if needed"""
+        now = time.monotonic()
+        if self.started_at is not None:
+            self.periods.append((self.started_at, now, self.frame_rate))
+            self.started_at = now
+        self.frame_size = _mean_frame_size(flow.get('size', {}))
+        self.frame_rate = _frame_rate(flow.get('rate', {}), self.frame_size, self.line_rate_bps)
+        duration = flow.get('duration', {})
+        self.max_seconds = None
+        if duration.get('choice') == 'fixed_seconds':
+            self.max_seconds = float(duration.get('fixed_seconds', {}).get('seconds', 0)) or None
+        elif duration.get('choice') == 'fixed_packets':
+            packets = int(duration.get('fixed_packets', {}).get('packets', 0))
+            self.max_seconds = packets / self.frame_rate if packets and self.frame_rate > 0 else None
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+            if self.first_start is None:
+                self.first_start = self.started_at
+
+    def stop(self):
+        if self.started_at is not None:
+            self.periods.append((self.started_at, time.monotonic(), self.frame_rate))
+            self.started_at = None
+
+    def _current_stop(self, now: float) -> float:
+        """End of the current period, honoring the flow duration"""
+        if self.max_seconds is not None and now - self.started_at >= self.max_seconds:
+            return self.started_at + self.max_seconds
+        return now
+
+    def transmitting(self, now: float) -> bool:
+        return self.started_at is not None and self._current_stop(now) == now
+
+    def frames_sent_until(self, t: float) -> float:
+        """Frames sent before time t"""
+        periods = list(self.periods)
+        if self.started_at is not None:
+            periods.append((self.started_at, self._current_stop(t), self.frame_rate))
+        return sum(max(0.0, min(stop, t) - start) * rate for start, stop, rate in periods)
+
+    def metrics(self, now: float, packet_latency: float, loss: float) -> dict:
+        frames_tx = int(self.frames_sent_until(now))
+        frames_rx = int(self.frames_sent_until(now - packet_latency) * (1 - loss))
+        transmitting = self.transmitting(now)
+
+        # Packet timestamps are reported on the wall clock, converted from the monotonic one
+        first_ns = last_ns = 0
+        if self.first_start is not None and now - self.first_start >= packet_latency:
+            last_sent = self._current_stop(now) if self.started_at is not None else self.periods[-1][1]
+            epoch_offset = time.time() - now
+            first_ns = int((self.first_start + packet_latency + epoch_offset) * 1e9)
+            last_ns = int((min(now, last_sent + packet_latency) + epoch_offset) * 1e9)
+
+        return {
+            'name': self.name,
+            'port_tx': self.tx_port,
+            'port_rx': self.rx_port,
+            'transmit': 'started' if transmitting else 'stopped',
+            'frames_tx': frames_tx,
+            'frames_rx': frames_rx,
+            'bytes_tx': int(frames_tx * self.frame_size),
+            'bytes_rx': int(frames_rx * self.frame_size),
+            'frames_tx_rate': self.frame_rate if transmitting else 0.0,
+            'frames_rx_rate': self.frame_rate * (1 - loss) if transmitting else 0.0,
+            'loss': loss * 100 if frames_tx else 0.0,
+            'timestamps': {
+                'first_timestamp_ns': first_ns,
+                'last_timestamp_ns': last_ns
+            },
+            'latency': {
+                'minimum_ns': packet_latency * 1e9,
+                'maximum_ns': packet_latency * 1e9,
+                'average_ns': packet_latency * 1e9
+            },
+            'tagged_metrics': []
+        }
+
+
+class OTGEmulator:
+    """
+    In-memory state of the emulated traffic generator.
+
+    Implements the subset of the OTG API used by the traffic scripts: set/get/update config,
+    flow transmit control state and flow/port metrics. Every call is counted per endpoint.
+    """
+
+    def __init__(self, line_rate_gbps: float = DEFAULT_LINE_RATE_GBPS, packet_latency: float = DEFAULT_PACKET_LATENCY,
+                 loss: float = DEFAULT_LOSS):
+        self.line_rate_bps = line_rate_gbps * 1e9
+        self.packet_latency = packet_latency
+        self.loss = loss
+        self.lock = threading.Lock()
+        self.config = {}
+        self.flows = {}
+        self.calls = Counter()
+
+    def set_config(self, config: dict) -> dict:
+        with self.lock:
+            self.config = config
+            # A new configuration resets every flow and its counters
+            self.flows = {flow['name']: EmulatedFlow(flow, self.line_rate_bps) for flow in config.get('flows', [])}
+        return {'warnings': []}
+
+    def get_config(self) -> dict:
+        with self.lock:
+            return self.config
+
+    def update_config(self, update: dict) -> dict:
+        with self.lock:
+            if update.get('choice', 'flows') == 'flows':
+                property_names = update.get('flows', {}).get('property_names', [])
+                configured = {flow['name']: flow for flow in self.config.get('flows', [])}
+                for flow in update.get('flows', {}).get('flows', []):
+                    if flow.get('name') not in configured:
+                        raise ValueError(f"Flow {flow.get('name')} is not configured")
+                    for property_name in property_names:
+                        if property_name in flow:
+                            configured[flow['name']][property_name] = flow[property_name]
+                    self.flows[flow['name']].configure(configured[flow['name']])
+        return {'warnings': []}
+
+    def set_control_state(self, state: dict) -> dict:
+        with self.lock:
+            flow_transmit = state.get('traffic', {}).get('flow_transmit')
+            if flow_transmit is not None:
+                names = flow_transmit.get('flow_names') or list(self.flows)
+                for name in names:
+                    if name not in self.flows:
+                        raise ValueError(f"Flow {name} is not configured")
+                    if flow_transmit.get('state') == 'start':
+                        self.flows[name].start()
+                    else:
+                        self.flows[name].stop()
+        return {'warnings': []}
+
+    def get_metrics(self, request: dict) -> dict:
+        now = time.monotonic()
+        with self.lock:
+            if request.get('choice', 'flow') == 'port':
+                ports = {}
+                for flow in self.flows.values():
+                    metrics = flow.metrics(now, self.packet_latency, self.loss)
+                    tx = ports.setdefault(flow.tx_port, {'name': flow.tx_port, 'frames_tx': 0, 'frames_rx': 0, 'bytes_tx': 0, 'bytes_rx': 0})
+                    rx = ports.setdefault(flow.rx_port, {'name': flow.rx_port, 'frames_tx': 0, 'frames_rx': 0, 'bytes_tx': 0, 'bytes_rx': 0})
+                    tx['frames_tx'] += metrics['frames_tx']
+                    tx['bytes_tx'] += metrics['bytes_tx']
+                    rx['frames_rx'] += metrics['frames_rx']
+                    rx['bytes_rx'] += metrics['bytes_rx']
+                return {'choice': 'port_metrics', 'port_metrics': list(ports.values())}
+
+            names = request.get('flow', {}).get('flow_names') or list(self.flows)
+            return {
+                'choice': 'flow_metrics',
+                'flow_metrics': [self.flows[name].metrics(now, self.packet_latency, self.loss)
+                                 for name in names if name in self.flows]
+            }
+
+    def stats(self) -> dict:
+        """API call counts per endpoint"""
+        with self.lock:
+            return dict(self.calls)
+
+
+class OTGRequestHandler(KeepAliveRequestHandler):
+    """HTTP front end of an OTGEmulator (set as the 'emulator' attribute of the server)"""
+
+    ROUTES = {
+        ('POST', '/config'): lambda emulator, body: emulator.set_config(body),
+        ('GET', '/config'): lambda emulator, body: emulator.get_config(),
+        ('PATCH', '/config'): lambda emulator, body: emulator.update_config(body),
+        ('POST', '/control/state'): lambda emulator, body: emulator.set_control_state(body),
+        ('POST', '/monitor/metrics'): lambda emulator, body: emulator.get_metrics(body),
+        ('GET', '/capabilities/version'): lambda emulator, body: {'api_spec_version': '', 'sdk_version': '', 'app_version': 'emulator'},
+        ('GET', '/emulator/stats'): lambda emulator, body: emulator.stats()
+    }
+
+    def _handle(self, method: str):
+        emulator = self.server.emulator
+        path = self.path.split('?')[0].rstrip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        route = self.ROUTES.get((method, path))
+        if route is None:
+            self._reply(404, {'code': 404, 'errors': [f"{method} {path} not implemented by the emulator"]})
+            return
+
+        if path != '/emulator/stats':
+            with emulator.lock:
+                emulator.calls[f"{method} {path}"] += 1
+        if self.server.api_latency > 0:
+            time.sleep(self.server.api_latency)
+
+        try:
+            self._reply(200, route(emulator, body))
+        except (KeyError, ValueError) as e:
+            self._reply(400, {'code': 400, 'errors': [str(e)]})
+        except Exception as e:
+            logger.exception(f"Error handling {method} {path}")
+            self._reply(500, {'code': 500, 'errors': [str(e)]})
+
+    def _reply(self, status: int, payload: dict):
+        content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, api_latency: float = DEFAULT_API_LATENCY, **emulator_args) -> ThreadingHTTPServer:
+    """
+    Start an emulated OTG server in a background thread.
+
+    Args:
+        host (str): Listening address
+        port (int): Listening port (0 picks a free port)
+        api_latency (float): Seconds added to every API response
+        **emulator_args: line_rate_gbps, packet_latency and loss of the OTGEmulator
+
+    Returns:
+        ThreadingHTTPServer: Running server; its location is f"http://{host}:{server.server_port}"
+    """
+    server = ThreadingHTTPServer((host, port), OTGRequestHandler)
+    server.daemon_threads = True
+    server.emulator = OTGEmulator(**emulator_args)
+    server.api_latency = api_latency
+    threading.Thread(target=server.serve_forever, name="otg-emulator", daemon=True).start()
+    logger.info(f"OTG emulator listening on http://{host}:{server.server_port}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local OTG emulator for offline runs of the traffic scripts')
+    parser.add_argument('--host', default="127.0.0.1", help='Listening address')
+    parser.add_argument('--port', type=int, default=8443, help='Listening port (plain HTTP)')
+    parser.add_argument('--line-rate-gbps', type=float, default=DEFAULT_LINE_RATE_GBPS, help='Port speed for percentage rates')
+    parser.add_argument('--packet-latency', type=float, default=DEFAULT_PACKET_LATENCY, help='Packet latency in seconds')
+    parser.add_argument('--loss', type=float, default=DEFAULT_LOSS, help='Fraction of packets lost')
+    parser.add_argument('--api-latency', type=float, default=DEFAULT_API_LATENCY, help='Seconds added to every API response')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    server = start_server(args.host, args.port, api_latency=args.api_latency, line_rate_gbps=args.line_rate_gbps,
+                          packet_latency=args.packet_latency, loss=args.loss)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
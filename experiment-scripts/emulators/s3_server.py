@@ -0,0 +1,439 @@
+import io
+import os
+import re
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import threading
+import logging
+import urllib.parse
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer
+from xml.sax.saxutils import escape
+from xml.etree import ElementTree
+
+# Import keep-alive base of the emulator request handlers
+from emulators.http_handler import KeepAliveRequestHandler
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default maximum number of keys of a listing page (same as S3)
+DEFAULT_MAX_KEYS = 1000
+
+# S3 Select expressions supported by the emulator: projections of JSON paths with optional aliases
+SELECT_PATTERN = re.compile(r'^\s*SELECT\s+(?P<projection>.+?)\s+FROM\s+S3Object(?:\[\*\])?(?:\s+(?:AS\s+)?(?P<alias>\w+))?\s*;?\s*$',
+                            re.IGNORECASE | re.DOTALL)
+COLUMN_PATTERN = re.compile(r'^(?P<path>[\w.]+)(?:\s+AS\s+(?P<alias>\w+))?$', re.IGNORECASE)
+
+
+class FileSystemStore:
+    """
+    S3 stand-in keeping every bucket as a directory and every object as a file under root.
+
+    Object keys map to relative paths, so 'flows/flows_20251106_101500.json' of the bucket
+    'experiment' is stored at <root>/experiment/flows/flows_20251106_101500.json and can be
+    inspected with any file tool. Objects are written atomically. The put_object, get_object,
+    delete_object and list_objects_v2 methods accept the same arguments as the boto3 client,
+    so the store can replace it in-process.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, bucket: str, key: str = "") -> str:
+        path = os.path.abspath(os.path.join(self.root, bucket, key))
+        if not path.startswith(os.path.join(self.root, bucket)) or not bucket or '/' in bucket:
+            raise ValueError(f"Invalid bucket or key: {bucket}/{key}")
+        return path
+
+    def create_bucket(self, Bucket: str, **kwargs) -> dict:
+        os.makedirs(self._path(Bucket), exist_ok=True)
+        return {}
+
+    def list_buckets(self) -> dict:
+        return {'Buckets': [{'Name': name, 'CreationDate': self._mtime(os.path.join(self.root, name))}
+                            for name in sorted(os.listdir(self.root)) if os.path.isdir(os.path.join(self.root, name))]}
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> dict:
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        elif hasattr(Body, 'read'):
+            Body = Body.read()
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(Body)
+        os.replace(temp_path, path)
+        return {'ETag': f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise KeyError(Key)
+        with open(path, 'rb') as f:
+            body = f.read()
+        return {
+            'Body': io.BytesIO(body),
+            'ContentLength': len(body),
+            'ETag': f'"{hashlib.md5(body).hexdigest()}"',
+            'LastModified': self._mtime(path)
+        }
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        path = self._path(Bucket, Key)
+        if os.path.isfile(path):
+            os.remove(path)
+        return {}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", MaxKeys: int = DEFAULT_MAX_KEYS,
+                        ContinuationToken: str = None, StartAfter: str = None, **kwargs) -> dict:
+        """
+        List the objects of a bucket in key order, one page at a time.
+
+        Returns:
+            dict: Same fields as the boto3 response ('Contents', 'KeyCount', 'IsTruncated' and
+                  'NextContinuationToken' if truncated)
+        """
+        bucket_path = self._path(Bucket)
+        if not os.path.isdir(bucket_path):
+            raise KeyError(Bucket)
+
+        keys = []
+        for directory, _, files in os.walk(bucket_path):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), bucket_path).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    keys.append(key)
+        keys.sort()
+
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [key for key in keys if key > after]
+        page = keys[:MaxKeys]
+
+        response = {
+            'Name': Bucket,
+            'Prefix': Prefix,
+            'KeyCount': len(page),
+            'MaxKeys': MaxKeys,
+            'IsTruncated': len(keys) > len(page),
+            'Contents': [{
+                'Key': key,
+                'Size': os.path.getsize(os.path.join(bucket_path, key)),
+                'LastModified': self._mtime(os.path.join(bucket_path, key))
+            } for key in page]
+        }
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        if not page:
+            del response['Contents']
+        return response
+
+    @staticmethod
+    def _mtime(path: str) -> datetime:
+        return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    """Decode a body sent with 'Content-Encoding: aws-chunked' (chunk signatures and trailers are ignored)"""
+    decoded = bytearray()
+    position = 0
+    while position < len(body):
+        line_end = body.index(b"\r\n", position)
+        size = int(body[position:line_end].split(b";")[0], 16)
+        if size == 0:
+            break
+        decoded += body[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+    return bytes(decoded)
+
+
+def _iso(timestamp: datetime) -> str:
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def select_json(body: bytes, expression: str, lines: bool = False) -> list:
+    """
+    Evaluate an S3 Select projection (SELECT s.a.b AS x, ... FROM S3Object s) on a JSON object.
+
+    Args:
+        body (bytes): JSON document, or JSON Lines if lines
+        expression (str): SQL expression; only projections of paths (or *) are supported
+        lines (bool): The object holds one JSON record per line
+
+    Returns:
+        list: Projected records (missing paths are left out, as S3 does)
+
+    Raises:
+        ValueError: If the expression is not supported
+    """
+    match = SELECT_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"Unsupported expression: {expression}")
+    alias = match.group('alias')
+    columns = []
+    for position, column in enumerate(match.group('projection').split(','), start=1):
+        column = column.strip()
+        if column == '*' or (alias and column == f"{alias}.*"):
+            columns.append(None)
+            continue
+        column_match = COLUMN_PATTERN.match(column)
+        if not column_match:
+            raise ValueError(f"Unsupported projection: {column}")
+        path = column_match.group('path').split('.')
+        if alias and path[0] == alias:
+            path = path[1:]
+        columns.append((column_match.group('alias') or f"_{position}", path))
+
+    text = body.decode("utf-8").strip()
+    documents = [json.loads(line) for line in text.splitlines() if line.strip()] if lines else [json.loads(text)]
+    records = []
+    for document in documents:
+        if None in columns:
+            records.append(document)
+            continue
+        record = {}
+        for name, path in columns:
+            value = document
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+                if value is None:
+                    break
+            if value is not None:
+                record[name] = value
+        records.append(record)
+    return records
+
+
+def _event(event_type: str, payload: bytes = b"", content_type: str = None) -> bytes:
+    """Encode one message of the event stream of a SelectObjectContent response"""
+    headers = {':message-type': 'event', ':event-type': event_type}
+    if content_type:
+        headers[':content-type'] = content_type
+    encoded = b"".join(struct.pack('>B', len(name)) + name.encode() + b"\x07" + struct.pack('>H', len(value))
+                       + value.encode() for name, value in headers.items())
+    prelude = struct.pack('>II', 16 + len(encoded) + len(payload), len(encoded))
+    message = prelude + struct.pack('>I', zlib.crc32(prelude)) + encoded + payload
+    return message + struct.pack('>I', zlib.crc32(message))
+
+
+class S3RequestHandler(KeepAliveRequestHandler):
+    """
+    HTTP front end of a FileSystemStore (set as the 'store' attribute of the server).
+
+    Implements the path-style requests used by boto3 for buckets and objects: create bucket,
+    list buckets, put/get/head/delete object, ListObjectsV2 and SelectObjectContent on JSON
+    objects (projections only, see select_json; disabled if the 'select' attribute of the
+    server is False). Requests are not authenticated.
+    """
+
+    def _split_path(self) -> tuple:
+        url = urllib.parse.urlsplit(self.path)
+        bucket, _, key = urllib.parse.unquote(url.path).lstrip('/').partition('/')
+        return bucket, key, urllib.parse.parse_qs(url.query, keep_blank_values=True)
+
+    def _read_body(self) -> bytes:
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''):
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            body = bytes(body)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if 'aws-chunked' in self.headers.get('Content-Encoding', '') or 'x-amz-decoded-content-length' in self.headers:
+            body = _decode_aws_chunked(body)
+        return body
+
+    def _reply(self, status: int, content: bytes = b"", content_type: str = 'application/xml', headers: dict = None,
+               send_body: bool = True):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(content)
+
+    def _error(self, status: int, code: str, message: str, send_body: bool = True):
+        content = (f'<?xml version="1.0" encoding="UTF-8"?>\n<Error><Code>{code}</Code>'
+                   f'<Message>{escape(message)}</Message></Error>').encode("utf-8")
+        self._reply(status, content, send_body=send_body)
+
+    def do_PUT(self):
+        store = self.server.store
+        bucket, key, _ = self._split_path()
+        body = self._read_body()
+        try:
+            if not key:
+                store.create_bucket(Bucket=bucket)
+                self._reply(200)
+                return
+            if not os.path.isdir(store._path(bucket)):
+                self._error(404, 'NoSuchBucket', f"Bucket {bucket} does not exist")
+                return
+            response = store.put_object(Bucket=bucket, Key=key, Body=body)
+            self._reply(200, headers={'ETag': response['ETag']})
+        except ValueError as e:
+            self._error(400, 'InvalidArgument', str(e))
+
+    def _get_object(self, send_body: bool):
+        store = self.server.store
+        bucket, key, query = self._split_path()
+        try:
+            if not bucket:
+                self._list_buckets()
+            elif not key:
+                self._list_objects(bucket, query)
+            else:
+                response = store.get_object(Bucket=bucket, Key=key)
+                self._reply(200, response['Body'].read(), 'application/octet-stream', send_body=send_body, headers={
+                    'ETag': response['ETag'],
+                    'Last-Modified': formatdate(response['LastModified'].timestamp(), usegmt=True)
+                })
+        except KeyError:
+            if key:
+                self._error(404, 'NoSuchKey', f"Key {key} does not exist", send_body=send_body)
+            else:
+                self._error(404, 'NoSuchBucket', f"Bucket {bucket} does not exist", send_body=send_body)
+        except ValueError as e:
+            self._error(400, 'InvalidArgument', str(e), send_body=send_body)
+
+    def _list_buckets(self):
+        buckets = ''.join(f"<Bucket><Name>{escape(bucket['Name'])}</Name>"
+                          f"<CreationDate>{_iso(bucket['CreationDate'])}</CreationDate></Bucket>"
+                          for bucket in self.server.store.list_buckets()['Buckets'])
+        content = (f'<?xml version="1.0" encoding="UTF-8"?>\n<ListAllMyBucketsResult>'
+                   f'<Owner><ID>emulator</ID></Owner><Buckets>{buckets}</Buckets></ListAllMyBucketsResult>')
+        self._reply(200, content.encode("utf-8"))
+
+    def _list_objects(self, bucket: str, query: dict):
+        first = lambda name, default=None: query.get(name, [default])[0]
+        response = self.server.store.list_objects_v2(
+            Bucket=bucket, Prefix=first('prefix', ''), MaxKeys=int(first('max-keys', DEFAULT_MAX_KEYS)),
+            ContinuationToken=first('continuation-token'), StartAfter=first('start-after')
+        )
+        contents = ''.join(f"<Contents><Key>{escape(obj['Key'])}</Key>"
+                           f"<LastModified>{_iso(obj['LastModified'])}</LastModified>"
+                           f"<Size>{obj['Size']}</Size><StorageClass>STANDARD</StorageClass></Contents>"
+                           for obj in response.get('Contents', []))
+        token = first('continuation-token')
+        content = (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                   f'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                   f"<Name>{escape(bucket)}</Name><Prefix>{escape(response['Prefix'])}</Prefix>"
+                   f"<KeyCount>{response['KeyCount']}</KeyCount><MaxKeys>{response['MaxKeys']}</MaxKeys>"
+                   f"<IsTruncated>{'true' if response['IsTruncated'] else 'false'}</IsTruncated>"
+                   + (f"<ContinuationToken>{escape(token)}</ContinuationToken>" if token else '')
+                   + (f"<NextContinuationToken>{escape(response['NextContinuationToken'])}</NextContinuationToken>"
+                      if response['IsTruncated'] else '')
+                   + f"{contents}</ListBucketResult>")
+        self._reply(200, content.encode("utf-8"))
+
+    def do_GET(self):
+        self._get_object(send_body=True)
+
+    def do_HEAD(self):
+        self._get_object(send_body=False)
+
+    def do_POST(self):
+        bucket, key, query = self._split_path()
+        body = self._read_body()
+        if 'select' not in query or not key or not getattr(self.server, 'select', True):
+            self._error(501, 'NotImplemented', "Only SelectObjectContent is implemented")
+            return
+        try:
+            request = ElementTree.fromstring(body)
+            expression = request.findtext('{*}Expression') or request.findtext('Expression') or ''
+            input_type = request.findtext('.//{*}InputSerialization/{*}JSON/{*}Type') or 'DOCUMENT'
+            delimiter = request.findtext('.//{*}OutputSerialization/{*}JSON/{*}RecordDelimiter') or '\n'
+            content = self.server.store.get_object(Bucket=bucket, Key=key)['Body'].read()
+            records = select_json(content, expression, lines=input_type.upper() == 'LINES')
+        except KeyError:
+            self._error(404, 'NoSuchKey', f"Key {key} does not exist")
+            return
+        except ValueError as e:
+            self._error(400, 'UnsupportedSyntax', str(e))
+            return
+        except ElementTree.ParseError as e:
+            self._error(400, 'MalformedXML', str(e))
+            return
+
+        returned = "".join(json.dumps(record, separators=(',', ':')) + delimiter for record in records).encode("utf-8")
+        stats = (f"<Stats><BytesScanned>{len(content)}</BytesScanned><BytesProcessed>{len(content)}</BytesProcessed>"
+                 f"<BytesReturned>{len(returned)}</BytesReturned></Stats>").encode("utf-8")
+        events = (_event('Records', returned, 'application/octet-stream') if returned else b"") \
+            + _event('Stats', stats, 'text/xml') + _event('End')
+        self._reply(200, events, 'application/octet-stream')
+
+    def do_DELETE(self):
+        bucket, key, _ = self._split_path()
+        try:
+            self.server.store.delete_object(Bucket=bucket, Key=key)
+            self._reply(204)
+        except ValueError as e:
+            self._error(400, 'InvalidArgument', str(e))
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def start_server(root: str, host: str = "127.0.0.1", port: int = 0, buckets: list = (),
+                 select: bool = True) -> ThreadingHTTPServer:
+    """
+    Start a filesystem-backed S3 server in a background thread.
+
+    Args:
+        root (str): Directory holding the buckets
+        host (str): Listening address
+        port (int): Listening port (0 picks a free port)
+        buckets (list): Buckets created at startup
+        select (bool): Serve SelectObjectContent requests (False answers them as not implemented)
+
+    Returns:
+        ThreadingHTTPServer: Running server; its store is available as server.store
+    """
+    server = ThreadingHTTPServer((host, port), S3RequestHandler)
+    server.daemon_threads = True
+    server.store = FileSystemStore(root)
+    server.select = select
+    for bucket in buckets:
+        server.store.create_bucket(Bucket=bucket)
+    threading.Thread(target=server.serve_forever, name="s3-emulator", daemon=True).start()
+    logger.info(f"S3 emulator listening on http://{host}:{server.server_port}, storing objects in {server.store.root}")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Filesystem-backed S3 stand-in for offline runs')
+    parser.add_argument('root', help='Directory holding the buckets')
+    parser.add_argument('--host', default="127.0.0.1", help='Listening address')
+    parser.add_argument('--port', type=int, default=9000, help='Listening port')
+    parser.add_argument('-b', '--bucket', action='append', default=[], help='Bucket created at startup (repeatable)')
+    parser.add_argument('--no-select', action='store_true', help='Answer S3 Select requests as not implemented')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    server = start_server(args.root, args.host, args.port, args.bucket, select=not args.no_select)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
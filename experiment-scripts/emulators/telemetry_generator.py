@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from experiment_journal import JOURNAL_PREFIX, EXPERIMENT_BEGIN, EXPERIMENT_END, FLOW_START, FLOW_STOP
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Name of the power consumption metric of the ML output
+POWER_METRIC = "node_network_power_consumption_wats"
+
+# Mean delays in seconds of each stage of the monitoring pipeline, measured on b5g:
+# node exporter -> Kafka producer -> Flink aggregation -> ML inference
+DEFAULT_PIPELINE_DELAYS = {
+    'collector': 0.06,
+    'process': 0.07,
+    'ml': 0.015
+}
+
+# Power curves: watts over time of a router given its base consumption
+POWER_CURVES = ('constant', 'sine', 'ramp', 'step')
+
+
+def ml_output(experiment_id: str, router: str, watts: float, metric_timestamp: float, collector_timestamp: float,
+              process_timestamp, ml_timestamp: float) -> dict:
+    """
+    Build one output of the ML stage of the monitoring stack.
+
+    Args:
+        experiment_id (str): Experiment ID
+        router (str): Router ID (e.g. r1)
+        watts (float): Power consumption in watts
+        metric_timestamp (float): Epoch of the node exporter sample
+        collector_timestamp (float): Epoch of the Kafka producer
+        process_timestamp: Epoch of the Flink aggregation (millisecond string as written by Flink)
+        ml_timestamp (float): Epoch of the ML inference
+
+    Returns:
+        dict: JSON-serializable content of the ML_r<router>/<epoch>.json object
+    """
+    return {
+        "experiment_id": experiment_id,
+        "node_exporter": f"{router}:9100",
+        "epoch_timestamp": metric_timestamp,
+        "debug_params": {
+            "metric_timestamp": metric_timestamp,
+            "collector_timestamp": collector_timestamp,
+            "process_timestamp": process_timestamp,
+            "ml_timestamp": ml_timestamp
+        },
+        "output_ml_metrics": [
+            {"name": POWER_METRIC, "value": [watts]}
+        ]
+    }
+
+
+class TelemetryGenerator:
+    """
+    Generator of synthetic ML_r<router>/<epoch>.json objects of the monitoring stack.
+
+    Every router produces one object per sampling interval with the same schema as the ML
+    output (experiment_id, node_exporter, epoch_timestamp, debug_params timestamps and
+    output_ml_metrics). Power follows a curve around a per-router base consumption plus
+    gaussian noise, and each pipeline stage adds its mean delay with relative jitter. The
+    output is reproducible for a given seed.
+    """
+
+    def __init__(self, routers: int, samples: int, interval: float = 5.0, start: float = None,
+                 experiment_id: str = "synthetic", curve: str = 'sine', base_watts: tuple = (70.0, 710.0),
+                 amplitude: float = 5.0, period: float = 3600.0, noise: float = 0.2,
+                 delays: dict = None, jitter: float = 0.2, seed: int = None):
+        """
+        Args:
+            routers (int): Number of routers, named r1..rN
+            samples (int): Objects per router
+            interval (float): Seconds between samples of a router
+            start (float): Epoch of the first sample (defaults to samples * interval seconds ago)
+            experiment_id (str): experiment_id field of the objects
+            curve (str): Power curve, one of POWER_CURVES
+            base_watts (tuple): (min, max) range of the base consumption drawn for each router
+            amplitude (float): Watts added by the curve at its peak
+            period (float): Period in seconds of the sine and step curves
+            noise (float): Standard deviation in watts of the power noise
+            delays (dict): Mean pipeline delays in seconds (DEFAULT_PIPELINE_DELAYS keys)
+            jitter (float): Relative jitter of the pipeline delays and the sampling instants
+            seed (int): Seed of the random generator
+        """
+        if curve not in POWER_CURVES:
+            raise ValueError(f"Unknown power curve '{curve}', expected one of {POWER_CURVES}")
+        self.routers = [f"r{i}" for i in range(1, routers + 1)]
+        self.samples = samples
+        self.interval = interval
+        self.start = start if start is not None else time.time() - samples * interval
+        self.experiment_id = experiment_id
+        self.curve = curve
+        self.amplitude = amplitude
+        self.period = period
+        self.noise = noise
+        self.delays = {**DEFAULT_PIPELINE_DELAYS, **(delays or {})}
+        self.jitter = jitter
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+
+        draw = random.Random(self.seed)
+        self.base = {router: draw.uniform(*base_watts) for router in self.routers}
+        self.phase = {router: draw.uniform(0, 2 * math.pi) for router in self.routers}
+
+    @property
+    def count(self) -> int:
+        """Total number of objects"""
+        return len(self.routers) * self.samples
+
+    def window(self) -> tuple:
+        """(begin_epoch, finish_epoch) enclosing every sample"""
+        return self.start - self.interval / 2, self.start + self.samples * self.interval
+
+    def power(self, router: str, elapsed: float) -> float:
+        """Noise-free power in watts of a router elapsed seconds after the start"""
+        base = self.base[router]
+        if self.curve == 'sine':
+            return base + self.amplitude * math.sin(2 * math.pi * elapsed / self.period + self.phase[router])
+        if self.curve == 'ramp':
+            return base + self.amplitude * elapsed / max(self.samples * self.interval, self.interval)
+        if self.curve == 'step':
+            return base + self.amplitude * (int(elapsed // self.period) % 2)
+        return base
+
+    def _delay(self, draw: random.Random, stage: str) -> float:
+        mean = self.delays[stage]
+        return max(0.0, mean * (1 + draw.uniform(-self.jitter, self.jitter)))
+
+    def objects(self, sample_range: range = None):
+        """
+        Generate the objects in time order.
+
+        Args:
+            sample_range (range): Sample indexes to generate (all of them by default)
+
+        Yields:
+            tuple: (key, content) with the object key and its JSON-serializable content
+        """
+        for sample in sample_range if sample_range is not None else range(self.samples):
+            # One generator per sample keeps chunks of samples independent and reproducible
+            draw = random.Random(f"{self.seed}-{sample}")
+            for router in self.routers:
+                elapsed = sample * self.interval
+                metric_timestamp = self.start + elapsed + draw.uniform(-self.jitter, self.jitter) * self.interval / 10
+                collector_timestamp = metric_timestamp + self._delay(draw, 'collector')
+                process_timestamp = round(collector_timestamp + self._delay(draw, 'process'), 3)
+                ml_timestamp = process_timestamp + self._delay(draw, 'ml')
+                watts = self.power(router, elapsed) + draw.gauss(0, self.noise)
+                content = ml_output(self.experiment_id, router, watts, metric_timestamp, collector_timestamp,
+                                    f"{process_timestamp:.3f}", ml_timestamp)
+                yield f"ML_{router}/{metric_timestamp:.6f}.json", content
+
+    def journal(self) -> tuple:
+        """
+        Experiment journal whose window encloses every sample.
+
+        Returns:
+            tuple: (key, content) of the journal object
+        """
+        begin, finish = self.window()
+        events = [(EXPERIMENT_BEGIN, begin), (FLOW_START, begin), (FLOW_STOP, finish), (EXPERIMENT_END, finish)]
+        lines = [json.dumps({'seq': seq, 'event': event, 'monotonic_ns': int((epoch - begin) * 1e9), 'epoch': epoch})
+                 for seq, (event, epoch) in enumerate(events)]
+        name = f"journal_{time.strftime('%Y%m%d_%H%M%S', time.localtime(begin))}"
+        return f"{JOURNAL_PREFIX}{name}.jsonl", "\n".join(lines) + "\n"
+
+    def write(self, client, bucket: str, workers: int = 8, chunk_samples: int = 100, journal: bool = True) -> int:
+        """
+        Write every object (and optionally the experiment journal) to a bucket.
+
+        Args:
+            client: boto3 S3 client or FileSystemStore
+            bucket (str): Destination bucket
+            workers (int): Concurrent writers
+            chunk_samples (int): Samples written by each job
+            journal (bool): Also write the experiment journal
+
+        Returns:
+            int: Number of objects written, journal excluded
+        """
+        def write_chunk(sample_range: range) -> int:
+            written = 0
+            for key, content in self.objects(sample_range):
+                client.put_object(Bucket=bucket, Key=key, Body=json.dumps(content).encode("utf-8"))
+                written += 1
+            return written
+
+        chunks = [range(first, min(first + chunk_samples, self.samples)) for first in range(0, self.samples, chunk_samples)]
+        written = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for count in executor.map(write_chunk, chunks):
+                written += count
+                logger.debug(f"{written}/{self.count} objects written")
+
+        if journal:
+            key, content = self.journal()
+            client.put_object(Bucket=bucket, Key=key, Body=content.encode("utf-8"))
+        return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Synthetic ML_rX telemetry generator for aggregator load tests')
+    parser.add_argument('--routers', type=int, default=11, help='Number of routers')
+    parser.add_argument('--samples', type=int, default=1000, help='Objects per router')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds between samples')
+    parser.add_argument('--start', type=float, help='Epoch of the first sample (default: ends now)')
+    parser.add_argument('--experiment-id', default="synthetic", help='experiment_id of the objects')
+    parser.add_argument('--curve', choices=POWER_CURVES, default='sine', help='Power curve')
+    parser.add_argument('--base-watts', type=float, nargs=2, default=(70.0, 710.0), metavar=('MIN', 'MAX'),
+                        help='Range of the base power of each router')
+    parser.add_argument('--amplitude', type=float, default=5.0, help='Watts added by the curve at its peak')
+    parser.add_argument('--period', type=float, default=3600.0, help='Period of the sine and step curves (s)')
+    parser.add_argument('--noise', type=float, default=0.2, help='Standard deviation of the power noise (W)')
+    parser.add_argument('--collector-delay', type=float, default=DEFAULT_PIPELINE_DELAYS['collector'], help='Mean node exporter to Kafka delay (s)')
+    parser.add_argument('--process-delay', type=float, default=DEFAULT_PIPELINE_DELAYS['process'], help='Mean Kafka to Flink delay (s)')
+    parser.add_argument('--ml-delay', type=float, default=DEFAULT_PIPELINE_DELAYS['ml'], help='Mean Flink to ML delay (s)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Relative jitter of delays and sampling instants')
+    parser.add_argument('--seed', type=int, help='Random seed')
+    parser.add_argument('--bucket', default="experiment", help='Destination bucket')
+    parser.add_argument('--root', help='Directory of the filesystem-backed S3 stand-in')
+    parser.add_argument('--endpoint', help='S3 endpoint (uses S3_ACCESS_KEY/S3_SECRET_KEY), instead of --root')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent writers')
+    parser.add_argument('--no-journal', action='store_true', help='Do not write the experiment journal')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    if args.endpoint:
+        import boto3
+        client = boto3.client('s3', endpoint_url=args.endpoint, aws_access_key_id=os.environ.get("S3_ACCESS_KEY"),
+                              aws_secret_access_key=os.environ.get("S3_SECRET_KEY"), region_name='local')
+    elif args.root:
+        from emulators.s3_server import FileSystemStore
+        client = FileSystemStore(args.root)
+        client.create_bucket(Bucket=args.bucket)
+    else:
+        parser.error("one of --root or --endpoint is required")
+
+    generator = TelemetryGenerator(
+        args.routers, args.samples, args.interval, args.start, args.experiment_id, args.curve, tuple(args.base_watts),
+        args.amplitude, args.period, args.noise,
+        delays={'collector': args.collector_delay, 'process': args.process_delay, 'ml': args.ml_delay},
+        jitter=args.jitter, seed=args.seed
+    )
+    started = time.monotonic()
+    written = generator.write(client, args.bucket, workers=args.workers, journal=not args.no_journal)
+    elapsed = time.monotonic() - started
+    logger.info(f"{written} objects written to {args.bucket} in {elapsed:.1f}s ({written / elapsed:.0f} objects/s)")
@@ -0,0 +1,248 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulators.telemetry_generator import ml_output
+from emulators import kafka_broker
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Topic of every router: <prefix><router_id>, as the ML_r<router> folders of the S3 bucket
+DEFAULT_TOPIC_PREFIX = "ML_"
+
+# Seconds between progress logs and consumer group lag samples
+PROGRESS_INTERVAL = 5.0
+
+
+def load_samples(path: str, limit: int = None) -> list:
+    """
+    Read the power consumption rows of an aggregated experiment CSV file.
+
+    Rows are read up to the first empty line, which separates them from the experiment
+    duration section written by the aggregators.
+
+    Args:
+        path (str): CSV file with the POWER_CONSUMPTION_HEADERS columns of the aggregators
+        limit (int): Maximum number of rows, in time order
+
+    Returns:
+        list: Sample dicts sorted by ml_timestamp
+    """
+    samples = []
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        for row in reader:
+            if not row:
+                break
+            sample = dict(zip(headers, row))
+            samples.append({
+                'experiment_id': sample['experiment_id'],
+                'router_id': sample['router_id'],
+                'watts': float(sample['power_consumption_watts']),
+                'metric_timestamp': float(sample['node_exporter_collector_timestamp']),
+                'collector_timestamp': float(sample['kafka_producer_timestamp']),
+                'process_timestamp': sample['flink_aggregation_timestamp'],
+                'ml_timestamp': float(sample['ml_timestamp'])
+            })
+    samples.sort(key=lambda sample: sample['ml_timestamp'])
+    return samples[:limit] if limit else samples
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+class TelemetryReplayer:
+    """
+    Replay aggregated telemetry samples as ML outputs, one topic per router.
+
+    Every sample is produced when it was output by the ML stage (its ml_timestamp) relative to
+    the first sample, divided by the speed factor, so the inter-sample timing of the experiment
+    is preserved at any speed. Samples that are due together are produced in one batch per
+    topic when the broker supports it. The delay between the scheduled and actual production of
+    each sample is the producer lag; the lag of a consumer group can be sampled during the run.
+    """
+
+    def __init__(self, broker, speed: float = 1.0, topic_prefix: str = DEFAULT_TOPIC_PREFIX, group: str = None):
+        """
+        Args:
+            broker: Broker or BrokerClient
+            speed (float): Replay speed factor (0 replays as fast as possible)
+            topic_prefix (str): Prefix of the topic of each router
+            group (str): Consumer group whose lag is sampled during the replay
+        """
+        self.broker = broker
+        self.speed = speed
+        self.topic_prefix = topic_prefix
+        self.group = group
+        self.group_lag = []
+        self.topics = set()
+
+    def _scheduled(self, sample: dict, origin: float, started: float) -> float:
+        if self.speed <= 0:
+            return started
+        return started + (sample['ml_timestamp'] - origin) / self.speed
+
+    def _produce(self, due: list):
+        batches = {}
+        for sample in due:
+            value = ml_output(sample['experiment_id'], sample['router_id'], sample['watts'],
+                              sample['metric_timestamp'], sample['collector_timestamp'],
+                              sample['process_timestamp'], sample['ml_timestamp'])
+            batches.setdefault(f"{self.topic_prefix}{sample['router_id']}", []).append(
+                {'key': sample['router_id'], 'value': value, 'timestamp': sample['ml_timestamp']})
+
+        self.topics.update(batches)
+        for topic, records in batches.items():
+            if hasattr(self.broker, 'produce_batch'):
+                self.broker.produce_batch(topic, records)
+            else:
+                for record in records:
+                    self.broker.produce(topic, record['value'], record['key'], record['timestamp'])
+
+    def _sample_group_lag(self):
+        """Lag of the group over every replayed topic, including the ones it has not consumed yet"""
+        if self.group is None:
+            return
+        offsets = self.broker.offsets()
+        committed = offsets['groups'].get(self.group, {})
+        lag = sum(offsets['topics'].get(topic, 0) - committed.get(topic, {}).get('committed', 0) for topic in self.topics)
+        self.group_lag.append(lag)
+
+    def run(self, samples: list, stop_event: threading.Event = None) -> dict:
+        """
+        Replay samples until all of them are produced or stop_event is set.
+
+        Args:
+            samples (list): Samples returned by load_samples
+            stop_event (threading.Event): Event that stops the replay when set
+
+        Returns:
+            dict: Replay report with message counts, target and achieved rates and lag statistics
+        """
+        stop_event = stop_event if stop_event is not None else threading.Event()
+        if not samples:
+            return {'messages': 0}
+
+        origin = samples[0]['ml_timestamp']
+        span = samples[-1]['ml_timestamp'] - origin
+        started = time.monotonic()
+        next_progress = started + PROGRESS_INTERVAL
+        lags = []
+        produced = 0
+
+        logger.info(f"Replaying {len(samples)} samples ({span:.0f}s of experiment) at {self.speed or 'maximum'}x")
+        while produced < len(samples) and not stop_event.is_set():
+            delay = self._scheduled(samples[produced], origin, started) - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                break
+
+            # Produce every sample that is due by now in one go
+            now = time.monotonic()
+            end = produced
+            while end < len(samples) and self._scheduled(samples[end], origin, started) <= now:
+                end += 1
+            due = samples[produced:max(end, produced + 1)]
+            self._produce(due)
+            sent = time.monotonic()
+            lags.extend(sent - self._scheduled(sample, origin, started) for sample in due)
+            produced += len(due)
+
+            if sent >= next_progress:
+                self._sample_group_lag()
+                logger.info(f"{produced}/{len(samples)} messages, {produced / (sent - started):.1f} msgs/s"
+                            + (f", group {self.group} lag {self.group_lag[-1]}" if self.group_lag else ""))
+                next_progress = sent + PROGRESS_INTERVAL
+
+        wall = time.monotonic() - started
+        self._sample_group_lag()
+        report = {
+            'messages': produced,
+            'topics': len({sample['router_id'] for sample in samples[:produced]}),
+            'speed': self.speed,
+            'wall_s': wall,
+            'target_msgs_per_s': len(samples) / (span / self.speed) if self.speed > 0 and span > 0 else None,
+            'achieved_msgs_per_s': produced / wall if wall > 0 else 0.0,
+            'producer_lag_p50_ms': _percentile(lags, 0.50) * 1000,
+            'producer_lag_p95_ms': _percentile(lags, 0.95) * 1000,
+            'producer_lag_max_ms': max(lags) * 1000 if lags else 0.0
+        }
+        if self.group is not None:
+            report['group_lag_max'] = max(self.group_lag)
+            report['group_lag_final'] = self.group_lag[-1]
+        return report
+
+
+def format_report(report: dict) -> str:
+    """Human readable replay report"""
+    lines = [
+        f"Messages:        {report['messages']} on {report.get('topics', 0)} topics",
+        f"Wall time:       {report.get('wall_s', 0):.1f}s at {report.get('speed')}x",
+        f"Target rate:     {report['target_msgs_per_s']:.1f} msgs/s" if report.get('target_msgs_per_s') else "Target rate:     maximum",
+        f"Achieved rate:   {report.get('achieved_msgs_per_s', 0):.1f} msgs/s",
+        f"Producer lag:    p50 {report.get('producer_lag_p50_ms', 0):.2f}ms, p95 {report.get('producer_lag_p95_ms', 0):.2f}ms, "
+        f"max {report.get('producer_lag_max_ms', 0):.2f}ms"
+    ]
+    if 'group_lag_max' in report:
+        lines.append(f"Group lag:       max {report['group_lag_max']}, final {report['group_lag_final']} messages")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Accelerated replay of an aggregated experiment CSV into the broker stand-in')
+    parser.add_argument('csv', help='Aggregated experiment CSV file (e.g. energy-aware-3-processed.csv)')
+    parser.add_argument('-s', '--speed', type=float, default=1.0, help='Replay speed factor, e.g. 1, 10 or 100 (0: maximum)')
+    parser.add_argument('--broker', help='Location of a running broker stand-in (default: start one)')
+    parser.add_argument('--host', default="127.0.0.1", help='Listening address of the started broker')
+    parser.add_argument('--port', type=int, default=9092, help='Listening port of the started broker')
+    parser.add_argument('--topic-prefix', default=DEFAULT_TOPIC_PREFIX, help='Prefix of the per-router topics')
+    parser.add_argument('--group', help='Consumer group whose lag is reported')
+    parser.add_argument('--limit', type=int, help='Replay only the first N samples')
+    parser.add_argument('--exit', action='store_true', help='Stop the started broker when the replay ends')
+    parser.add_argument('-o', '--output', help='Also save the report as JSON to this file')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    server = None
+    if args.broker:
+        broker = kafka_broker.BrokerClient(args.broker)
+    else:
+        server = kafka_broker.start_server(args.host, args.port)
+        broker = server.broker
+
+    stop_event = threading.Event()
+    try:
+        report = TelemetryReplayer(broker, args.speed, args.topic_prefix, args.group).run(
+            load_samples(args.csv, args.limit), stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        raise
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    # Keep serving the replayed topics to consumers
+    if server is not None and not args.exit:
+        logger.info("Replay finished, broker still serving (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
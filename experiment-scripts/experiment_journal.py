@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import threading
+import logging
+from datetime import datetime
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Local directory of the journals and S3 prefix of the uploaded ones
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "journals")
+JOURNAL_PREFIX = "journal/"
+
+# Seconds of clock difference tolerated between the driver host and the experiment data
+# (S3 object times, telemetry) when matching a journal with the data of its experiment
+WINDOW_OVERLAP_MARGIN = 60
+
+# Journal event types
+EXPERIMENT_BEGIN = "experiment_begin"
+EXPERIMENT_END = "experiment_end"
+SCHEDULE_STEP = "step"
+FLOW_START = "flow_start"
+FLOW_STOP = "flow_stop"
+NCS_POST = "ncs_post"
+NCS_DELETE = "ncs_delete"
+
+
+class ExperimentJournal:
+    """
+    Local append-only journal of the events of one experiment.
+
+    Every event is written as one JSON line holding a sequence number, the event type, a
+    monotonic timestamp (for exact intervals between events) and an epoch timestamp (to match
+    the telemetry), plus the fields of the event. Lines are flushed as they are written, so the
+    journal survives an interrupted run. Once the experiment ends, the journal is uploaded as a
+    single object under JOURNAL_PREFIX, giving the aggregators the exact experiment window.
+    """
+
+    def __init__(self, name: str = None, directory: str = JOURNAL_DIR):
+        """
+        Args:
+            name (str): Journal name (defaults to journal_<YYYYmmdd_HHMMSS>)
+            directory (str): Local directory of the journal file
+        """
+        self.name = name or f"journal_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.name}.jsonl")
+        self.object_key = f"{JOURNAL_PREFIX}{self.name}.jsonl"
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.file = open(self.path, 'a', buffering=1)
+
+    def record(self, event: str, **fields):
+        """
+        Append an event to the journal.
+
+        Args:
+            event (str): Event type
+            **fields: JSON serializable fields of the event
+        """
+        with self.lock:
+            if self.file is None:
+                return
+            entry = {
+                'seq': self.sequence,
+                'event': event,
+                'monotonic_ns': time.monotonic_ns(),
+                'epoch': time.time()
+            }
+            entry.update(fields)
+            self.file.write(json.dumps(entry) + "\n")
+            self.sequence += 1
+
+    def close(self):
+        """Close the local journal file"""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def upload(self, s3_writer):
+        """
+        Close the journal and upload it as one object.
+
+        Args:
+            s3_writer: S3BackgroundWriter performing the upload
+
+        Returns:
+            Future: Upload future of the S3 writer
+        """
+        self.close()
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        logger.info(f"Uploading experiment journal to {self.object_key} ({self.sequence} events)")
+        return s3_writer.put(self.object_key, content)
+
+
+def parse_journal(content) -> list:
+    """
+    Parse the events of a journal, ignoring a truncated last line.
+
+    Args:
+        content (str | bytes): Journal content
+
+    Returns:
+        list: Event dicts sorted by sequence number
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+
+    events = []
+    for line in content.splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return sorted(events, key=lambda event: event['seq'])
+
+
+def experiment_window(events: list) -> tuple:
+    """
+    Extract the experiment window from journal events.
+
+    The window goes from the first flow start to the last flow stop, which are the events that
+    bound the traffic of the experiment. The experiment_begin/experiment_end events are used
+    when no flow was started or stopped.
+
+    Args:
+        events (list): Events returned by parse_journal
+
+    Returns:
+        tuple: (begin_epoch, finish_epoch) as floats, or None if the journal has no usable events
+    """
+    starts = [event['epoch'] for event in events if event['event'] == FLOW_START]
+    stops = [event['epoch'] for event in events if event['event'] == FLOW_STOP]
+    begins = [event['epoch'] for event in events if event['event'] == EXPERIMENT_BEGIN]
+    ends = [event['epoch'] for event in events if event['event'] == EXPERIMENT_END]
+
+    begin = min(starts) if starts else (min(begins) if begins else None)
+    finish = max(stops) if stops else (max(ends) if ends else None)
+    if begin is None or finish is None:
+        return None
+    return begin, finish
+
+
+def window_overlaps(window: tuple, begin: float, finish: float, margin: float = WINDOW_OVERLAP_MARGIN) -> bool:
+    """
+    Check whether an experiment window overlaps the time range of the experiment data.
+
+    Only some drivers record a journal, so the latest journal of a bucket may belong to an
+    earlier run than the data being aggregated. Such a journal does not overlap the flows
+    snapshots of the run, and the aggregators fall back to them.
+
+    Args:
+        window (tuple): (begin_epoch, finish_epoch) returned by experiment_window
+        begin (float): Epoch of the first item of the data (e.g. the first flows snapshot)
+        finish (float): Epoch of the last item of the data
+        margin (float): Seconds of clock difference tolerated
+
+    Returns:
+        bool: True if the window overlaps [begin, finish]
+    """
+    return window[0] <= finish + margin and begin - margin <= window[1]
@@ -1,5 +1,8 @@
 from snappi import Config, Flow, Device
 
+# Import destination group helpers for scale mode
+from flow_groups import apply_destination_group, DEFAULT_DST_STEP
+
 BUTTON_VARIANT = "individual"
 
 def define_flow(
@@ -12,7 +15,9 @@ def define_flow(
     src_ip: str, 
     dst_ip: str, 
     src_mac: str, 
-    dst_mac: str
+    dst_mac: str,
+    dst_count: int = 1,
+    dst_step: str = DEFAULT_DST_STEP
 ) -> Flow:
     """
     Configure a network flow with fixed packet size and transmission rate.
@@ -31,6 +36,9 @@ def define_flow(
         dst_ip (str): Destination IPv6 address
         src_mac (str): Source MAC address
         dst_mac (str): Destination MAC address
+        dst_count (int): Number of destinations (user sessions) expressed by the flow,
+            starting at dst_ip and separated by dst_step. The rate applies per destination
+        dst_step (str): Increment between consecutive destinations, as an address
     
     Returns:
         None
@@ -39,6 +47,8 @@ def define_flow(
         - Enables flow metrics including timestamps and cut-through latency measurement
         - Uses UDP protocol with fixed source and destination ports
         - Configures Ethernet/IPv6/UDP packet headers
+        - With dst_count > 1, a single flow object carries all destinations through an
+          increment pattern, tracked per destination with a metric tag
     """
     
     # Configure a flow and set previously created test port as one of endpoints
@@ -56,7 +66,7 @@ def define_flow(
     # and fixed byte size of all packets in the flow
     flow.size.fixed = packet_size
 
-    flow.rate.mbps = rate_mbps
+    flow.rate.mbps = rate_mbps * dst_count
 
     # Configure protocol headers for all packets in the flow
     eth, ip, udp = flow.packet.ethernet().ipv6().udp()
@@ -65,7 +75,7 @@ def define_flow(
     eth.dst.value = dst_mac
 
     ip.src.value = src_ip
-    ip.dst.value = dst_ip
+    apply_destination_group(ip, dst_ip, dst_count, dst_step)
 
     udp.src_port.value = 1234
     udp.dst_port.value = 1234
@@ -1,12 +1,30 @@
 from snappi import Config, Flow, Device
 import time
 import threading
-import requests
-import urllib.parse
 import logging
 
-# Import monitor function for debugging
-from minio_flow_uploader import monitor_s3_files, log_current_stack
+# Import monitor function for debugging and background S3 writer
+from minio_flow_uploader import monitor_s3_files, log_current_stack, s3_writer
+
+# Import experiment event journal
+import experiment_journal
+
+# Import destination group helpers for scale mode
+from flow_groups import apply_destination_group, expand_flow_name, DEFAULT_DST_STEP
+
+# Import pooled NCS API client
+from ncs_client import get_ncs_client, describe_response
+
+# Import route change latency profiler and counter stabilization
+from latency_profiler import RouteChangeProfiler, timed_control_state, PROFILE_RESULTS_DIR
+from counter_stabilization import wait_for_stable_counters
+
+# Import opt-in phase profiler
+from profiling import get_profiler
+
+# Import timeline engine for drift-free variations
+from variation_scheduler import (build_timeline, TimelineScheduler,
+                                 STEP, START, STOP, NCS_POST, NCS_DELETE)
 
 # Create logger for this module
 logger = logging.getLogger(__name__)
@@ -23,7 +41,9 @@ def define_flow(
     src_ip: str, 
     dst_ip: str, 
     src_mac: str, 
-    dst_mac: str
+    dst_mac: str,
+    dst_count: int = 1,
+    dst_step: str = DEFAULT_DST_STEP
 ) -> Flow:
     """
     Configure a network flow with fixed packet size and transmission rate.
@@ -42,6 +62,9 @@ def define_flow(
         dst_ip (str): Destination IPv6 address
         src_mac (str): Source MAC address
         dst_mac (str): Destination MAC address
+        dst_count (int): Number of destinations (user sessions) expressed by the flow,
+            starting at dst_ip and separated by dst_step. The rate applies per destination
+        dst_step (str): Increment between consecutive destinations, as an address
     
     Returns:
         None
@@ -50,6 +73,8 @@ def define_flow(
         - Enables flow metrics including timestamps and cut-through latency measurement
         - Uses UDP protocol with fixed source and destination ports (1234)
         - Configures Ethernet/IPv6/UDP packet headers
+        - With dst_count > 1, a single flow object carries all destinations through an
+          increment pattern, tracked per destination with a metric tag
     """
     
     # Configure a flow and set previously created test port as one of endpoints
@@ -67,7 +92,7 @@ def define_flow(
     # and fixed byte size of all packets in the flow
     flow.size.fixed = packet_size
 
-    flow.rate.mbps = rate_mbps
+    flow.rate.mbps = rate_mbps * dst_count
 
     # Configure protocol headers for all packets in the flow
     eth, ip, udp = flow.packet.ethernet().ipv6().udp()
@@ -76,14 +101,15 @@ def define_flow(
     eth.dst.value = dst_mac
 
     ip.src.value = src_ip
-    ip.dst.value = dst_ip
+    apply_destination_group(ip, dst_ip, dst_count, dst_step)
 
     udp.src_port.value = 1234
     udp.dst_port.value = 1234
 
     return flow
 
-def variation_function(api, cfg, NCS_API_LOCATION, variation_interval: int, simultaneous_flows: list):
+def variation_function(api, cfg, NCS_API_LOCATION, variation_interval: int, simultaneous_flows: list,
+                       ncs_lead_time: float = 0.0, profile_latency: bool = False):
     """
     Handle flow start/stop variations based on time intervals and flow counts.
     This function manages the transmission of network flows by starting and stopping them
@@ -91,11 +117,30 @@ def variation_function(api, cfg, NCS_API_LOCATION, variation_interval: int, simu
     traffic flows defined in the configuration object.
     Runs in a separate thread to avoid blocking the GUI.
     
+    The schedule is compiled ahead of time into a timeline of start/stop/NCS actions that
+    is executed against the monotonic clock, so request latency does not accumulate into
+    drift. NCS POST requests for flows about to start are sent ncs_lead_time seconds early.
+    
+    Schedule steps, flow starts/stops and NCS requests are recorded in an experiment journal,
+    uploaded to S3 when the run ends so the aggregators get the exact experiment window.
+    
+    With profile_latency, NCS requests, control state calls and the first/last packet
+    timestamps of every flow are recorded, and the per-flow breakdown of the run is logged
+    and saved to the results directory when the run ends. The route install latency is
+    measured by probing the flow resources after every POST in a separate thread, so the
+    schedule is not delayed by the probe.
+    
+    With EXPERIMENT_PROFILE set, the NCS and OTG calls of the worker are profiled as phases
+    and their profiles are saved to the results directory when the run ends.
+    
     Args:
         api: Snappi API object for control state operations
         cfg: Configuration object containing flow definitions
+        NCS_API_LOCATION (str): URL of the Network Control Stack API
         variation_interval (int): Time interval in seconds between flow changes
         simultaneous_flows (list): Array of flow counts per interval
+        ncs_lead_time (float): Seconds NCS POST requests are sent ahead of the flow start
+        profile_latency (bool): Record the route change latency profile of the run
     
     Returns:
         tuple: (variation_thread, stop_event) for controlling the thread
@@ -107,117 +152,134 @@ def variation_function(api, cfg, NCS_API_LOCATION, variation_interval: int, simu
         # Get control state
         cs = api.control_state()
         
-        # Storage experiment start time 
-        start_time = time.time()
+        # Compile the whole experiment into a timeline before starting
+        flow_names = [flow.name for flow in cfg.flows]
+        timeline = build_timeline(flow_names, variation_interval, simultaneous_flows, ncs_lead_time=ncs_lead_time)
         
-        # Start with the first target from simultaneous_flows (don't assume 0)
-        current_active_flows = simultaneous_flows[0] if simultaneous_flows else 0
+        logger.info(f"Starting variation with {min(simultaneous_flows[0], len(flow_names)) if simultaneous_flows else 0} initial active flows")
         
-        logger.info(f"Starting variation with {current_active_flows} initial active flows")
+        journal.record(experiment_journal.EXPERIMENT_BEGIN, flows=flow_names, variation_interval=variation_interval,
+                       simultaneous_flows=simultaneous_flows, ncs_lead_time=ncs_lead_time)
         
-        # Start initial flows if needed
-        if current_active_flows > 0:
-            initial_flows = [cfg.flows[i].name for i in range(min(current_active_flows, len(cfg.flows)))]
-            
-            # Start traffic flows (don't send API requests - flows already exist)
-            cs.traffic.flow_transmit.flow_names = initial_flows
+        def on_step(action):
+            active_flow_names = flow_names[:action.target_flows]
+            logger.info(f"Time {scheduler.elapsed():.1f}s - Interval {action.step + 1}: {action.target_flows} active flows: {active_flow_names}")
+            journal.record(experiment_journal.SCHEDULE_STEP, step=action.step, planned=action.deadline,
+                           active_flows=action.target_flows)
+        
+        def on_start(action):
+            cs.traffic.flow_transmit.flow_names = action.flow_names
             cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
-            api.set_control_state(cs)
-            
-            logger.info(f"Started initial {current_active_flows} flows: {initial_flows}")
-        
-        # Main variation loop - starts from interval 1 (skip the initial setup)
-        for interval_index, target_flows in enumerate(simultaneous_flows[1:], 1):
-            # Wait for the next interval
-            while time.time() - start_time < variation_interval * interval_index:
-                if stop_event.wait(1):
-                    return
-            
-            # Only process if there's actually a change
-            if target_flows == current_active_flows:
-                logger.info(f"Time {time.time() - start_time:.1f}s - Interval {interval_index + 1}: No change needed, keeping {current_active_flows} flows")
-                continue
-            
-            # Determine flows to start and stop
-            flows_to_start = []
-            flows_to_stop = []
-            
-            if target_flows > current_active_flows:
-                # Need to start more flows - only start the additional ones
-                flows_to_start = [cfg.flows[i].name for i in range(current_active_flows, min(target_flows, len(cfg.flows)))]
-                
-                # Send POST requests for new flows
-                for flow_name in flows_to_start:
-                    send_api_request(flow_name, 'POST')
-                
-                # Start traffic for new flows
-                cs.traffic.flow_transmit.flow_names = flows_to_start
-                cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
-                api.set_control_state(cs)
-                
-            elif target_flows < current_active_flows:
-                # Need to stop some flows - only stop the excess ones
-                flows_to_stop = [cfg.flows[i].name for i in range(target_flows, current_active_flows)]
-                
-                # Stop traffic flows first
-                cs.traffic.flow_transmit.flow_names = flows_to_stop
-                cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
-                api.set_control_state(cs)
-                
-                # Send DELETE requests for stopped flows
-                for flow_name in flows_to_stop:
-                    send_api_request(flow_name, 'DELETE')
-            
-            # Update current active flows count
-            current_active_flows = target_flows
-            
-            # Print current state
-            elapsed_time = time.time() - start_time
-            active_flow_names = [cfg.flows[i].name for i in range(min(current_active_flows, len(cfg.flows)))]
-            logger.info(f"Time {elapsed_time:.1f}s - Interval {interval_index + 1}: {current_active_flows} active flows: {active_flow_names}")
-        
-        # Stop all remaining flows at the end
-        logger.info("Experiment finished, stopping all remaining traffic...")
-        if current_active_flows > 0:
-            remaining_flows = [cfg.flows[i].name for i in range(min(current_active_flows, len(cfg.flows)))]
-            
-            # Stop traffic first
-            cs.traffic.flow_transmit.flow_names = []
+            with phase_profiler.phase("otg"):
+                timed_control_state(api, cs, profiler)
+            journal.record(experiment_journal.FLOW_START, step=action.step, planned=action.deadline,
+                           flows=action.flow_names)
+        
+        def on_stop(action):
+            if action.step == len(simultaneous_flows):
+                logger.info("Experiment finished, stopping all remaining traffic...")
+            cs.traffic.flow_transmit.flow_names = action.flow_names
             cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
-            api.set_control_state(cs)
-            
-            # Then send DELETE requests
-            for flow_name in remaining_flows:
-                send_api_request(flow_name, 'DELETE')
+            with phase_profiler.phase("otg"):
+                timed_control_state(api, cs, profiler)
+            journal.record(experiment_journal.FLOW_STOP, step=action.step, planned=action.deadline,
+                           flows=action.flow_names or flow_names)
+        
+        def on_ncs_post(action):
+            send_api_requests(action.flow_names, 'POST', action)
+        
+        def on_ncs_delete(action):
+            send_api_requests(action.flow_names, 'DELETE', action)
+        
+        scheduler = TimelineScheduler(timeline, {
+            STEP: on_step,
+            START: on_start,
+            STOP: on_stop,
+            NCS_POST: on_ncs_post,
+            NCS_DELETE: on_ncs_delete
+        }, stop_event)
         
-        logger.info("Variation thread completed")
+        completed = scheduler.run()
+        
+        # An interrupted schedule means all traffic has just been stopped by the caller
+        if not completed:
+            journal.record(experiment_journal.FLOW_STOP, step=None, planned=None, flows=flow_names, interrupted=True)
+        journal.record(experiment_journal.EXPERIMENT_END, completed=completed, elapsed=scheduler.elapsed())
+        journal.upload(s3_writer)
+        
+        scheduler.log_skew_summary()
+        ncs_client.log_latency_summary()
+        
+        if profiler is not None:
+            # Last packet timestamps are final once counters have settled
+            flow_metrics, _, _ = wait_for_stable_counters(api, flow_names)
+            profiler.collect_packet_timestamps(flow_metrics)
+            profiler.report()
+        phase_profiler.save()
+        
+        if completed:
+            logger.info("Variation thread completed")
+        else:
+            logger.info("Variation thread stopped")
 
-    def send_api_request(flow_name, method):
-        dst_ip = flow_name.split('_')[-1]
-        encoded_ip = urllib.parse.quote(dst_ip, safe='')
-        url = f"{NCS_API_LOCATION}/flows/{encoded_ip}"
+    def send_api_requests(flow_names, method, action=None):
+        """Send the NCS requests of a step concurrently through the shared client"""
+        # Grouped flows expand to one NCS request per destination
+        flow_dst_ips = [(flow_name, dst_ip) for flow_name in flow_names for dst_ip in expand_flow_name(flow_name)]
+        dst_ips = [dst_ip for _, dst_ip in flow_dst_ips]
         
-        logger.debug(f"========== BEFORE {method} {dst_ip} ==========")
-        log_current_stack(f"About to {method} {dst_ip}")
+        logger.debug(f"========== BEFORE {method} {dst_ips} ==========")
+        log_current_stack(f"About to {method} {dst_ips}")
         monitor_s3_files()
         
-        try:
-            response = requests.delete(url) if method == 'DELETE' else requests.post(url)
-            
-            try:
-                response_data = response.json()
-                message = response_data.get('error' if response.status_code >= 400 else 'message', 'Unknown')
-            except:
-                message = 'No response data'
-            
-            logger.info(f"{method} request for flow {flow_name} (IP: {dst_ip}), status: {response.status_code}, response: {message}")
-            
-            logger.debug(f"========== AFTER {method} {dst_ip} ==========")
-            monitor_s3_files()
-            
-        except Exception as e:
-            logger.error(f"Error sending {method} request for flow {flow_name}: {e}")
-
+        sent_ns = time.time_ns()
+        sent_at = time.monotonic()
+        with phase_profiler.phase("ncs"):
+            if method == 'DELETE':
+                responses = ncs_client.delete_flows(dst_ips)
+            else:
+                responses = ncs_client.post_flows(dst_ips)
+        
+        if profiler is not None:
+            for flow_name in flow_names:
+                flow_responses = [response for (name, _), response in zip(flow_dst_ips, responses) if name == flow_name]
+                profiler.ncs_request(method, flow_name, sent_ns, flow_responses)
+            if method == 'POST':
+                threading.Thread(target=probe_route_install, args=(flow_dst_ips, sent_at, sent_ns),
+                                 name="route-install-probe", daemon=True).start()
+        
+        journal.record(experiment_journal.NCS_DELETE if method == 'DELETE' else experiment_journal.NCS_POST,
+                       step=action.step if action is not None else None, flows=flow_names,
+                       status=[response.status_code if response is not None else None for response in responses])
+        
+        for (flow_name, dst_ip), response in zip(flow_dst_ips, responses):
+            if response is not None:
+                logger.info(f"{method} request for flow {flow_name} (IP: {dst_ip}), status: {response.status_code}, response: {describe_response(response)}")
+        
+        logger.debug(f"========== AFTER {method} {dst_ips} ==========")
+        monitor_s3_files()
+    
+    def probe_route_install(flow_dst_ips, sent_at, sent_ns):
+        """Record the install latency of the routes requested at sent_at (profiling mode only)"""
+        installed = {}
+        ncs_client.wait_for_routes([dst_ip for _, dst_ip in flow_dst_ips], sent_at, 0, stop_event=stop_event,
+                                   on_installed=lambda dst_ip, seconds: installed.__setitem__(dst_ip, seconds))
+        for flow_name in dict.fromkeys(name for name, _ in flow_dst_ips):
+            seconds = [installed.get(dst_ip) for name, dst_ip in flow_dst_ips if name == flow_name]
+            if None not in seconds:
+                profiler.route_installed(flow_name, sent_ns, max(seconds) * 1000)
+    
+    # Shared keep-alive client for NCS requests
+    ncs_client = get_ncs_client(NCS_API_LOCATION)
+    
+    # Route change latency profiler (instrumentation mode only)
+    profiler = RouteChangeProfiler() if profile_latency else None
+    
+    # Phase profiler of the NCS and OTG calls (no-op unless EXPERIMENT_PROFILE is set)
+    phase_profiler = get_profiler("variation", PROFILE_RESULTS_DIR)
+    
+    # Append-only journal of the experiment events
+    journal = experiment_journal.ExperimentJournal()
     
     variation_thread = threading.Thread(target=variation_worker, daemon=True)
     variation_thread.start()
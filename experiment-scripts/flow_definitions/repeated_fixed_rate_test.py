@@ -1,12 +1,19 @@
 from snappi import Config, Flow, Device
 import time
 import threading
-import requests
-import urllib.parse
 import logging
 import os
 from datetime import datetime
 
+# Import pooled NCS API client
+from ncs_client import get_ncs_client, describe_response, NCS_READINESS_TIMEOUT
+
+# Import counter stabilization
+from counter_stabilization import wait_for_stable_counters, STABILIZATION_QUIET_PERIOD, STABILIZATION_MAX_WAIT
+
+# Import opt-in phase profiler
+from profiling import get_profiler
+
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
@@ -85,7 +92,10 @@ def define_flow(
 def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int, rate_step: int, 
                       flow_duration: int, ncs_to_flow_delay: float,
                       src_ip: str = None, dst_ip: str = None, 
-                      src_mac: str = None, dst_mac: str = None, packet_size: int = None):
+                      src_mac: str = None, dst_mac: str = None, packet_size: int = None,
+                      readiness_probe: bool = False, readiness_timeout: float = NCS_READINESS_TIMEOUT,
+                      stabilization_quiet_period: float = STABILIZATION_QUIET_PERIOD,
+                      stabilization_max_wait: float = STABILIZATION_MAX_WAIT):
     """
     Execute repeated tests on a single flow with fixed transmission rate.
     
@@ -111,6 +121,12 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
         src_mac (str): Source MAC address for flow recreation
         dst_mac (str): Destination MAC address for flow recreation
         packet_size (int): Packet size in bytes for flow recreation
+        readiness_probe (bool): Start traffic as soon as the NCS reports the route installed,
+            falling back to ncs_to_flow_delay on timeout
+        readiness_timeout (float): Maximum seconds to wait for the route to be reported installed
+        stabilization_quiet_period (float): Seconds counters must stay unchanged after stopping
+            traffic before final metrics are read
+        stabilization_max_wait (float): Maximum seconds to wait for counters to stabilize
     
     Returns:
         tuple: (variation_thread, stop_event) for controlling the thread
@@ -122,6 +138,12 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
         # Get control state
         cs = api.control_state()
         
+        # Shared keep-alive client for NCS requests
+        ncs_client = get_ncs_client(NCS_API_LOCATION)
+        
+        # Phase profiler of the NCS and OTG calls (no-op unless EXPERIMENT_PROFILE is set)
+        phase_profiler = get_profiler("repeated_fixed_rate_test", "results")
+        
         # Storage for test results
         test_results = []
         
@@ -198,38 +220,35 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
             udp.dst_port.value = 1234
             
             # Push the updated configuration to reset the flow
-            api.set_config(cfg)
+            with phase_profiler.phase("otg"):
+                api.set_config(cfg)
             logger.info(f"Flow recreated successfully, metrics reset to 0")
             
             # Send POST request to NCS API
-            encoded_ip = urllib.parse.quote(use_dst_ip, safe='')
-            url = f"{NCS_API_LOCATION}/flows/{encoded_ip}"
+            logger.info(f"Sending POST request to NCS API for flow {flow_name} (IP: {use_dst_ip})")
+            requested_at = time.monotonic()
+            with phase_profiler.phase("ncs"):
+                response = ncs_client.post_flow(use_dst_ip)
+            if response is not None:
+                logger.info(f"NCS API response - status: {response.status_code}, message: {describe_response(response)}")
             
-            try:
-                logger.info(f"Sending POST request to NCS API for flow {flow_name} (IP: {use_dst_ip})")
-                response = requests.post(url)
-                
-                try:
-                    response_data = response.json()
-                    message = response_data.get('error' if response.status_code >= 400 else 'message', 'Unknown')
-                except:
-                    message = 'No response data'
-                
-                logger.info(f"NCS API response - status: {response.status_code}, message: {message}")
-                
-            except Exception as e:
-                logger.error(f"Error sending POST request to NCS API: {e}")
-            
-            # Wait NCS_TO_FLOW_DELAY before starting traffic
-            logger.info(f"Waiting {ncs_to_flow_delay}s before starting traffic...")
-            if stop_event.wait(ncs_to_flow_delay):
+            # Wait for the route to be installed (or NCS_TO_FLOW_DELAY) before starting traffic
+            if readiness_probe:
+                logger.info(f"Waiting for route of {use_dst_ip} to be installed...")
+                ncs_client.wait_for_routes([use_dst_ip], requested_at, ncs_to_flow_delay,
+                                           timeout=readiness_timeout, stop_event=stop_event)
+            else:
+                logger.info(f"Waiting {ncs_to_flow_delay}s before starting traffic...")
+                stop_event.wait(ncs_to_flow_delay)
+            if stop_event.is_set():
                 logger.info("Test stopped during NCS delay")
                 break
             
             # Get initial metrics
             mr_initial = api.metrics_request()
             mr_initial.flow.flow_names = [flow_name]
-            metrics_initial = api.get_metrics(mr_initial).flow_metrics[0]
+            with phase_profiler.phase("otg"):
+                metrics_initial = api.get_metrics(mr_initial).flow_metrics[0]
             
             initial_bytes_tx = metrics_initial.bytes_tx
             initial_bytes_rx = metrics_initial.bytes_rx
@@ -240,7 +259,8 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
             logger.info(f"Starting traffic at {fixed_rate_mbps} Mbps...")
             cs.traffic.flow_transmit.flow_names = [flow_name]
             cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
-            api.set_control_state(cs)
+            with phase_profiler.phase("otg"):
+                api.set_control_state(cs)
             
             # Wait for flow_duration
             logger.info(f"Running traffic for {flow_duration}s...")
@@ -254,18 +274,19 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
             # Stop traffic
             logger.info("Stopping traffic...")
             cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
-            api.set_control_state(cs)
+            with phase_profiler.phase("otg"):
+                api.set_control_state(cs)
             
             # Wait for metrics to stabilize after stopping traffic
             # This is critical to ensure all packets are properly counted
-            stabilization_delay = 3  # seconds
-            logger.info(f"Waiting {stabilization_delay}s for metrics to stabilize...")
-            time.sleep(stabilization_delay)
+            logger.info("Waiting for metrics to stabilize...")
+            flow_metrics, settled, waited = wait_for_stable_counters(
+                api, [flow_name], quiet_period=stabilization_quiet_period,
+                max_wait=stabilization_max_wait)
+            logger.info(f"Metrics {'stabilized' if settled else 'not stabilized'} after {waited:.2f}s")
             
             # Get final metrics
-            mr_final = api.metrics_request()
-            mr_final.flow.flow_names = [flow_name]
-            metrics_final = api.get_metrics(mr_final).flow_metrics[0]
+            metrics_final = flow_metrics[0]
             
             final_bytes_tx = metrics_final.bytes_tx
             final_bytes_rx = metrics_final.bytes_rx
@@ -300,20 +321,11 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
             })
             
             # Send DELETE request to NCS API
-            try:
-                logger.info(f"Sending DELETE request to NCS API for flow {flow_name} (IP: {use_dst_ip})")
-                response = requests.delete(url)
-                
-                try:
-                    response_data = response.json()
-                    message = response_data.get('error' if response.status_code >= 400 else 'message', 'Unknown')
-                except:
-                    message = 'No response data'
-                
-                logger.info(f"NCS API response - status: {response.status_code}, message: {message}")
-                
-            except Exception as e:
-                logger.error(f"Error sending DELETE request to NCS API: {e}")
+            logger.info(f"Sending DELETE request to NCS API for flow {flow_name} (IP: {use_dst_ip})")
+            with phase_profiler.phase("ncs"):
+                response = ncs_client.delete_flow(use_dst_ip)
+            if response is not None:
+                logger.info(f"NCS API response - status: {response.status_code}, message: {describe_response(response)}")
         
         # Prepare summary content
         summary_lines = []
@@ -352,6 +364,8 @@ def variation_function(api, cfg, NCS_API_LOCATION, rate_min: int, rate_max: int,
         # Print summary to log
         for line in summary_lines:
             logger.info(line)
+        ncs_client.log_latency_summary()
+        phase_profiler.save()
         
         # Save summary to file
         try:
@@ -0,0 +1,160 @@
+import ipaddress
+
+# Name of the metric tag carrying the varying bits of the destination address
+DST_METRIC_TAG = "dst"
+
+# Default increment between consecutive destinations of a group
+DEFAULT_DST_STEP = "::1"
+
+
+def _step_value(step) -> int:
+    """Integer value of an increment given as an address string or an int"""
+    return int(ipaddress.ip_address(step)) if isinstance(step, str) else int(step)
+
+
+def group_flow_name(start_ip: str, count: int, step: str = DEFAULT_DST_STEP) -> str:
+    """
+    Build the flow name of a destination group.
+
+    Single destinations keep the 'flow_<dst_ip>' name used by every flow definition, and
+    groups append the number of destinations: 'flow_<start_ip>_x<count>'. Groups whose
+    destinations are not DEFAULT_DST_STEP apart also append the integer value of the step,
+    'flow_<start_ip>_x<count>_s<step>', so the destinations can be rebuilt from the name.
+
+    Args:
+        start_ip (str): First destination IP of the group
+        count (int): Number of destinations in the group
+        step (str): Increment between consecutive destinations, as an address (or int)
+
+    Returns:
+        str: Flow name
+    """
+    if count == 1:
+        return f"flow_{start_ip}"
+    step_value = _step_value(step)
+    if step_value == _step_value(DEFAULT_DST_STEP):
+        return f"flow_{start_ip}_x{count}"
+    return f"flow_{start_ip}_x{count}_s{step_value}"
+
+
+def parse_flow_name(flow_name: str) -> tuple:
+    """
+    Parse a flow name built by group_flow_name.
+
+    Args:
+        flow_name (str): Flow name ('flow_<dst_ip>', 'flow_<start_ip>_x<count>' or
+                         'flow_<start_ip>_x<count>_s<step>')
+
+    Returns:
+        tuple: (start_ip, count, step), with step as an int
+    """
+    body = flow_name[len("flow_"):] if flow_name.startswith("flow_") else flow_name
+    step = _step_value(DEFAULT_DST_STEP)
+    prefix, separator, step_text = body.rpartition("_s")
+    if separator and step_text.isdigit():
+        body, step = prefix, int(step_text)
+    start_ip, separator, count = body.rpartition("_x")
+    if separator and count.isdigit():
+        return start_ip, int(count), step
+    return body, 1, step
+
+
+def expand_destinations(start_ip: str, count: int, step: str = DEFAULT_DST_STEP) -> list:
+    """
+    List the destination IPs described by an increment pattern.
+
+    Args:
+        start_ip (str): First destination IP
+        count (int): Number of destinations
+        step (str): Increment between consecutive destinations, as an address (or int)
+
+    Returns:
+        list: Destination IPs as strings
+    """
+    start = ipaddress.ip_address(start_ip)
+    step_value = _step_value(step)
+    return [str(start + i * step_value) for i in range(count)]
+
+
+def expand_flow_name(flow_name: str) -> list:
+    """
+    List the destination IPs of a flow from its name.
+
+    Args:
+        flow_name (str): Flow name built by group_flow_name
+
+    Returns:
+        list: Destination IPs as strings
+    """
+    start_ip, count, step = parse_flow_name(flow_name)
+    return expand_destinations(start_ip, count, step) if count > 1 else [start_ip]
+
+
+def group_start_addresses(first_ip: str, group_count: int, group_size: int, step: str = DEFAULT_DST_STEP) -> list:
+    """
+    Split a contiguous destination range into consecutive groups.
+
+    Args:
+        first_ip (str): First destination IP of the range
+        group_count (int): Number of groups
+        group_size (int): Number of destinations per group
+        step (str): Increment between consecutive destinations, as an address
+
+    Returns:
+        list: First destination IP of each group
+    """
+    return expand_destinations(first_ip, group_count, _step_value(step) * group_size)
+
+
+def apply_destination_group(ip, dst_ip: str, dst_count: int = 1, dst_step: str = DEFAULT_DST_STEP):
+    """
+    Configure the destination of an IP header for a single address or a group.
+
+    Groups are expressed with a value increment pattern inside one flow object, and the bits
+    that vary across the group are tracked with a metric tag, so per-destination counters
+    remain available through tagged metrics.
+
+    Args:
+        ip: snappi IPv4/IPv6 header of the flow packet
+        dst_ip (str): Destination IP (first one of the group)
+        dst_count (int): Number of destinations in the group
+        dst_step (str): Increment between consecutive destinations, as an address
+    """
+    if dst_count <= 1:
+        ip.dst.value = dst_ip
+        return
+
+    ip.dst.increment.start = dst_ip
+    ip.dst.increment.step = dst_step
+    ip.dst.increment.count = dst_count
+
+    # Tag only the bits that change between the first and the last destination
+    first = ipaddress.ip_address(dst_ip)
+    last = first + (dst_count - 1) * _step_value(dst_step)
+    tag_length = max(1, (int(first) ^ int(last)).bit_length())
+    ip.dst.metric_tags.add(name=DST_METRIC_TAG, offset=first.max_prefixlen - tag_length, length=tag_length)
+
+
+def get_tagged_session_metrics(api, flow_name: str) -> dict:
+    """
+    Fetch per-destination counters of a grouped flow through its metric tags.
+
+    Args:
+        api: Snappi API object
+        flow_name (str): Name of the grouped flow
+
+    Returns:
+        dict: Tag value (varying destination bits, as returned by OTG) -> tagged metric object
+    """
+    mr = api.metrics_request()
+    mr.flow.flow_names = [flow_name]
+    mr.flow.tagged_metrics.include = True
+    mr.flow.tagged_metrics.filters.add(name=DST_METRIC_TAG)
+
+    sessions = {}
+    for flow_metric in api.get_metrics(mr).flow_metrics:
+        for tagged in flow_metric.tagged_metrics:
+            for tag in tagged.tags:
+                value = tag.value.hex if tag.value.choice == tag.value.HEX else tag.value.str
+                sessions[value] = tagged
+    return sessions
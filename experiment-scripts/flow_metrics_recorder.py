@@ -0,0 +1,109 @@
+import os
+import csv
+import time
+import threading
+import logging
+from datetime import datetime
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Directory of the recorded time series
+FLOW_METRICS_RESULTS_DIR = "results"
+
+# Columns of the recorded time series, one row per flow and poll
+FLOW_METRICS_HEADERS = [
+    "epoch",
+    "flow_name",
+    "transmit",
+    "frames_tx",
+    "frames_rx",
+    "bytes_tx",
+    "bytes_rx",
+    "frames_tx_rate",
+    "frames_rx_rate"
+]
+
+
+class FlowMetricsRecorder:
+    """
+    Record the flow metrics of the traffic generator as a CSV time series.
+
+    Every poll writes one row per flow with the epoch of the poll and the cumulative counters,
+    so offered and received load can later be aligned with the power telemetry (see
+    analysis.traffic_power_join). Metrics can be handed over by an existing polling loop with
+    record(), or polled by the recorder itself in a background thread with start().
+    """
+
+    def __init__(self, path: str = None, results_dir: str = FLOW_METRICS_RESULTS_DIR):
+        """
+        Args:
+            path (str): CSV file (defaults to <results_dir>/flow_metrics_<YYYYmmdd_HHMMSS>.csv)
+            results_dir (str): Directory of the default CSV file
+        """
+        if path is None:
+            os.makedirs(results_dir, exist_ok=True)
+            path = os.path.join(results_dir, f"flow_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'w', newline="", buffering=1)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FLOW_METRICS_HEADERS)
+        self.stop_event = threading.Event()
+        self.thread = None
+        logger.info(f"Recording flow metrics to: {path}")
+
+    def record(self, flow_metrics, epoch: float = None):
+        """
+        Write the metrics of one poll.
+
+        Args:
+            flow_metrics: snappi flow metrics of every flow
+            epoch (float): Epoch of the poll (defaults to now)
+        """
+        epoch = epoch if epoch is not None else time.time()
+        rows = [[f"{epoch:.6f}", m.name, m.transmit, m.frames_tx, m.frames_rx, m.bytes_tx, m.bytes_rx,
+                 m.frames_tx_rate, m.frames_rx_rate] for m in flow_metrics]
+        with self.lock:
+            if self.file is not None:
+                self.writer.writerows(rows)
+
+    def start(self, api, interval: float = 1.0):
+        """
+        Poll the flow metrics of every flow in a background thread until stop() or close().
+
+        Args:
+            api: Snappi API object
+            interval (float): Seconds between polls
+        """
+        def poll():
+            next_poll = time.monotonic()
+            while not self.stop_event.is_set():
+                try:
+                    mr = api.metrics_request()
+                    mr.flow.flow_names = []
+                    epoch = time.time()
+                    self.record(api.get_metrics(mr).flow_metrics, epoch)
+                except Exception as e:
+                    logger.error(f"Error recording flow metrics: {e}")
+                next_poll += interval
+                self.stop_event.wait(max(0.0, next_poll - time.monotonic()))
+
+        self.thread = threading.Thread(target=poll, name="flow-metrics-recorder", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        """Stop polling and close the CSV file"""
+        self.stop()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                logger.info(f"Flow metrics saved to: {self.path}")
@@ -1,10 +1,6 @@
+import os
 import time
-import snappi
-import urllib3
-import tkinter as tk
-from tkinter import ttk
 import threading
-import urllib.parse
 import argparse
 import logging
 
@@ -14,6 +10,14 @@ import logging
 
 parser = argparse.ArgumentParser(description='IXIA Traffic Control GUI')
 parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+parser.add_argument('-f', '--force-config', action='store_true',
+                    help='Always push the OTG configuration, even if the generator already holds it')
+parser.add_argument('--profile', action='store_true',
+                    help='Profile the NCS and OTG calls of the variation thread (same as EXPERIMENT_PROFILE=1)')
+parser.add_argument('--trace', action='store_true',
+                    help='Record a Chrome trace of the GUI actions, schedule steps, NCS, OTG and S3 calls (same as EXPERIMENT_TRACE=1)')
+parser.add_argument('--metrics-port', type=int, default=None,
+                    help='Serve Prometheus metrics on http://0.0.0.0:<port>/metrics (same as EXPERIMENT_METRICS_PORT)')
 args = parser.parse_args()
 
 # Configure logging based on debug flag
@@ -27,12 +31,34 @@ logging.basicConfig(
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
+if args.profile:
+    from profiling import PROFILE_ENV
+    os.environ.setdefault(PROFILE_ENV, "1")
+
+# Span tracer of the experiment timeline, saved when the variation ends and when the GUI is closed
+from span_tracer import tracer
+if args.trace:
+    tracer.enable()
+
+# Prometheus metrics of the NCS and OTG calls, schedule skew and flow rates
+from metrics_endpoint import controller_metrics, requested_port, start_metrics_server
+
+# Heavy modules are imported once the arguments are parsed, so that --help and argument
+# errors return immediately
+import snappi
+import urllib3
+import tkinter as tk
+from tkinter import ttk
+
 #########################################################################
 # Import configuration for MAC and IP addresses from 'config' module
 
 from config.b5g import (SRC_MAC, DST_MAC, SRC_IP, DST_IPS, IXIA_API_LOCATION, NCS_API_LOCATION,
                     R1_MAC, R2_MAC, R1_IP, R2_IP, R1_GATEWAY, R2_GATEWAY, IP_PREFIX, DST_IP)
 
+# Shared OTG setup: ports, devices and flows of the experiment
+from otg_setup import create_base_config, define_flows, get_configured_flows
+
 #########################################################################
 #########################################################################
 # EDITABLE VARIABLES - GENERAL CONFIGURATION
@@ -41,6 +67,20 @@ from config.b5g import (SRC_MAC, DST_MAC, SRC_IP, DST_IPS, IXIA_API_LOCATION, NC
 # Delay between NCS API request and flow start (in seconds)
 NCS_TO_FLOW_DELAY = 2  # Delay in seconds after POST to NCS API before starting flow
 
+# Readiness probe: poll the NCS flow resource and start traffic as soon as the route is
+# reported installed. Falls back to NCS_TO_FLOW_DELAY if the route is not reported
+# installed within NCS_READINESS_TIMEOUT seconds or the NCS API does not expose it.
+NCS_READINESS_PROBE = True
+NCS_READINESS_TIMEOUT = 10  # Seconds
+
+# Route change latency profiling: record NCS requests, control state calls and first/last
+# packet timestamps of every flow during a variation run, and save the per-flow breakdown
+LATENCY_PROFILING = False
+
+# Flow metrics recording: save every metrics update of the GUI to results/flow_metrics_<timestamp>.csv,
+# to align offered/received load with the power telemetry (analysis/traffic_power_join.py)
+RECORD_FLOW_METRICS = False
+
 # Flow definition module selection
 # Available options:
 # - 'fixed_packet_size_fixed_rate_mbps_continuous'
@@ -73,6 +113,20 @@ variation_interval = 60
 # Number of simultaneous flows at each interval step
 simultaneous_flows = [7,6,5,4,3,4,5,6,7,8,8,8,8,8,8,8,8,9,9,9,10,10,9,8,0]
 
+#########################################################################
+# EDITABLE VARIABLES - SCALE MODE CONFIGURATION
+# (for 'fixed_packet_size_fixed_rate_mbps_continuous' and
+#  'fixed_packet_size_fixed_rate_mbps_interval')
+#########################################################################
+
+# In scale mode each flow object carries SESSIONS_PER_FLOW consecutive destination
+# addresses (user sessions) starting at DST_IPS[0], using a value increment pattern.
+# flow_rate applies per session and simultaneous_flows counts flow objects (groups).
+# The last hop must route the whole destination range through Ixia's rx port.
+SCALE_MODE = False
+SCALE_FLOW_COUNT = 10       # Number of flow objects (session groups)
+SESSIONS_PER_FLOW = 100     # Destination addresses per flow object
+
 #########################################################################
 # EDITABLE VARIABLES - SEQUENTIAL RATE TEST CONFIGURATION
 # (for 'sequential_rate_test')
@@ -113,37 +167,20 @@ dst_ips = DST_IPS
 # with HTTP as default transport protocol
 api = snappi.api(location=IXIA_API_LOCATION)
 
+# The flow gauges are fed by the metrics updates of the GUI, so the endpoint does not poll OTG
+metrics_port = requested_port(args.metrics_port)
+if metrics_port is not None:
+    start_metrics_server(metrics_port, api=api, poll_interval=None)
 
-# Create a new traffic configuration that will be set on OTG
-cfg = api.config()
 
-# Add tx and rx ports to the configuration
-ptx = cfg.ports.add(name="ptx", location="eth1")
-prx = cfg.ports.add(name="prx", location="eth2")
+# Create a new traffic configuration that will be set on OTG, with tx and rx ports
+# and one device per port
+cfg, r1Ip, r2Ip = create_base_config(api, R1_MAC, R2_MAC, R1_IP, R2_IP, R1_GATEWAY, R2_GATEWAY, IP_PREFIX)
 
 # Limit link speed to 100 Mbps full-duplex
 # link100 = cfg.layer1.add(name="link100", port_names=["ptx", "prx"])
 # link100.speed = "speed_100_fd_mbps"
 
-# Add two devices to the configuration
-# and set their MAC addresses
-r1 = cfg.devices.add(name="r1")
-r2 = cfg.devices.add(name="r2")
-
-r1Eth = r1.ethernets.add(name="r1Eth")
-r1Eth.mac = R1_MAC
-
-r2Eth = r2.ethernets.add(name="r2Eth")
-r2Eth.mac = R2_MAC
-
-# Set connection of each device to the corresponding test port
-r1Eth.connection.port_name = ptx.name
-r2Eth.connection.port_name = prx.name
-
-# Add IPv6 addresses to each device
-r1Ip = r1Eth.ipv6_addresses.add(name="r1Ip", address=R1_IP, gateway=R1_GATEWAY, prefix=IP_PREFIX)
-r2Ip = r2Eth.ipv6_addresses.add(name="r2Ip", address=R2_IP, gateway=R2_GATEWAY, prefix=IP_PREFIX)
-
 
 #########################################################################
 # Import 'BUTTON_VARIANT', 'flow_definition' function and 'variation_function' (if available) from 'flow_definitions' module
@@ -153,9 +190,15 @@ r2Ip = r2Eth.ipv6_addresses.add(name="r2Ip", address=R2_IP, gateway=R2_GATEWAY,
 from flow_definitions.fixed_packet_size_fixed_rate_mbps_interval import define_flow, BUTTON_VARIANT, variation_function
 # from flow_definitions.sequential_rate_test import define_flow, BUTTON_VARIANT, variation_function
 # from flow_definitions.repeated_fixed_rate_test import define_flow, BUTTON_VARIANT, variation_function
-import requests
 
 from minio_flow_uploader import create_initial_flows_file, monitor_s3_files, log_current_stack
+from ncs_client import get_ncs_client
+from otg_config import push_config
+from counter_stabilization import wait_for_stable_counters
+from flow_metrics_recorder import FlowMetricsRecorder
+
+# Shared keep-alive client for NCS API requests
+ncs_client = get_ncs_client(NCS_API_LOCATION)
 
 
 #########################################################################
@@ -163,14 +206,11 @@ from minio_flow_uploader import create_initial_flows_file, monitor_s3_files, log
 
 # For sequential_rate_test, create only ONE flow with DST_IP
 # For repeated_fixed_rate_test, create only ONE flow with DST_IP
+# For scale mode, create SCALE_FLOW_COUNT flows of SESSIONS_PER_FLOW destinations each
 # For other flow definitions, use dst_ips loop
-if FLOW_DEFINITION_TYPE in ['sequential_rate_test', 'repeated_fixed_rate_test']:
-    # Use single DST_IP for sequential and repeated tests
-    define_flow(cfg, f"flow_{DST_IP}", r1Ip, r2Ip, packet_size, flow_rate, src_ip, DST_IP, src_mac, dst_mac)
-else:
-    # Use DST_IPS for multiple flows
-    for dst_ip in dst_ips:
-        define_flow(cfg, f"flow_{dst_ip}", r1Ip, r2Ip, packet_size, flow_rate, src_ip, dst_ip, src_mac, dst_mac)
+define_flows(cfg, define_flow, FLOW_DEFINITION_TYPE, r1Ip, r2Ip, packet_size, flow_rate, src_ip, dst_ips, DST_IP,
+             src_mac, dst_mac, scale_mode=SCALE_MODE, scale_flow_count=SCALE_FLOW_COUNT,
+             sessions_per_flow=SESSIONS_PER_FLOW)
 
 
 # Define variation function if available
@@ -178,6 +218,7 @@ variation_thread = None
 variation_stop_event = None
 variation_running = False
 
+@tracer.traced("start variation", "gui")
 def gui_variation_function():
     global variation_thread, variation_stop_event, variation_running
     logger.debug(f"gui_variation_function llamada - variation_running: {variation_running}")
@@ -190,21 +231,17 @@ def gui_variation_function():
         else:
             # For other flow definitions (like fixed_packet_size_fixed_rate_mbps_interval)
             logger.debug("Entrando en create_initial_flows_file...")
-            create_initial_flows_file(dst_ips[:simultaneous_flows[0]])
+            initial_dst_ips = [ip for flow in configured_flows[:simultaneous_flows[0]] for ip in flow['dst_ips']]
+            requested_at = time.monotonic()
+            upload = create_initial_flows_file(initial_dst_ips)
             logger.debug("create_initial_flows_file completado")
             
-            # Animate spinner on start button during delay
-            spinner_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-            start_time = time.time()
-            idx = 0
-            
-            while time.time() - start_time < NCS_TO_FLOW_DELAY:
-                spinner = spinner_chars[idx % len(spinner_chars)]
+            # Animate spinner on start button while routes are installed
+            def update_start_spinner(spinner):
                 if 'start' in gui.flow_buttons:
                     gui.flow_buttons['start'].configure(text=f"{spinner} Starting Variation...")
-                gui.root.update()
-                time.sleep(0.1)
-                idx += 1
+            
+            gui.wait_for_routes(initial_dst_ips, requested_at, update_start_spinner, upload=upload)
         
         variation_running = True
         # Disable start button
@@ -217,42 +254,32 @@ def gui_variation_function():
             variation_thread, variation_stop_event = variation_function(
                 api, cfg, NCS_API_LOCATION, rate_min, rate_max, rate_step, 
                 flow_duration, NCS_TO_FLOW_DELAY,
-                src_ip=src_ip, dst_ip=DST_IP, src_mac=src_mac, dst_mac=dst_mac, packet_size=packet_size
+                src_ip=src_ip, dst_ip=DST_IP, src_mac=src_mac, dst_mac=dst_mac, packet_size=packet_size,
+                readiness_probe=NCS_READINESS_PROBE, readiness_timeout=NCS_READINESS_TIMEOUT
             )
         elif FLOW_DEFINITION_TYPE == 'sequential_rate_test':
             # For sequential_rate_test, pass additional parameters to recreate flows
             variation_thread, variation_stop_event = variation_function(
                 api, cfg, NCS_API_LOCATION, rate_min, rate_max, rate_step, 
                 flow_duration, NCS_TO_FLOW_DELAY,
-                src_ip=src_ip, dst_ip=DST_IP, src_mac=src_mac, dst_mac=dst_mac, packet_size=packet_size
+                src_ip=src_ip, dst_ip=DST_IP, src_mac=src_mac, dst_mac=dst_mac, packet_size=packet_size,
+                readiness_probe=NCS_READINESS_PROBE, readiness_timeout=NCS_READINESS_TIMEOUT
             )
         else:
             variation_thread, variation_stop_event = variation_function(
-                api, cfg, NCS_API_LOCATION, variation_interval, simultaneous_flows
+                api, cfg, NCS_API_LOCATION, variation_interval, simultaneous_flows,
+                ncs_lead_time=NCS_TO_FLOW_DELAY, profile_latency=LATENCY_PROFILING
             )
 
 
 #########################################################################
 
-# Push traffic configuration constructed so far to OTG
-api.set_config(cfg)
+# Push traffic configuration constructed so far to OTG (skipped if it already holds it)
+push_config(api, cfg, IXIA_API_LOCATION, force=args.force_config)
 
 # Start transmitting the packets from configured flow
 cs = api.control_state()
 
-def get_configured_flows(cfg):
-    """Get information about configured flows"""
-    flows = []
-    for flow in cfg.flows:
-        # Get IPv6 destination from the raw configuration
-        # since packet fields are not accessible after flow creation
-        flows.append({
-            'name': flow.name,
-            'rate': flow.rate.mbps,
-            'dst_ip': flow.name.replace('flow_', '')  # Extract from flow name since we used dst_ip in name
-        })
-    return flows
-
 # Get configured flows before GUI creation
 configured_flows = get_configured_flows(cfg)
 
@@ -350,8 +377,10 @@ class TrafficControlGUI:
         # Configure column headings
         self.tree.heading('metric', text='Metric')
         for i, flow in enumerate(flows):
+            sessions = len(flow['dst_ips'])
+            dst_label = flow['dst_ip'] if sessions == 1 else f"{flow['dst_ip']} (+{sessions - 1})"
             self.tree.heading(f'flow_{i}', 
-                            text=f"Flow {i+1}\n{flow['dst_ip']}\n{flow['rate']} Mbps")
+                            text=f"Flow {i+1}\n{dst_label}\n{flow['rate']} Mbps")
             self.tree.column(f'flow_{i}', width=150, anchor='center')
         self.tree.column('metric', width=150, anchor='w')
         
@@ -373,7 +402,7 @@ class TrafficControlGUI:
         
         # Initialize treeview rows
         for label, _ in self.metrics_list:
-            self.tree.insert('', 'end', values=[label] + ['N/A'] * len(dst_ips))
+            self.tree.insert('', 'end', values=[label] + ['N/A'] * len(flows))
         
         # Bind keyboard shortcuts
         self.root.bind('<Key>', self.handle_key)
@@ -382,6 +411,7 @@ class TrafficControlGUI:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Start metrics update thread
+        self.recorder = FlowMetricsRecorder() if RECORD_FLOW_METRICS else None
         self.running = True
         self.metrics_thread = threading.Thread(target=self.update_metrics)
         self.metrics_thread.daemon = True
@@ -392,11 +422,15 @@ class TrafficControlGUI:
             self._update_metrics_once()
             time.sleep(1)
     
+    @tracer.traced("update metrics", "otg")
     def _update_metrics_once(self):
         """Perform a single metrics update"""
         mr = api.metrics_request()
         mr.flow.flow_names = []
         metrics = api.get_metrics(mr).flow_metrics # type: ignore
+        controller_metrics.observe_flows(metrics)
+        if self.recorder is not None:
+            self.recorder.record(metrics)
         
         # Update each row in the treeview
         for item in self.tree.get_children():
@@ -481,6 +515,10 @@ class TrafficControlGUI:
     
     def finish_closing(self, stop_window=None):
         self.running = False
+        if self.recorder is not None:
+            self.recorder.close()
+        if tracer.enabled:
+            tracer.save()
         if stop_window:
             stop_window.destroy()
         self.root.destroy()
@@ -496,38 +534,68 @@ class TrafficControlGUI:
         except ValueError:
             pass
     
-    def _animate_button_spinner(self, key, duration):
-        """Animate a spinner on the button during the delay period"""
+    def wait_for_routes(self, dst_ips, requested_at, update_spinner, upload=None):
+        """
+        Wait until the NCS routes of the given destinations are ready, animating a spinner.
+        
+        With NCS_READINESS_PROBE the flow resources are polled until the routes are reported
+        installed (falling back to NCS_TO_FLOW_DELAY on timeout); otherwise the fixed
+        NCS_TO_FLOW_DELAY is waited. The wait runs in a separate thread so the GUI stays responsive.
+        
+        Args:
+            dst_ips (list): Destination IPs whose routes were requested
+            requested_at (float): time.monotonic() value taken when the routes were requested
+            update_spinner (callable): Called with the current spinner character
+            upload (Future): Background upload requesting the routes, if any. The wait counts
+                from its completion
+        """
+        done = threading.Event()
+        
+        def wait_worker():
+            nonlocal requested_at
+            if upload is not None:
+                try:
+                    requested_at = upload.result(timeout=NCS_READINESS_TIMEOUT)
+                except Exception as e:
+                    logger.error(f"Initial flows file upload failed: {e}")
+            
+            if NCS_READINESS_PROBE:
+                ncs_client.wait_for_routes(dst_ips, requested_at, NCS_TO_FLOW_DELAY, timeout=NCS_READINESS_TIMEOUT)
+            else:
+                time.sleep(max(0.0, NCS_TO_FLOW_DELAY - (time.monotonic() - requested_at)))
+            done.set()
+        
+        threading.Thread(target=wait_worker, daemon=True).start()
+        
         spinner_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        start_time = time.time()
         idx = 0
-        
-        while time.time() - start_time < duration:
-            spinner = spinner_chars[idx % len(spinner_chars)]
-            self.flow_buttons[key].configure(
-                text=f"Flow {key} {spinner} Starting...")
+        while not done.is_set():
+            update_spinner(spinner_chars[idx % len(spinner_chars)])
             self.root.update()
-            time.sleep(0.1)
+            done.wait(0.1)
             idx += 1
+        
+        logger.debug(f"Routes ready after {time.monotonic() - requested_at:.2f}s for {dst_ips}")
     
+    @tracer.traced("toggle flow", "gui")
     def toggle_flow(self, key):
         flow_name = self.flows[key-1]['name']
-        dst_ip = self.flows[key-1]['dst_ip']
+        dst_ips = self.flows[key-1]['dst_ips']  # Several destinations for grouped flows
         
         self.flow_states[key] = not self.flow_states[key]
         
         # Send POST request BEFORE starting a flow
         if self.flow_states[key]:  # About to start
-            encoded_ip = urllib.parse.quote(dst_ip, safe='')
-            try:
-                response = requests.post(f"{NCS_API_LOCATION}/flows/{encoded_ip}")
-                logger.info(f"POST request sent to NCS API for flow {key} (dst: {dst_ip}): {response.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to send POST request for flow {key}: {e}")
+            requested_at = time.monotonic()
+            responses = ncs_client.post_flows(dst_ips)
+            for dst_ip, response in zip(dst_ips, responses):
+                if response is not None:
+                    logger.info(f"POST request sent to NCS API for flow {key} (dst: {dst_ip}): {response.status_code}")
             
-            # Wait for configured delay before starting the flow with spinner animation
-            logger.debug(f"Waiting {NCS_TO_FLOW_DELAY}s before starting flow {key}")
-            self._animate_button_spinner(key, NCS_TO_FLOW_DELAY)
+            # Wait for the route (or the configured delay) before starting the flow with spinner animation
+            logger.debug(f"Waiting for route before starting flow {key}")
+            self.wait_for_routes(dst_ips, requested_at,
+                lambda spinner: self.flow_buttons[key].configure(text=f"Flow {key} {spinner} Starting..."))
         
         self.cs.traffic.flow_transmit.flow_names = [flow_name]
         self.cs.traffic.flow_transmit.state = (self.cs.traffic.flow_transmit.START 
@@ -536,29 +604,21 @@ class TrafficControlGUI:
         
         # Send DELETE request AFTER stopping a flow
         if not self.flow_states[key]:  # Just stopped
-            encoded_ip = urllib.parse.quote(dst_ip, safe='')
-            try:
-                response = requests.delete(f"{NCS_API_LOCATION}/flows/{encoded_ip}")
-                logger.info(f"DELETE request sent to NCS API for flow {key} (dst: {dst_ip}): {response.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to send DELETE request for flow {key}: {e}")
+            responses = ncs_client.delete_flows(dst_ips)
+            for dst_ip, response in zip(dst_ips, responses):
+                if response is not None:
+                    logger.info(f"DELETE request sent to NCS API for flow {key} (dst: {dst_ip}): {response.status_code}")
             
             # First metrics update immediately after stopping the flow
             time.sleep(0.1)
             self._update_metrics_once()
             logger.debug(f"First metrics update after stopping flow {key}")
             
-            # Schedule second metrics update after 3 seconds
+            # Final metrics update as soon as the counters of the flow have settled
             def delayed_update():
-                time.sleep(3)
+                _, settled, waited = wait_for_stable_counters(self.api, [flow_name])
                 self._update_metrics_once()
-                logger.debug(f"Second metrics update (3s delay) after stopping flow {key}")
-                time.sleep(7)
-                self._update_metrics_once()
-                logger.debug(f"Third metrics update (10s delay) after stopping flow {key}")
-                time.sleep(5)
-                self._update_metrics_once()
-                logger.debug(f"Third metrics update (15s delay) after stopping flow {key}")
+                logger.debug(f"Final metrics update ({waited:.2f}s delay, settled={settled}) after stopping flow {key}")
             
             threading.Thread(target=delayed_update, daemon=True).start()
         
@@ -566,6 +626,7 @@ class TrafficControlGUI:
         btn_text = f"Flow {key} ({status})"
         self.flow_buttons[key].configure(text=btn_text)
 
+    @tracer.traced("start all flows", "gui")
     def start_all_flows(self):
         """Start all flows (default behavior when no variation function is provided)"""
         self.cs.traffic.flow_transmit.flow_names = []
@@ -578,6 +639,7 @@ class TrafficControlGUI:
         
         logger.info("Started all flows")
 
+    @tracer.traced("stop all flows", "gui")
     def stop_all_flows(self):
         """Stop all flows and variation thread if running"""
         global variation_thread, variation_stop_event, variation_running
@@ -597,15 +659,11 @@ class TrafficControlGUI:
         self.cs.traffic.flow_transmit.state = self.cs.traffic.flow_transmit.STOP
         self.api.set_control_state(self.cs)
         
-        # Send DELETE requests for each flow
-        for flow in self.flows:
-            dst_ip = flow['dst_ip']
-            encoded_ip = urllib.parse.quote(dst_ip, safe='')
-            try:
-                response = requests.delete(f"{NCS_API_LOCATION}/flows/{encoded_ip}")
+        # Send DELETE requests for all flows concurrently
+        dst_ips = [dst_ip for flow in self.flows for dst_ip in flow['dst_ips']]
+        for dst_ip, response in zip(dst_ips, ncs_client.delete_flows(dst_ips)):
+            if response is not None:
                 logger.info(f"DELETE request sent to NCS API for flow (dst: {dst_ip}): {response.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to send DELETE request for flow (dst: {dst_ip}): {e}")
         
         # Update all flow states
         for key in self.flow_states:
@@ -616,17 +674,11 @@ class TrafficControlGUI:
         self._update_metrics_once()
         logger.debug("First metrics update after stopping all flows")
         
-        # Schedule second metrics update after 3 seconds
+        # Final metrics update as soon as the counters of all flows have settled
         def delayed_update():
-            time.sleep(3)
-            self._update_metrics_once()
-            logger.debug("Second metrics update (3s delay) after stopping all flows")
-            time.sleep(7)
-            self._update_metrics_once()
-            logger.debug("Third metrics update (10s delay) after stopping all flows")
-            time.sleep(5)
+            _, settled, waited = wait_for_stable_counters(self.api)
             self._update_metrics_once()
-            logger.debug("Third metrics update (15s delay) after stopping all flows")
+            logger.debug(f"Final metrics update ({waited:.2f}s delay, settled={settled}) after stopping all flows")
 
         threading.Thread(target=delayed_update, daemon=True).start()
 
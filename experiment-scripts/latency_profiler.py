@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import threading
+import logging
+from datetime import datetime
+
+# Import span tracer of the experiment timeline
+from span_tracer import tracer
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Directory where latency profiles are saved
+PROFILE_RESULTS_DIR = "results"
+
+# Differences between host and generator timestamps above this value mean both clocks are not comparable
+MAX_CLOCK_DIFFERENCE_NS = 3600 * 1_000_000_000
+
+# Breakdown columns summarized with percentiles, in milliseconds
+PROFILE_METRICS = (
+    'ncs_post_rtt_ms',          # POST request round trip (slowest destination of the flow)
+    'route_install_ms',         # POST sent -> route reported installed by NCS (slowest destination of the flow)
+    'post_to_start_ms',         # POST sent -> START issued (the NCS lead time of the schedule)
+    'start_control_rtt_ms',     # set_control_state(START) round trip
+    'first_packet_delay_ms',    # START issued -> first packet timestamp
+    'stop_control_rtt_ms',      # set_control_state(STOP) round trip
+    'last_packet_offset_ms',    # STOP issued -> last packet timestamp
+    'ncs_delete_rtt_ms'         # DELETE request round trip (slowest destination of the flow)
+)
+
+
+def _percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    return values[int(q * (len(values) - 1))]
+
+
+def _ms(delta_ns) -> float:
+    return delta_ns / 1_000_000 if delta_ns is not None else None
+
+
+class RouteChangeProfiler:
+    """
+    Record control-plane and data-plane timestamps of every route change of a variation run.
+
+    Each START of a flow opens a cycle that gathers the NCS POST sent before it, the time the
+    route took to be reported installed, the set_control_state calls that start and stop the
+    flow, and the NCS DELETE sent after it.
+    Host timestamps are taken with time.time_ns() so they can be compared with the first/last
+    packet timestamps reported by the generator in the flow metrics, which requires the host
+    and the generator clocks to be synchronized (e.g. NTP). Request round trips are measured
+    with the monotonic clock and are not affected by clock offsets.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cycles = {}             # Flow name -> list of cycle dicts, in start order
+        self.pending_posts = {}      # Flow name -> POST timing waiting for the next START
+        self.packet_timestamps = {}  # Flow name -> (first_timestamp_ns, last_timestamp_ns)
+
+    def _open_cycles(self) -> list:
+        return [name for name, cycles in self.cycles.items() if cycles and cycles[-1]['stop_issued_ns'] is None]
+
+    def ncs_request(self, method: str, flow_name: str, sent_ns: int, responses: list):
+        """
+        Record the NCS requests sent for the destinations of a flow.
+
+        Args:
+            method (str): 'POST' or 'DELETE'
+            flow_name (str): Name of the flow the requests belong to
+            sent_ns (int): time.time_ns() right before the requests were sent
+            responses (list): Response objects (None for failed requests)
+        """
+        rtts = [response.elapsed.total_seconds() * 1000 for response in responses if response is not None]
+        rtt_ms = max(rtts) if rtts else None
+
+        with self.lock:
+            if method == 'POST':
+                self.pending_posts[flow_name] = {'post_sent_ns': sent_ns, 'ncs_post_rtt_ms': rtt_ms,
+                                                 'route_install_ms': None}
+            else:
+                cycles = self.cycles.get(flow_name)
+                if cycles:
+                    cycles[-1]['ncs_delete_rtt_ms'] = rtt_ms
+
+    def route_installed(self, flow_name: str, sent_ns: int, install_ms: float):
+        """
+        Record the time the route of a flow took to be reported installed by NCS.
+
+        The readiness probe may answer after the flow has already been started, so the time is
+        attached to the POST sent at sent_ns whether it is still pending or part of a cycle.
+
+        Args:
+            flow_name (str): Name of the flow
+            sent_ns (int): time.time_ns() right before the POST requests were sent
+            install_ms (float): Milliseconds from the POST to the route of its slowest destination
+                                being reported installed
+        """
+        with self.lock:
+            post = self.pending_posts.get(flow_name)
+            if post is None or post['post_sent_ns'] != sent_ns:
+                post = next((cycle for cycle in reversed(self.cycles.get(flow_name, []))
+                             if cycle['post_sent_ns'] == sent_ns), None)
+            if post is not None:
+                post['route_install_ms'] = install_ms
+
+    def control_state(self, state: str, flow_names: list, issued_ns: int, returned_ns: int):
+        """
+        Record a set_control_state call starting or stopping flows.
+
+        Args:
+            state (str): 'start' or 'stop'
+            flow_names (list): Flow names of the call (empty list means all flows)
+            issued_ns (int): time.time_ns() right before the call
+            returned_ns (int): time.time_ns() right after the call
+        """
+        rtt_ms = _ms(returned_ns - issued_ns)
+
+        with self.lock:
+            if state == 'start':
+                for flow_name in flow_names:
+                    cycle = {
+                        'flow': flow_name,
+                        'post_sent_ns': None,
+                        'ncs_post_rtt_ms': None,
+                        'route_install_ms': None,
+                        'start_issued_ns': issued_ns,
+                        'start_control_rtt_ms': rtt_ms,
+                        'stop_issued_ns': None,
+                        'stop_control_rtt_ms': None,
+                        'ncs_delete_rtt_ms': None
+                    }
+                    cycle.update(self.pending_posts.pop(flow_name, {}))
+                    self.cycles.setdefault(flow_name, []).append(cycle)
+            else:
+                for flow_name in flow_names or self._open_cycles():
+                    cycles = self.cycles.get(flow_name)
+                    if cycles and cycles[-1]['stop_issued_ns'] is None:
+                        cycles[-1]['stop_issued_ns'] = issued_ns
+                        cycles[-1]['stop_control_rtt_ms'] = rtt_ms
+
+    def collect_packet_timestamps(self, flow_metrics: list):
+        """
+        Record the first/last packet timestamps of the flows from their metrics.
+
+        Should be called once traffic has stopped and counters have settled, since the last
+        packet timestamp keeps moving while packets are in flight.
+
+        Args:
+            flow_metrics (list): snappi flow metric objects (with metrics.timestamps enabled)
+        """
+        with self.lock:
+            for metric in flow_metrics:
+                first_ns = metric.timestamps.first_timestamp_ns
+                last_ns = metric.timestamps.last_timestamp_ns
+                if first_ns:
+                    self.packet_timestamps[metric.name] = (int(first_ns), int(last_ns))
+
+    def breakdown(self) -> list:
+        """
+        Build the per-flow breakdown of every cycle.
+
+        The generator only reports the first and the last packet of each flow, so the first
+        packet delay is only available for the first cycle of a flow and the last packet offset
+        for its last cycle.
+
+        Returns:
+            list: One dict per cycle with the PROFILE_METRICS columns (None when not available)
+        """
+        rows = []
+        clock_warning = False
+
+        with self.lock:
+            for flow_name, cycles in self.cycles.items():
+                first_ns, last_ns = self.packet_timestamps.get(flow_name, (None, None))
+
+                for i, cycle in enumerate(cycles):
+                    row = {'flow': flow_name, 'cycle': i}
+                    row['ncs_post_rtt_ms'] = cycle['ncs_post_rtt_ms']
+                    row['route_install_ms'] = cycle['route_install_ms']
+                    row['post_to_start_ms'] = (_ms(cycle['start_issued_ns'] - cycle['post_sent_ns'])
+                                               if cycle['post_sent_ns'] is not None else None)
+                    row['start_control_rtt_ms'] = cycle['start_control_rtt_ms']
+                    row['stop_control_rtt_ms'] = cycle['stop_control_rtt_ms']
+                    row['ncs_delete_rtt_ms'] = cycle['ncs_delete_rtt_ms']
+
+                    first_delay = first_ns - cycle['start_issued_ns'] if first_ns and i == 0 else None
+                    last_offset = (last_ns - cycle['stop_issued_ns']
+                                   if last_ns and i == len(cycles) - 1 and cycle['stop_issued_ns'] is not None else None)
+
+                    # Discard packet timestamps taken on a clock that is not comparable with the host one
+                    if any(d is not None and abs(d) > MAX_CLOCK_DIFFERENCE_NS for d in (first_delay, last_offset)):
+                        clock_warning = True
+                        first_delay = last_offset = None
+
+                    row['first_packet_delay_ms'] = _ms(first_delay)
+                    row['last_packet_offset_ms'] = _ms(last_offset)
+                    rows.append(row)
+
+        if clock_warning:
+            logger.warning("Packet timestamps are not comparable with the host clock, "
+                           "first/last packet delays discarded")
+        return rows
+
+    def summary(self, rows: list = None) -> dict:
+        """
+        Summarize the breakdown across the whole run.
+
+        Args:
+            rows (list): Breakdown rows (computed if not given)
+
+        Returns:
+            dict: Metric name -> count, mean, p50, p95, p99 and max in milliseconds
+        """
+        rows = self.breakdown() if rows is None else rows
+        summary = {}
+        for metric in PROFILE_METRICS:
+            values = sorted(row[metric] for row in rows if row[metric] is not None)
+            if not values:
+                continue
+            summary[metric] = {
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': _percentile(values, 0.50),
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99),
+                'max': values[-1]
+            }
+        return summary
+
+    def report(self, results_dir: str = PROFILE_RESULTS_DIR) -> str:
+        """
+        Log the run summary and save the breakdown and summary to a JSON file.
+
+        Args:
+            results_dir (str): Directory of the results file
+
+        Returns:
+            str: Path of the results file, or None if it could not be saved
+        """
+        rows = self.breakdown()
+        summary = self.summary(rows)
+
+        logger.info(f"Route change latency over {len(rows)} flow cycles:")
+        for metric, stats in summary.items():
+            logger.info(f"  {metric:<24} n={stats['count']:<5} mean={stats['mean']:9.2f} "
+                        f"p50={stats['p50']:9.2f} p95={stats['p95']:9.2f} "
+                        f"p99={stats['p99']:9.2f} max={stats['max']:9.2f}")
+
+        try:
+            os.makedirs(results_dir, exist_ok=True)
+            results_file = os.path.join(results_dir, f"latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(results_file, 'w') as f:
+                json.dump({'summary': summary, 'flows': rows}, f, indent=4)
+            logger.info(f"Latency profile saved to: {results_file}")
+            return results_file
+        except Exception as e:
+            logger.error(f"Failed to save latency profile: {e}")
+            return None
+
+
+def timed_control_state(api, cs, profiler: RouteChangeProfiler = None):
+    """
+    Call set_control_state and record it in the profiler (if any).
+
+    Args:
+        api: Snappi API object
+        cs: Control state with traffic.flow_transmit configured
+        profiler (RouteChangeProfiler): Profiler recording the call, or None
+    """
+    issued_ns = time.time_ns()
+    with tracer.span(f"set_control_state {cs.traffic.flow_transmit.state}", "otg",
+                     flows=list(cs.traffic.flow_transmit.flow_names)):
+        api.set_control_state(cs)
+    if profiler is not None:
+        state = cs.traffic.flow_transmit.state
+        profiler.control_state(state, list(cs.traffic.flow_transmit.flow_names), issued_ns, time.time_ns())
@@ -0,0 +1,260 @@
+import os
+import time
+import functools
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Import latency histogram and shared clients of the NCS API
+from ncs_client import LatencyHistogram, get_ncs_clients
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Environment variable setting the port of the endpoint (disabled if unset)
+METRICS_PORT_ENV = "EXPERIMENT_METRICS_PORT"
+
+# Listening address of the endpoint (all interfaces, for scrapers outside the driver host)
+METRICS_HOST = "0.0.0.0"
+
+# Prefix of the exposed metric names
+METRICS_PREFIX = "traffic_controller_"
+
+# Snappi API calls timed by instrument_api
+OTG_CALLS = ('set_config', 'get_config', 'set_control_state', 'get_metrics')
+
+# Upper bounds (in seconds) of the schedule skew histogram buckets
+SKEW_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Seconds between two flow metrics polls of the headless driver
+FLOW_POLL_INTERVAL = 1.0
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{str(value)}"' for key, value in labels.items()) + "}"
+
+
+def _histogram(lines: list, name: str, snapshot: dict, **labels):
+    """Append the exposition lines of a LatencyHistogram snapshot"""
+    cumulative = 0
+    for bound, count in zip(list(snapshot['buckets']) + ["+Inf"], snapshot['counts']):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(**labels)} {snapshot['count']}")
+
+
+class ControllerMetrics:
+    """
+    In-process metrics of a traffic driver, rendered in the Prometheus text format.
+
+    Latencies are kept in LatencyHistogram objects (one short lock per observation) and the
+    latest flow metrics in an immutable dict replaced at every poll, so recording never waits
+    for a scrape. Scrapes only read copies of this state and never call the OTG or NCS APIs,
+    so a slow or stuck scraper cannot stall the control loop. The NCS request latency and
+    errors are read from the shared NCS clients.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.otg_latency = {}
+        self.otg_errors = {}
+        self.schedule_skew = LatencyHistogram(SKEW_BUCKETS)
+        self.flows = {}
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def observe_otg(self, call: str, seconds: float, failed: bool = False):
+        """
+        Record the latency of an OTG API call.
+
+        Args:
+            call (str): Snappi API method (e.g. "set_control_state")
+            seconds (float): Duration of the call
+            failed (bool): The call raised an exception
+        """
+        histogram = self.otg_latency.get(call)
+        if histogram is None:
+            with self._lock:
+                histogram = self.otg_latency.setdefault(call, LatencyHistogram())
+        histogram.observe(seconds)
+        if failed:
+            with self._lock:
+                self.otg_errors[call] = self.otg_errors.get(call, 0) + 1
+
+    def observe_skew(self, seconds: float):
+        """Record the delay of a schedule action past its planned time"""
+        self.schedule_skew.observe(max(0.0, seconds))
+
+    def observe_flows(self, flow_metrics, epoch: float = None):
+        """
+        Update the flow gauges from a flow metrics poll.
+
+        Args:
+            flow_metrics: Flow metrics of every flow (get_metrics(...).flow_metrics)
+            epoch (float): Time of the poll (defaults to now)
+        """
+        epoch = epoch if epoch is not None else time.time()
+        bytes_tx = sum(m.bytes_tx or 0 for m in flow_metrics)
+        bytes_rx = sum(m.bytes_rx or 0 for m in flow_metrics)
+        flows = {
+            'flows': len(flow_metrics),
+            'active_flows': sum(1 for m in flow_metrics if m.transmit == 'started'),
+            'tx_frames_per_second': sum(m.frames_tx_rate or 0 for m in flow_metrics),
+            'rx_frames_per_second': sum(m.frames_rx_rate or 0 for m in flow_metrics),
+            'tx_bytes_total': bytes_tx,
+            'rx_bytes_total': bytes_rx,
+            'flow_metrics_timestamp_seconds': epoch
+        }
+        # Byte rates from the counters of consecutive polls (counters restart with a new configuration)
+        previous = self._previous
+        if previous is not None and epoch > previous[0] and bytes_tx >= previous[1] and bytes_rx >= previous[2]:
+            flows['tx_bits_per_second'] = (bytes_tx - previous[1]) * 8 / (epoch - previous[0])
+            flows['rx_bits_per_second'] = (bytes_rx - previous[2]) * 8 / (epoch - previous[0])
+        self._previous = (epoch, bytes_tx, bytes_rx)
+        self.flows = flows
+
+    def instrument_api(self, api):
+        """
+        Time the OTG calls of a snappi API object (every caller of the object is covered).
+
+        Args:
+            api: Snappi API object
+        """
+        for call in OTG_CALLS:
+            method = getattr(api, call, None)
+            if method is None or getattr(method, 'timed_by_metrics', False):
+                continue
+
+            def timed(*args, _method=method, _call=call, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = _method(*args, **kwargs)
+                except Exception:
+                    self.observe_otg(_call, time.perf_counter() - started, failed=True)
+                    raise
+                self.observe_otg(_call, time.perf_counter() - started)
+                return result
+
+            timed = functools.wraps(method)(timed)
+            timed.timed_by_metrics = True
+            setattr(api, call, timed)
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format (version 0.0.4)"""
+        p = METRICS_PREFIX
+        lines = [f"# TYPE {p}start_time_seconds gauge", f"{p}start_time_seconds {self.started}"]
+
+        clients = get_ncs_clients()
+        lines.append(f"# HELP {p}ncs_request_duration_seconds Latency of the NCS API requests")
+        lines.append(f"# TYPE {p}ncs_request_duration_seconds histogram")
+        for client in clients:
+            for method, histogram in client.latency.items():
+                _histogram(lines, f"{p}ncs_request_duration_seconds", histogram.snapshot(),
+                           location=client.location, method=method)
+        lines.append(f"# HELP {p}ncs_request_errors_total Failed NCS API requests (connection errors and 5xx)")
+        lines.append(f"# TYPE {p}ncs_request_errors_total counter")
+        for client in clients:
+            for method, errors in list(client.errors.items()):
+                lines.append(f"{p}ncs_request_errors_total{_labels(location=client.location, method=method)} {errors}")
+        lines.append(f"# HELP {p}ncs_route_install_seconds Route install latency observed by the readiness probe")
+        lines.append(f"# TYPE {p}ncs_route_install_seconds histogram")
+        for client in clients:
+            _histogram(lines, f"{p}ncs_route_install_seconds", client.route_install.snapshot(),
+                       location=client.location)
+        lines.append(f"# TYPE {p}ncs_route_install_fallbacks_total counter")
+        for client in clients:
+            lines.append(f"{p}ncs_route_install_fallbacks_total{_labels(location=client.location)} "
+                         f"{client.route_install_fallbacks}")
+
+        lines.append(f"# HELP {p}otg_call_duration_seconds Latency of the OTG API calls")
+        lines.append(f"# TYPE {p}otg_call_duration_seconds histogram")
+        for call, histogram in list(self.otg_latency.items()):
+            _histogram(lines, f"{p}otg_call_duration_seconds", histogram.snapshot(), call=call)
+        lines.append(f"# TYPE {p}otg_call_errors_total counter")
+        for call, errors in list(self.otg_errors.items()):
+            lines.append(f"{p}otg_call_errors_total{_labels(call=call)} {errors}")
+
+        lines.append(f"# HELP {p}schedule_skew_seconds Delay of the variation schedule actions past their planned time")
+        lines.append(f"# TYPE {p}schedule_skew_seconds histogram")
+        _histogram(lines, f"{p}schedule_skew_seconds", self.schedule_skew.snapshot())
+
+        for name, value in self.flows.items():
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# TYPE {p}{name} {kind}")
+            lines.append(f"{p}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Metrics shared by all the modules of a traffic driver
+controller_metrics = ControllerMetrics()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of the controller metrics (GET /metrics)"""
+
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        content = controller_metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def _poll_flows(api, interval: float, stop_event: threading.Event):
+    """Feed the flow gauges from a dedicated thread, off the control loop"""
+    while not stop_event.is_set():
+        try:
+            mr = api.metrics_request()
+            mr.flow.flow_names = []
+            controller_metrics.observe_flows(api.get_metrics(mr).flow_metrics)
+        except Exception as e:
+            logger.debug(f"Error polling flow metrics: {e}")
+        stop_event.wait(interval)
+
+
+def start_metrics_server(port: int, api=None, host: str = METRICS_HOST,
+                         poll_interval: float = FLOW_POLL_INTERVAL) -> ThreadingHTTPServer:
+    """
+    Serve the controller metrics on http://<host>:<port>/metrics in a background thread.
+
+    Args:
+        port (int): Listening port (0 picks a free port)
+        api: Snappi API object whose calls are timed; with poll_interval, its flow metrics are
+             also polled for the flow gauges (drivers with their own polling loop call
+             controller_metrics.observe_flows instead and pass poll_interval=None)
+        host (str): Listening address
+        poll_interval (float): Seconds between two flow metrics polls (None to disable)
+
+    Returns:
+        ThreadingHTTPServer: Running server
+    """
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{server.server_port}/metrics")
+
+    if api is not None:
+        controller_metrics.instrument_api(api)
+        if poll_interval:
+            server.stop_polling = threading.Event()
+            threading.Thread(target=_poll_flows, args=(api, poll_interval, server.stop_polling),
+                             name="metrics-flow-poller", daemon=True).start()
+    return server
+
+
+def requested_port(port: int = None) -> int:
+    """Port of the endpoint from a CLI option or METRICS_PORT_ENV, or None if disabled"""
+    if port is not None:
+        return port
+    value = os.environ.get(METRICS_PORT_ENV, "").strip()
+    return int(value) if value else None
@@ -1,7 +1,13 @@
 import json
 import time
-import boto3
+import queue
+import atexit
+import threading
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Import span tracer of the experiment timeline
+from span_tracer import tracer
 
 # Import MinIO configuration from config file
 from config.b5g import S3_ENDPOINT, S3_ACCESS_KEY, S3_SECRET_KEY, S3_BUCKET
@@ -9,14 +15,198 @@ from config.b5g import S3_ENDPOINT, S3_ACCESS_KEY, S3_SECRET_KEY, S3_BUCKET
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
-# Create S3 client (same as your existing code)
-s3_client = boto3.client(
-    's3',
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    region_name='local'
-)
+# Background writer settings
+S3_QUEUE_SIZE = 256         # Maximum number of pending jobs
+S3_BATCH_SIZE = 32          # Maximum number of jobs handled per batch
+S3_UPLOAD_WORKERS = 4       # Concurrent uploads within a batch
+
+# Kinds of background jobs
+_PUT = "put"
+_LIST = "list"
+
+
+class S3BackgroundWriter:
+    """
+    Background service performing S3 uploads and debug listings off the caller thread.
+
+    Jobs are placed in a bounded queue and handled by a single worker thread in batches:
+    uploads of a batch targeting the same key are coalesced (the last body wins) and sent
+    concurrently, and all listing requests of a batch are served by a single listing.
+    Uploads return a Future resolved with the time.monotonic() value of the completed upload
+    (or the raised exception). Queuing never waits: uploads arriving with the queue full fail
+    their Future at once, and listing requests are dropped, since they are only informative.
+    """
+
+    def __init__(self, client, bucket: str, queue_size: int = S3_QUEUE_SIZE, batch_size: int = S3_BATCH_SIZE,
+                 upload_workers: int = S3_UPLOAD_WORKERS):
+        self.client = client
+        self.bucket = bucket
+        self.batch_size = batch_size
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="s3-upload")
+        self.worker = threading.Thread(target=self._run, name="s3-writer", daemon=True)
+        self.worker.start()
+
+    def put(self, key: str, body: bytes) -> Future:
+        """
+        Queue an object upload.
+
+        Args:
+            key (str): Object key
+            body (bytes): Object content
+
+        Returns:
+            Future: Resolved with the monotonic time of the completed upload (failed at once if
+                    the queue is full)
+        """
+        future = Future()
+        try:
+            self.jobs.put_nowait((_PUT, key, body, future))
+        except queue.Full:
+            future.set_exception(RuntimeError(f"S3 upload queue full, s3://{self.bucket}/{key} not uploaded"))
+        return future
+
+    def list(self, prefix: str):
+        """Queue a debug listing of the objects under prefix (dropped if the queue is full)"""
+        try:
+            self.jobs.put_nowait((_LIST, prefix, None, None))
+        except queue.Full:
+            logger.debug(f"S3 queue full, skipping listing of {prefix}")
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued job has been handled.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None waits forever)
+
+        Returns:
+            bool: True if the queue was drained
+        """
+        marker = Future()
+        try:
+            self.jobs.put((_PUT, None, None, marker), timeout=timeout)
+            marker.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def _next_batch(self) -> list:
+        batch = [self.jobs.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            # Coalesce uploads to the same key, keeping the last body
+            uploads = {}
+            markers = []
+            prefixes = set()
+            for kind, key, body, future in batch:
+                if kind == _LIST:
+                    prefixes.add(key)
+                elif key is None:
+                    markers.append(future)
+                else:
+                    upload = uploads.setdefault(key, [None, []])
+                    upload[0] = body
+                    upload[1].append(future)
+
+            # Upload the batch concurrently, waiting for every upload before the next batch
+            list(self.executor.map(self._upload, uploads.items()))
+
+            for prefix in sorted(prefixes):
+                self._list(prefix)
+
+            for marker in markers:
+                marker.set_result(time.monotonic())
+
+    def _upload(self, item):
+        """Upload one coalesced object and resolve the futures waiting for it"""
+        key, (body, futures) = item
+        try:
+            with tracer.span("S3 put_object", "s3", key=key, bytes=len(body), coalesced=len(futures)):
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=body)
+            uploaded_at = time.monotonic()
+            logger.debug(f"Uploaded s3://{self.bucket}/{key} ({len(body)} bytes)")
+            for future in futures:
+                future.set_result(uploaded_at)
+        except Exception as e:
+            logger.error(f"Error uploading s3://{self.bucket}/{key}: {e}")
+            for future in futures:
+                future.set_exception(e)
+        return key
+
+    def _list(self, prefix: str):
+        try:
+            with tracer.span("S3 list_objects", "s3", prefix=prefix):
+                response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=prefix)
+            if 'Contents' in response:
+                logger.debug(f"=== ARCHIVOS ACTUALES EN S3/{prefix} ===")
+                for obj in response['Contents']:
+                    logger.debug(f"- {obj['Key']} (LastModified: {obj['LastModified']})")
+            else:
+                logger.debug(f"=== NO HAY ARCHIVOS EN S3/{prefix} ===")
+        except Exception as e:
+            logger.error(f"Error listando S3: {e}")
+
+
+# Shared S3 client and background writer, created on first use: boto3 is slow to import and
+# flow definitions that never upload anything should not pay for it
+_s3_lock = threading.Lock()
+_s3_client = None
+_s3_writer = None
+
+
+def _create_s3_client():
+    import boto3
+
+    return boto3.client(
+        's3',
+        endpoint_url=S3_ENDPOINT,
+        aws_access_key_id=S3_ACCESS_KEY,
+        aws_secret_access_key=S3_SECRET_KEY,
+        region_name='local'
+    )
+
+
+def get_s3_client():
+    """Shared S3 client of the configured MinIO server"""
+    global _s3_client
+    with _s3_lock:
+        if _s3_client is None:
+            _s3_client = _create_s3_client()
+        return _s3_client
+
+
+def get_s3_writer() -> S3BackgroundWriter:
+    """Shared background writer of the configured bucket"""
+    global _s3_client, _s3_writer
+    with _s3_lock:
+        if _s3_writer is None:
+            if _s3_client is None:
+                _s3_client = _create_s3_client()
+            _s3_writer = S3BackgroundWriter(_s3_client, S3_BUCKET)
+            # Give pending uploads a chance to complete when the program exits
+            atexit.register(_s3_writer.flush, 10)
+        return _s3_writer
+
+
+class _LazyS3Writer:
+    """Stand-in of the shared background writer that creates it on first use"""
+
+    def __getattr__(self, name):
+        return getattr(get_s3_writer(), name)
+
+
+# Shared background writer
+s3_writer = _LazyS3Writer()
 
 # Flag to ensure we only upload once per session
 _initial_flows_created = False
@@ -25,6 +215,12 @@ def create_initial_flows_file(dst_ips):
     """
     Create and upload initial flows JSON to S3 - ONLY THE FIRST TIME "Start Variation" is clicked
     After this, ALL operations are handled via HTTP API, this method is NEVER used again.
+    
+    The upload is performed by the background writer, so the caller is never blocked by S3.
+    
+    Returns:
+        Future: Resolved with the monotonic time of the completed upload, or None if the
+                file was already created in this session
     """
     global _initial_flows_created
     
@@ -34,7 +230,7 @@ def create_initial_flows_file(dst_ips):
     # Only create the initial file once per session
     if _initial_flows_created:
         logger.debug("*** Ya creado en esta sesión - SALTANDO ***")
-        return
+        return None
     
     logger.debug("*** CREANDO ARCHIVO INICIAL - PRIMERA VEZ EN ESTA SESIÓN ***")
     
@@ -63,37 +259,36 @@ def create_initial_flows_file(dst_ips):
     file_key = f"flows/flows_{timestamp}.json"
     
     logger.debug(f"Subiendo archivo: {file_key}")
-    s3_client.put_object(
-        Bucket=S3_BUCKET, 
-        Key=file_key, 
-        Body=content.encode("utf-8")
-    )
+    upload = s3_writer.put(file_key, content.encode("utf-8"))
     
-    logger.info(f"✓ ARCHIVO CREADO: s3://{S3_BUCKET}/{file_key}")
-    logger.info(f"✓ {len(flows_data['flows'])} flujos con timestamp: {current_timestamp}")
+    def log_upload(future):
+        global _initial_flows_created
+        if future.exception() is None:
+            logger.info(f"✓ ARCHIVO CREADO: s3://{S3_BUCKET}/{file_key}")
+            logger.info(f"✓ {len(flows_data['flows'])} flujos con timestamp: {current_timestamp}")
+        else:
+            # La subida ha fallado: se permite crear el archivo de nuevo en la siguiente llamada
+            _initial_flows_created = False
+            logger.error(f"✗ Error subiendo s3://{S3_BUCKET}/{file_key}: {future.exception()}")
     
-    # Mark as created - won't create again in this session
+    # Mark as created - won't create again in this session (reset by log_upload if the upload fails)
     _initial_flows_created = True
+    upload.add_done_callback(log_upload)
     logger.debug(f"✓ Variable _initial_flows_created = {_initial_flows_created}")
     logger.debug("========== create_initial_flows_file COMPLETADO ==========")
+    return upload
 
 def monitor_s3_files():
-    """Función de debug para listar archivos en S3"""
-    try:
-        response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix="flows/")
-        if 'Contents' in response:
-            logger.debug("=== ARCHIVOS ACTUALES EN S3/flows/ ===")
-            for obj in response['Contents']:
-                logger.debug(f"- {obj['Key']} (LastModified: {obj['LastModified']})")
-        else:
-            logger.debug("=== NO HAY ARCHIVOS EN S3/flows/ ===")
-    except Exception as e:
-        logger.error(f"Error listando S3: {e}")
+    """Función de debug para listar archivos en S3 (solo con logging DEBUG, en segundo plano)"""
+    if logger.isEnabledFor(logging.DEBUG):
+        s3_writer.list("flows/")
 
 def log_current_stack(message):
-    """Log quien está llamando esta función"""
+    """Log quien está llamando esta función (solo con logging DEBUG)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     import traceback
     logger.debug(f"STACK_TRACE: {message}")
     for line in traceback.format_stack()[-5:-1]:  # Últimas 4 llamadas
         logger.debug(f"STACK_TRACE: {line.strip()}")
-    logger.debug("STACK_TRACE: ====================")
\ No newline at end of file
+    logger.debug("STACK_TRACE: ====================")
@@ -0,0 +1,477 @@
+import os
+import time
+import threading
+import urllib.parse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Import span tracer of the experiment timeline
+from span_tracer import tracer
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Default client parameters
+NCS_POOL_SIZE = 16          # Keep-alive connections and concurrent requests per client
+NCS_CONNECT_TIMEOUT = 3     # Seconds to establish a connection
+NCS_READ_TIMEOUT = 15       # Seconds to wait for a response
+NCS_MAX_RETRIES = 2         # Retries on connection errors (and on read errors and 502/503/504 for GET/DELETE)
+NCS_BACKOFF_FACTOR = 0.2    # Exponential backoff factor between retries
+
+# Readiness probe parameters
+NCS_READINESS_TIMEOUT = 10          # Seconds to wait for routes to be reported installed
+NCS_PROBE_INITIAL_BACKOFF = 0.05    # Seconds between the first probes
+NCS_PROBE_MAX_BACKOFF = 1.0         # Maximum seconds between probes
+NCS_PROBE_MAX_UNEXPOSED = 3         # Consecutive waits without route state in any answer before disabling the probe
+
+# HTTP statuses of an API without flow resources to GET, which disable the probe at once
+PROBE_UNSUPPORTED_STATUSES = (405, 501)
+
+# Fields of the flow resource read by the probe: a non-empty route field or a status field
+# in the ready states reports an installed route
+ROUTE_FIELD = 'route'
+STATUS_FIELD = 'status'
+ROUTE_READY_STATES = ('installed', 'active', 'ready')
+
+# Environment variables overriding the fields above (ready states as a comma-separated list)
+NCS_ROUTE_FIELD_ENV = "NCS_ROUTE_FIELD"
+NCS_STATUS_FIELD_ENV = "NCS_STATUS_FIELD"
+NCS_READY_STATES_ENV = "NCS_READY_STATES"
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe cumulative latency histogram with fixed bucket bounds.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Record a single latency sample in seconds"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile as the upper bound of the bucket that contains it.
+
+        Args:
+            q (float): Percentile between 0 and 1
+
+        Returns:
+            float: Estimated latency in seconds (observed maximum for the +Inf bucket)
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            cumulative = 0
+            for i, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= rank:
+                    return self.buckets[i] if i < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        """Return a consistent copy of the histogram state"""
+        with self._lock:
+            return {
+                'buckets': self.buckets,
+                'counts': list(self.counts),
+                'count': self.count,
+                'sum': self.sum,
+                'max': self.max
+            }
+
+
+def describe_response(response) -> str:
+    """
+    Extract the message returned by the NCS API.
+
+    Args:
+        response: requests Response object
+
+    Returns:
+        str: 'error' field for failed requests, 'message' field otherwise
+    """
+    try:
+        response_data = response.json()
+        return response_data.get('error' if response.status_code >= 400 else 'message', 'Unknown')
+    except Exception:
+        return 'No response data'
+
+
+def route_status(response, route_field: str = ROUTE_FIELD, status_field: str = STATUS_FIELD,
+                 ready_states: tuple = ROUTE_READY_STATES):
+    """
+    Read the route state reported by a flow resource response.
+
+    The flow resource (optionally wrapped in a 'flow' key) reports an installed route with
+    a non-empty route_field or a status_field in ready_states. A 404 means the flow resource
+    does not exist yet, so its route is not installed. 405 or 501 answers, answers that are
+    not JSON and answers without either field do not expose the route state.
+
+    Args:
+        response: requests Response object of a GET on the flow resource (None on error)
+        route_field (str): Field holding the installed route
+        status_field (str): Field holding the flow status
+        ready_states (tuple): Lowercase statuses of an installed route
+
+    Returns:
+        bool: True if the route is installed, False if not yet (or the request failed),
+              None if the response does not expose the route state
+    """
+    if response is None:
+        return False
+    if response.status_code in PROBE_UNSUPPORTED_STATUSES:
+        return None
+    if response.status_code != 200:
+        return False
+    try:
+        flow = response.json()
+    except Exception:
+        return None
+    if isinstance(flow, dict) and isinstance(flow.get('flow'), dict):
+        flow = flow['flow']
+    if not isinstance(flow, dict) or (route_field not in flow and status_field not in flow):
+        return None
+    return bool(flow.get(route_field)) or str(flow.get(status_field, '')).lower() in ready_states
+
+
+def is_route_installed(response) -> bool:
+    """
+    Check whether a flow resource response reports an installed route.
+
+    Args:
+        response: requests Response object of a GET on the flow resource
+
+    Returns:
+        bool: True if the route is installed
+    """
+    return route_status(response) is True
+
+
+def readiness_fields() -> tuple:
+    """Route field, status field and ready states of the probe, with the environment overrides"""
+    route_field = os.environ.get(NCS_ROUTE_FIELD_ENV, "").strip() or ROUTE_FIELD
+    status_field = os.environ.get(NCS_STATUS_FIELD_ENV, "").strip() or STATUS_FIELD
+    states = [state.strip().lower() for state in os.environ.get(NCS_READY_STATES_ENV, "").split(",") if state.strip()]
+    return route_field, status_field, tuple(states) or ROUTE_READY_STATES
+
+
+class NCSClient:
+    """
+    Pooled client for the flow routes of the Network Control Stack API.
+
+    All requests share a keep-alive session, so consecutive requests reuse connections
+    instead of opening a new one each time. Multi-flow changes are fanned out concurrently,
+    so adding or removing N flows costs roughly one round trip. Requests have connect/read
+    timeouts and are retried on connection errors, and the latency of every request is
+    recorded in a per-method histogram. Read errors and 502/503/504 responses are only
+    retried for the idempotent GET and DELETE requests: a POST may have reached NCS before
+    the failure, and sending it again could create the flow twice.
+    """
+
+    def __init__(
+        self,
+        location: str,
+        pool_size: int = NCS_POOL_SIZE,
+        connect_timeout: float = NCS_CONNECT_TIMEOUT,
+        read_timeout: float = NCS_READ_TIMEOUT,
+        max_retries: int = NCS_MAX_RETRIES,
+        backoff_factor: float = NCS_BACKOFF_FACTOR,
+        readiness: tuple = None
+    ):
+        """
+        Args:
+            location (str): Base URL of the NCS API (e.g. NCS_API_LOCATION)
+            pool_size (int): Maximum keep-alive connections and concurrent requests
+            connect_timeout (float): Seconds to establish a connection
+            read_timeout (float): Seconds to wait for a response
+            max_retries (int): Retries on connection errors, and on read errors and 502/503/504
+                               responses for GET and DELETE requests
+            backoff_factor (float): Exponential backoff factor between retries
+            readiness (tuple): (route_field, status_field, ready_states) read by the readiness
+                               probe (defaults to readiness_fields())
+        """
+        # Imported on first client, so that importing the module (e.g. for LatencyHistogram) stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.location = location.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Connection errors are retried for every method, read errors and statuses only for allowed_methods
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'DELETE']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='ncs')
+
+        self.latency = {method: LatencyHistogram() for method in ('GET', 'POST', 'DELETE')}
+        self.errors = {method: 0 for method in ('GET', 'POST', 'DELETE')}
+        self._errors_lock = threading.Lock()
+
+        # Route install latency observed by the readiness probe and fixed-delay fallbacks
+        self.route_install = LatencyHistogram()
+        self.route_install_fallbacks = 0
+        self.route_field, self.status_field, self.ready_states = readiness or readiness_fields()
+        # Cleared when the API turns out not to expose the route state, so later waits skip probing
+        self.probe_supported = True
+        self.unexposed_waits = 0
+
+    def flow_url(self, dst_ip: str) -> str:
+        """URL of the flow resource for a destination IP"""
+        return f"{self.location}/flows/{urllib.parse.quote(dst_ip, safe='')}"
+
+    def request(self, method: str, dst_ip: str):
+        """
+        Send a single request for the flow resource of a destination IP.
+
+        Args:
+            method (str): 'GET', 'POST' or 'DELETE'
+            dst_ip (str): Destination IP of the flow
+
+        Returns:
+            Response object, or None if the request failed
+        """
+        start = time.perf_counter()
+        with tracer.span(f"NCS {method}", "ncs", dst_ip=dst_ip) as span:
+            try:
+                response = self.session.request(method, self.flow_url(dst_ip), timeout=self.timeout)
+            except Exception as e:
+                self.latency[method].observe(time.perf_counter() - start)
+                with self._errors_lock:
+                    self.errors[method] += 1
+                logger.error(f"Error sending {method} request to NCS API for {dst_ip}: {e}")
+                span.set(error=str(e))
+                return None
+            span.set(status=response.status_code)
+
+        elapsed = time.perf_counter() - start
+        self.latency[method].observe(elapsed)
+        if response.status_code >= 500:
+            with self._errors_lock:
+                self.errors[method] += 1
+        logger.debug(f"{method} {dst_ip} -> {response.status_code} in {elapsed * 1000:.1f}ms")
+        return response
+
+    def route_status(self, response):
+        """Route state of a flow resource response with the fields of this client (see route_status)"""
+        return route_status(response, self.route_field, self.status_field, self.ready_states)
+
+    def post_flow(self, dst_ip: str):
+        """Request the route of a flow"""
+        return self.request('POST', dst_ip)
+
+    def delete_flow(self, dst_ip: str):
+        """Remove the route of a flow"""
+        return self.request('DELETE', dst_ip)
+
+    def post_flows(self, dst_ips: list) -> list:
+        """
+        Request the routes of several flows concurrently.
+
+        Args:
+            dst_ips (list): Destination IPs of the flows
+
+        Returns:
+            list: Response objects (or None on failure), in the same order as dst_ips
+        """
+        return self._fan_out('POST', dst_ips)
+
+    def delete_flows(self, dst_ips: list) -> list:
+        """
+        Remove the routes of several flows concurrently.
+
+        Args:
+            dst_ips (list): Destination IPs of the flows
+
+        Returns:
+            list: Response objects (or None on failure), in the same order as dst_ips
+        """
+        return self._fan_out('DELETE', dst_ips)
+
+    @tracer.traced("wait for routes", "ncs")
+    def wait_for_routes(
+        self,
+        dst_ips: list,
+        since: float,
+        fallback_delay: float,
+        timeout: float = NCS_READINESS_TIMEOUT,
+        stop_event: threading.Event = None,
+        initial_backoff: float = NCS_PROBE_INITIAL_BACKOFF,
+        max_backoff: float = NCS_PROBE_MAX_BACKOFF,
+        on_installed=None
+    ) -> bool:
+        """
+        Wait until the routes of several flows are reported installed.
+
+        The flow resources are polled concurrently with exponential backoff until every route
+        is installed. A 404 means the flow resource has not been created yet and is polled
+        again. If the routes are not reported installed within the timeout, it falls back to
+        waiting until fallback_delay seconds have passed since the POST requests. While no
+        answer exposes the route state (see route_status), polling stops at fallback_delay.
+        The probe is disabled for the rest of the run, and later waits go straight to the
+        fixed delay, when the API answers 405/501 or after NCS_PROBE_MAX_UNEXPOSED
+        consecutive waits without route state in any answer.
+
+        Args:
+            dst_ips (list): Destination IPs of the flows
+            since (float): time.monotonic() value taken when the POST requests were sent
+            fallback_delay (float): Fixed delay in seconds after the POST requests
+            timeout (float): Maximum seconds since the POST requests to wait for readiness
+            stop_event (threading.Event): Event that aborts the wait when set
+            initial_backoff (float): Seconds between the first probes
+            max_backoff (float): Maximum seconds between probes
+            on_installed (callable): Called with (dst_ip, seconds since the POST requests) when
+                                     the route of a flow is reported installed
+
+        Returns:
+            bool: True if the routes were reported installed, False on fallback or stop
+        """
+        stop_event = stop_event if stop_event is not None else threading.Event()
+        pending = list(dst_ips)
+        backoff = initial_backoff
+        probed = exposed = False
+
+        while pending and self.probe_supported:
+            # Without route state in the answers, probing does not extend the fixed delay
+            limit = timeout if exposed else min(timeout, fallback_delay)
+            if probed and time.monotonic() - since >= limit:
+                break
+
+            responses = self._fan_out('GET', pending)
+            probed = True
+            unsupported = [response.status_code for response in responses
+                           if response is not None and response.status_code in PROBE_UNSUPPORTED_STATUSES]
+            if unsupported:
+                logger.info(f"NCS API answers {unsupported[0]} to flow GETs, using the fixed delay from now on")
+                self.probe_supported = False
+                break
+            states = [self.route_status(response) for response in responses]
+            exposed = exposed or any(state is not None for state in states)
+
+            now = time.monotonic()
+            still_pending = []
+            for dst_ip, state in zip(pending, states):
+                if state:
+                    self.route_install.observe(now - since)
+                    if on_installed is not None:
+                        on_installed(dst_ip, now - since)
+                    logger.debug(f"Route for {dst_ip} installed after {(now - since) * 1000:.0f}ms")
+                else:
+                    still_pending.append(dst_ip)
+            pending = still_pending
+
+            limit = timeout if exposed else min(timeout, fallback_delay)
+            if pending and stop_event.wait(min(backoff, max(0.0, limit - (time.monotonic() - since)))):
+                return False
+            backoff = min(backoff * 2, max_backoff)
+
+        if exposed:
+            self.unexposed_waits = 0
+        elif probed and self.probe_supported:
+            self.unexposed_waits += 1
+            if self.unexposed_waits >= NCS_PROBE_MAX_UNEXPOSED:
+                logger.info(f"NCS API did not expose the '{self.route_field}'/'{self.status_field}' fields of flows "
+                            f"in {self.unexposed_waits} waits, using the fixed delay from now on")
+                self.probe_supported = False
+
+        if not pending:
+            return True
+
+        # Fall back to the fixed delay after the POST requests
+        with self._errors_lock:
+            self.route_install_fallbacks += 1
+        if exposed:
+            logger.warning(f"Routes not reported installed after {timeout}s for {pending}, starting anyway")
+        else:
+            logger.debug(f"NCS API does not expose flow status, waiting fixed delay of {fallback_delay}s")
+        remaining = fallback_delay - (time.monotonic() - since)
+        if remaining > 0:
+            stop_event.wait(remaining)
+        return False
+
+    def _fan_out(self, method: str, dst_ips: list) -> list:
+        if len(dst_ips) <= 1:
+            return [self.request(method, dst_ip) for dst_ip in dst_ips]
+        return list(self.executor.map(lambda dst_ip: self.request(method, dst_ip), dst_ips))
+
+    def log_latency_summary(self):
+        """Log request count, errors and latency percentiles per method"""
+        for method, histogram in self.latency.items():
+            if histogram.count == 0:
+                continue
+            logger.info(f"NCS {method} requests: {histogram.count}, errors: {self.errors[method]}, "
+                        f"mean={histogram.sum / histogram.count * 1000:.1f}ms, "
+                        f"p50<={histogram.percentile(0.50) * 1000:.0f}ms, "
+                        f"p95<={histogram.percentile(0.95) * 1000:.0f}ms, "
+                        f"max={histogram.max * 1000:.1f}ms")
+
+        if self.route_install.count or self.route_install_fallbacks:
+            histogram = self.route_install
+            mean = histogram.sum / histogram.count * 1000 if histogram.count else 0.0
+            logger.info(f"NCS route install latency: {histogram.count} routes, "
+                        f"{self.route_install_fallbacks} fixed-delay fallbacks, mean={mean:.1f}ms, "
+                        f"p50<={histogram.percentile(0.50) * 1000:.0f}ms, "
+                        f"p95<={histogram.percentile(0.95) * 1000:.0f}ms, "
+                        f"max={histogram.max * 1000:.1f}ms")
+
+    def close(self):
+        """Release pooled connections and worker threads"""
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+# Shared clients, one per NCS API location
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_ncs_client(location: str) -> NCSClient:
+    """
+    Return the shared NCS client for an API location, creating it on first use.
+
+    Args:
+        location (str): Base URL of the NCS API
+
+    Returns:
+        NCSClient: Client shared by every caller using the same location
+    """
+    with _clients_lock:
+        if location not in _clients:
+            _clients[location] = NCSClient(location)
+        return _clients[location]
+
+
+def get_ncs_clients() -> list:
+    """Return the shared NCS clients created so far"""
+    with _clients_lock:
+        return list(_clients.values())
@@ -0,0 +1,93 @@
+import os
+import json
+import hashlib
+import logging
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Local cache mapping the hash of each pushed configuration to the hash of the
+# configuration reported back by the generator (which adds default values)
+CONFIG_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".otg_config_cache.json")
+
+
+def config_hash(config) -> str:
+    """
+    Hash the canonical serialization of an OTG configuration.
+
+    Args:
+        config: snappi Config object
+
+    Returns:
+        str: SHA-256 hex digest of the configuration with sorted keys and no whitespace
+    """
+    canonical = json.dumps(json.loads(config.serialize()), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CONFIG_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict, max_entries: int = 64):
+    # Keep only the most recent entries
+    for key in list(cache)[:-max_entries]:
+        del cache[key]
+    try:
+        with open(CONFIG_CACHE_FILE, 'w') as f:
+            json.dump(cache, f, indent=4)
+    except OSError as e:
+        logger.warning(f"Could not save OTG config cache: {e}")
+
+
+def push_config(api, cfg, location: str = "", force: bool = False) -> bool:
+    """
+    Push a configuration to OTG unless the generator already holds it.
+
+    The configuration is serialized and hashed, and compared with the configuration
+    currently held by the generator (api.get_config()). Since the generator reports its
+    configuration with default values filled in, the hash it reported right after the last
+    push of the same configuration is also accepted as a match. When both match, set_config
+    is skipped, so ports and protocol state are not reset and startup takes a single request.
+    Note that flow counters are not reset when the push is skipped.
+
+    Args:
+        api: Snappi API object
+        cfg: snappi Config object to push
+        location (str): OTG API location, used to keep cache entries per generator
+        force (bool): Always push the configuration
+
+    Returns:
+        bool: True if the configuration was pushed, False if the push was skipped
+    """
+    desired_hash = config_hash(cfg)
+    cache = _load_cache()
+    cache_key = f"{location}#{desired_hash}"
+
+    if not force:
+        try:
+            current_hash = config_hash(api.get_config())
+        except Exception as e:
+            logger.debug(f"Could not get current OTG configuration: {e}")
+            current_hash = None
+
+        if current_hash is not None and current_hash in (desired_hash, cache.get(cache_key)):
+            logger.info(f"OTG already holds configuration {desired_hash[:12]}, skipping set_config")
+            return False
+
+    api.set_config(cfg)
+    logger.info(f"Pushed OTG configuration {desired_hash[:12]}")
+
+    # Remember how the generator reports this configuration for the next warm start
+    try:
+        cache.pop(cache_key, None)
+        cache[cache_key] = config_hash(api.get_config())
+        _save_cache(cache)
+    except Exception as e:
+        logger.debug(f"Could not record pushed OTG configuration: {e}")
+
+    return True
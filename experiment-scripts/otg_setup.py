@@ -0,0 +1,113 @@
+from flow_groups import group_start_addresses, group_flow_name, expand_flow_name, DEFAULT_DST_STEP
+
+# Flow definitions whose tests use a single flow towards DST_IP
+SINGLE_FLOW_DEFINITIONS = ('sequential_rate_test', 'repeated_fixed_rate_test')
+
+
+def create_base_config(api, r1_mac: str, r2_mac: str, r1_ip: str, r2_ip: str,
+                       r1_gateway: str, r2_gateway: str, ip_prefix: int) -> tuple:
+    """
+    Create the OTG configuration shared by every experiment: tx/rx ports and one IPv6 device per port.
+
+    Args:
+        api: Snappi API object
+        r1_mac (str): MAC address of the device behind the tx port
+        r2_mac (str): MAC address of the device behind the rx port
+        r1_ip (str): IPv6 address of the tx device
+        r2_ip (str): IPv6 address of the rx device
+        r1_gateway (str): IPv6 gateway of the tx device
+        r2_gateway (str): IPv6 gateway of the rx device
+        ip_prefix (int): IPv6 prefix length of both devices
+
+    Returns:
+        tuple: (cfg, r1Ip, r2Ip) with the configuration and the tx/rx IPv6 objects used as flow endpoints
+    """
+    cfg = api.config()
+
+    # Add tx and rx ports to the configuration
+    ptx = cfg.ports.add(name="ptx", location="eth1")
+    prx = cfg.ports.add(name="prx", location="eth2")
+
+    # Add two devices to the configuration and set their MAC addresses
+    r1 = cfg.devices.add(name="r1")
+    r2 = cfg.devices.add(name="r2")
+
+    r1Eth = r1.ethernets.add(name="r1Eth")
+    r1Eth.mac = r1_mac
+
+    r2Eth = r2.ethernets.add(name="r2Eth")
+    r2Eth.mac = r2_mac
+
+    # Set connection of each device to the corresponding test port
+    r1Eth.connection.port_name = ptx.name
+    r2Eth.connection.port_name = prx.name
+
+    # Add IPv6 addresses to each device
+    r1Ip = r1Eth.ipv6_addresses.add(name="r1Ip", address=r1_ip, gateway=r1_gateway, prefix=ip_prefix)
+    r2Ip = r2Eth.ipv6_addresses.add(name="r2Ip", address=r2_ip, gateway=r2_gateway, prefix=ip_prefix)
+
+    return cfg, r1Ip, r2Ip
+
+
+def get_configured_flows(cfg) -> list:
+    """
+    Get information about configured flows.
+
+    Args:
+        cfg: snappi Config object
+
+    Returns:
+        list: Dicts with the 'name', 'rate', 'dst_ip' and 'dst_ips' of every flow
+    """
+    flows = []
+    for flow in cfg.flows:
+        # Get IPv6 destination from the flow name since packet fields are not accessible
+        # after flow creation. Grouped flows (scale mode) carry several destinations.
+        flow_dst_ips = expand_flow_name(flow.name)
+        flows.append({
+            'name': flow.name,
+            'rate': flow.rate.mbps,
+            'dst_ip': flow_dst_ips[0],
+            'dst_ips': flow_dst_ips
+        })
+    return flows
+
+
+def define_flows(cfg, define_flow, flow_definition_type: str, tx, rx, packet_size: int, flow_rate: float,
+                 src_ip: str, dst_ips: list, dst_ip: str, src_mac: str, dst_mac: str,
+                 scale_mode: bool = False, scale_flow_count: int = 10, sessions_per_flow: int = 100,
+                 dst_step: str = DEFAULT_DST_STEP):
+    """
+    Create the flows of an experiment via the define_flow function of its flow definition.
+
+    Sequential and repeated tests use a single flow towards dst_ip. In scale mode, scale_flow_count
+    flows of sessions_per_flow consecutive destinations each are created starting at dst_ips[0].
+    Otherwise one flow is created per destination in dst_ips.
+
+    Args:
+        cfg: snappi Config object
+        define_flow (callable): define_flow function of the flow definition module
+        flow_definition_type (str): Name of the flow definition module
+        tx: Transmitting IPv6 object
+        rx: Receiving IPv6 object
+        packet_size (int): Packet size in bytes
+        flow_rate (float): Flow rate in Mbps (per destination in scale mode)
+        src_ip (str): Source IPv6 address
+        dst_ips (list): Destination IPv6 addresses
+        dst_ip (str): Destination IPv6 address of single flow tests
+        src_mac (str): Source MAC address
+        dst_mac (str): Destination MAC address
+        scale_mode (bool): Group destinations into flow objects
+        scale_flow_count (int): Number of flow objects in scale mode
+        sessions_per_flow (int): Destinations per flow object in scale mode
+        dst_step (str): Increment between consecutive destinations in scale mode, as an address
+    """
+    if flow_definition_type in SINGLE_FLOW_DEFINITIONS:
+        define_flow(cfg, f"flow_{dst_ip}", tx, rx, packet_size, flow_rate, src_ip, dst_ip, src_mac, dst_mac)
+    elif scale_mode:
+        for start_ip in group_start_addresses(dst_ips[0], scale_flow_count, sessions_per_flow, dst_step):
+            define_flow(cfg, group_flow_name(start_ip, sessions_per_flow, dst_step), tx, rx, packet_size, flow_rate,
+                        src_ip, start_ip, src_mac, dst_mac, dst_count=sessions_per_flow, dst_step=dst_step)
+    else:
+        for flow_dst_ip in dst_ips:
+            define_flow(cfg, f"flow_{flow_dst_ip}", tx, rx, packet_size, flow_rate, src_ip, flow_dst_ip, src_mac, dst_mac)
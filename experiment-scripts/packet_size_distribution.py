@@ -0,0 +1,153 @@
+import json
+import math
+
+# Default error bounds of the encoder
+MAX_MEAN_ERROR = 0.001          # Relative error on the mean packet size (and thus byte/frame rate)
+MAX_DISTRIBUTION_ERROR = 0.02   # Mean size displacement of the packets, relative to the mean size
+SPIKE_WEIGHT = 0.02             # Sizes holding at least this fraction of packets keep their own pair
+
+
+def _normalize(weighted_sizes: list) -> tuple:
+    """Merge duplicated sizes and return (sizes, probabilities, total_weight) sorted by size"""
+    weights = {}
+    for pair in weighted_sizes:
+        weights[int(pair["size"])] = weights.get(int(pair["size"]), 0.0) + float(pair["weight"])
+
+    total_weight = sum(weights.values())
+    if total_weight <= 0:
+        raise ValueError("Packet size distribution must have a positive total weight")
+
+    sizes = sorted(size for size, weight in weights.items() if weight > 0)
+    probabilities = [weights[size] / total_weight for size in sizes]
+    return sizes, probabilities, total_weight
+
+
+def _bin_atoms(sizes: list, probabilities: list, bin_count: int, spike_weight: float) -> list:
+    """
+    Group sizes into equal-width histogram bins, keeping spikes as their own bins.
+
+    Returns:
+        list: Bins as lists of indexes into sizes
+    """
+    bins = {}
+    width = (sizes[-1] - sizes[0] + 1) / bin_count
+    for i, (size, probability) in enumerate(zip(sizes, probabilities)):
+        key = ('spike', size) if probability >= spike_weight else ('bin', int((size - sizes[0]) / width))
+        bins.setdefault(key, []).append(i)
+    return list(bins.values())
+
+
+def _encode_bins(sizes: list, probabilities: list, bins: list) -> tuple:
+    """
+    Represent every bin by its mass-weighted mean size, rounded with error diffusion.
+
+    Returns:
+        tuple: (pairs as (size, probability) sorted by size, distribution error in bytes)
+    """
+    representatives = []
+    displacement = 0.0
+    for indexes in bins:
+        mass = sum(probabilities[i] for i in indexes)
+        mean = sum(sizes[i] * probabilities[i] for i in indexes) / mass
+        displacement += sum(probabilities[i] * abs(sizes[i] - mean) for i in indexes)
+        representatives.append((mean, mass))
+
+    # Diffuse rounding residuals so the overall mean stays as close as possible
+    pairs = {}
+    residual = 0.0
+    for mean, mass in sorted(representatives):
+        size = min(max(int(round(mean + residual / mass)), math.floor(mean)), math.ceil(mean))
+        residual += (mean - size) * mass
+        displacement += abs(mean - size) * mass
+        pairs[size] = pairs.get(size, 0.0) + mass
+
+    return sorted(pairs.items()), displacement
+
+
+def encode_size_distribution(
+    weighted_sizes: list,
+    max_mean_error: float = MAX_MEAN_ERROR,
+    max_distribution_error: float = MAX_DISTRIBUTION_ERROR,
+    spike_weight: float = SPIKE_WEIGHT
+) -> tuple:
+    """
+    Encode a packet size mix into the smallest set of OTG weight pairs within error bounds.
+
+    Sizes are grouped with equal-width histogram binning (sizes holding at least spike_weight
+    of the packets keep their own pair) and every bin is represented by its mass-weighted
+    mean size. The smallest number of bins that keeps both the relative error on the mean
+    packet size and the relative size displacement of the packets (an upper bound of the
+    Wasserstein distance between both distributions) within bounds is selected.
+
+    With a rate given in Mbps the byte rate is fixed by OTG, so the mean size error turns
+    into the same relative error on the frame rate; with a rate given in packets per second
+    it turns into the same relative error on the byte rate.
+
+    Args:
+        weighted_sizes (list): Dicts with 'size' (bytes) and 'weight' keys
+        max_mean_error (float): Maximum relative error on the mean packet size
+        max_distribution_error (float): Maximum mean size displacement, relative to the mean size
+        spike_weight (float): Fraction of packets above which a size keeps its own pair
+
+    Returns:
+        tuple: (encoded list of {'size', 'weight'} dicts using the input weight scale, report dict)
+    """
+    sizes, probabilities, total_weight = _normalize(weighted_sizes)
+    mean_size = sum(size * probability for size, probability in zip(sizes, probabilities))
+
+    def evaluate(bin_count):
+        pairs, displacement = _encode_bins(sizes, probabilities, _bin_atoms(sizes, probabilities, bin_count, spike_weight))
+        encoded_mean = sum(size * probability for size, probability in pairs)
+        mean_error = abs(encoded_mean - mean_size) / mean_size
+        distribution_error = displacement / mean_size
+        return pairs, encoded_mean, mean_error, distribution_error
+
+    def within_bounds(result):
+        return result[2] <= max_mean_error and result[3] <= max_distribution_error
+
+    # Exponential search followed by a binary search on the number of histogram bins
+    max_bins = sizes[-1] - sizes[0] + 1
+    low, high = 1, 1
+    result = evaluate(high)
+    while not within_bounds(result) and high < max_bins:
+        low, high = high + 1, min(high * 2, max_bins)
+        result = evaluate(high)
+
+    best = result
+    while low < high:
+        middle = (low + high) // 2
+        candidate = evaluate(middle)
+        if within_bounds(candidate):
+            best, high = candidate, middle
+        else:
+            low = middle + 1
+
+    pairs, encoded_mean, mean_error, distribution_error = best
+    encoded = [{"size": size, "weight": probability * total_weight} for size, probability in pairs]
+
+    original_bytes = len(json.dumps([{"size": int(p["size"]), "weight": float(p["weight"])} for p in weighted_sizes]))
+    encoded_bytes = len(json.dumps(encoded))
+
+    report = {
+        'pairs_in': len(weighted_sizes),
+        'pairs_out': len(encoded),
+        'mean_size_in': mean_size,
+        'mean_size_out': encoded_mean,
+        'mean_size_error': mean_error,
+        'rate_error': mean_error,
+        'distribution_error': distribution_error,
+        'config_bytes_in': original_bytes,
+        'config_bytes_out': encoded_bytes,
+        'config_bytes_saved': original_bytes - encoded_bytes
+    }
+    return encoded, report
+
+
+def format_report(report: dict) -> str:
+    """Human readable summary of an encoder report"""
+    return (f"Packet size distribution encoded from {report['pairs_in']} to {report['pairs_out']} weight pairs "
+            f"(mean size {report['mean_size_in']:.2f} -> {report['mean_size_out']:.2f} bytes, "
+            f"mean/rate error {report['mean_size_error'] * 100:.3f}%, "
+            f"distribution error {report['distribution_error'] * 100:.2f}%, "
+            f"config {report['config_bytes_in']:,} -> {report['config_bytes_out']:,} bytes per flow, "
+            f"{report['config_bytes_saved']:,} bytes saved)")
@@ -0,0 +1,280 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import logging
+import contextlib
+from datetime import datetime
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Environment variable enabling the profiling hooks: "1" writes the profiles next to the
+# outputs of the script, any other value is taken as the directory of the profiles
+PROFILE_ENV = "EXPERIMENT_PROFILE"
+
+# Values of PROFILE_ENV that enable profiling without setting the directory
+ENABLED_VALUES = ("1", "true", "yes", "on")
+
+# Frames kept per traced allocation and allocation sites reported per phase
+TRACEMALLOC_FRAMES = 1
+TOP_ALLOCATIONS = 5
+
+# Only one cProfile profiler can be active in the process (Python >= 3.12 refuses a second
+# one), so phases overlapping a profiled phase of another thread are only timed
+_profile_lock = threading.Lock()
+_profile_owner = None
+_local = threading.local()
+
+# Allocations of the instrumentation itself, left out of the snapshots
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, contextlib.__file__)
+]
+
+# Files of the instrumentation, never reported as the top function of a phase
+INTERNAL_FILES = (__file__, contextlib.__file__)
+
+
+def profiling_requested() -> bool:
+    """True if the profiling hooks are enabled by the environment"""
+    return os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class _PhaseStats:
+    """Accumulated measurements of one phase"""
+
+    def __init__(self):
+        self.calls = 0
+        self.profiled_calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.memory = 0
+        self.profile = cProfile.Profile()
+        self.allocations = []
+        self.snapshot = None
+
+
+class PhaseProfiler:
+    """
+    Per-phase cProfile and tracemalloc instrumentation of a script.
+
+    Every phase (listing, fetch, parse, write, bucketing, ...) has its own cProfile profiler,
+    enabled only while the phase runs, so the raw .prof file of a phase holds just the calls
+    made in it. Wall time, CPU time of the running thread and traced memory growth are
+    accumulated over all the calls of a phase, and the allocation sites of the first call are
+    taken from the difference of two tracemalloc snapshots. Nested phases pause the profiler
+    of the enclosing phase of the same thread.
+    """
+
+    def __init__(self, name: str, output_dir: str = "."):
+        """
+        Args:
+            name (str): Name of the instrumented script, used as prefix of the output files
+            output_dir (str): Directory of the summary and .prof files
+        """
+        self.name = name
+        self.output_dir = output_dir
+        self.started = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.current = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def _stats(self, phase: str) -> _PhaseStats:
+        with self.lock:
+            if phase not in self.phases:
+                self.phases[phase] = _PhaseStats()
+            return self.phases[phase]
+
+    def _enter(self, stats: _PhaseStats) -> bool:
+        """Pause the enclosing phase of this thread and profile this one if possible"""
+        global _profile_owner
+        stack = _local.__dict__.setdefault('stack', [])
+        if stack and stack[-1] is not None:
+            stack[-1].disable()
+        with _profile_lock:
+            profiled = _profile_owner in (None, threading.get_ident())
+            if profiled:
+                _profile_owner = threading.get_ident()
+        stack.append(stats.profile if profiled else None)
+        return profiled
+
+    def _exit(self, profiled: bool):
+        """Resume the enclosing phase of this thread, or release the process profiler"""
+        global _profile_owner
+        stack = _local.stack
+        stack.pop()
+        if stack and stack[-1] is not None:
+            stack[-1].enable()
+        elif profiled and not stack:
+            with _profile_lock:
+                _profile_owner = None
+
+    @contextlib.contextmanager
+    def phase(self, phase: str):
+        """
+        Measure a block as one call of a phase.
+
+        Args:
+            phase (str): Phase name (e.g. "fetch")
+        """
+        stats = self._stats(phase)
+        first = stats.snapshot is None and stats.calls == 0
+        before = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS) if first else None
+        memory = tracemalloc.get_traced_memory()[0]
+        profiled = self._enter(stats)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        if profiled:
+            stats.profile.enable()
+        try:
+            yield
+        finally:
+            if profiled:
+                stats.profile.disable()
+            cpu = time.thread_time() - cpu
+            wall = time.perf_counter() - wall
+            self._exit(profiled)
+            growth = tracemalloc.get_traced_memory()[0] - memory
+            with self.lock:
+                stats.calls += 1
+                stats.profiled_calls += profiled
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.memory += growth
+            if before is not None:
+                stats.snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+                stats.allocations = stats.snapshot.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+
+    def mark(self, phase: str = None):
+        """
+        End the phase started by the previous mark and start a new one.
+
+        Meant for scripts made of consecutive top-level sections, where wrapping every
+        section in a with block is not practical. mark() without phase ends the last one.
+
+        Args:
+            phase (str): Phase started (None to only end the current one)
+        """
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+            self.current = None
+        if phase is not None:
+            self.current = self.phase(phase)
+            self.current.__enter__()
+
+    def iterate(self, phase: str, iterable):
+        """
+        Iterate measuring the production of every item as a call of a phase.
+
+        Used for lazy iterables such as the S3 paginators, whose requests happen while
+        iterating, without measuring the processing of the items.
+
+        Args:
+            phase (str): Phase name (e.g. "listing")
+            iterable: Iterable to measure
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def summary(self) -> str:
+        """Table of the measurements of every phase, followed by their top allocation sites"""
+        lines = [f"{'Phase':<16} {'calls':>8} {'wall s':>10} {'cpu s':>10} {'mem MiB':>9}  top function (cumulative)"]
+        details = []
+        for phase, stats in self.phases.items():
+            top = ""
+            if stats.profiled_calls:
+                profile = pstats.Stats(stats.profile, stream=io.StringIO())
+                functions = sorted(((value[3], function) for function, value in profile.stats.items()
+                                    if function[0] not in INTERNAL_FILES), reverse=True)
+                if functions:
+                    cumulative, (filename, line, function) = functions[0]
+                    location = function if filename == '~' else f"{os.path.basename(filename)}:{line}({function})"
+                    top = f"{location} {cumulative:.3f}s"
+            lines.append(f"{phase:<16} {stats.calls:>8} {stats.wall:>10.3f} {stats.cpu:>10.3f} "
+                         f"{stats.memory / 2**20:>9.2f}  {top}")
+            if stats.allocations:
+                details.append(f"Top allocations of the first {phase} call:")
+                details.extend(f"  {allocation}" for allocation in stats.allocations)
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"Traced memory: {current / 2**20:.2f} MiB, peak {peak / 2**20:.2f} MiB")
+        return "\n".join(lines + details)
+
+    def save(self) -> list:
+        """
+        Write the summary table, one .prof file per profiled phase (readable with pstats or
+        snakeviz) and one tracemalloc snapshot per phase (tracemalloc.Snapshot.load).
+
+        Returns:
+            list: Paths of the written files
+        """
+        self.mark()
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}_profile_{self.started}")
+        paths = []
+        for phase, stats in self.phases.items():
+            if stats.profiled_calls:
+                stats.profile.dump_stats(f"{prefix}.{phase}.prof")
+                paths.append(f"{prefix}.{phase}.prof")
+            if stats.snapshot is not None:
+                stats.snapshot.dump(f"{prefix}.{phase}.tracemalloc")
+                paths.append(f"{prefix}.{phase}.tracemalloc")
+
+        summary = self.summary()
+        with open(f"{prefix}.txt", 'w') as f:
+            f.write(summary + "\n")
+        paths.append(f"{prefix}.txt")
+        logger.info(f"Profile of {self.name}:\n{summary}")
+        logger.info(f"Profile saved to: {prefix}.*")
+        return paths
+
+
+class _DisabledProfiler:
+    """Stand-in of PhaseProfiler when profiling is off, adding no overhead to the phases"""
+
+    def phase(self, phase: str):
+        return contextlib.nullcontext()
+
+    def mark(self, phase: str = None):
+        pass
+
+    def iterate(self, phase: str, iterable):
+        return iterable
+
+    def save(self) -> list:
+        return []
+
+
+def get_profiler(name: str, output_dir: str = ".", enabled: bool = None):
+    """
+    Profiler of a script, or a no-op stand-in if profiling is disabled.
+
+    Args:
+        name (str): Name of the instrumented script
+        output_dir (str): Directory of the outputs of the script, where the profiles are
+                          written unless PROFILE_ENV holds another directory
+        enabled (bool): Enable profiling, e.g. from a --profile flag (defaults to PROFILE_ENV)
+
+    Returns:
+        PhaseProfiler: Profiler with phase(), mark(), iterate() and save()
+    """
+    requested = profiling_requested()
+    if not (enabled or requested):
+        return _DisabledProfiler()
+    value = os.environ.get(PROFILE_ENV, "").strip()
+    if requested and value.lower() not in ENABLED_VALUES:
+        output_dir = value
+    logger.info(f"Profiling {name}, profiles written to {output_dir}")
+    return PhaseProfiler(name, output_dir)
@@ -0,0 +1,353 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import logging
+import threading
+
+
+#########################################################################
+# Parse command line arguments
+
+parser = argparse.ArgumentParser(description='Headless IXIA experiment runner')
+parser.add_argument('specs', nargs='+', help='Experiment spec files (YAML or JSON), run in the given order')
+parser.add_argument('-c', '--config', default='b5g',
+                    help="Configuration module of the 'config' package (default: b5g)")
+parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+parser.add_argument('-f', '--force-config', action='store_true',
+                    help='Always push the OTG configuration, even if the generator already holds it')
+parser.add_argument('--check', action='store_true', help='Only validate the experiment specs')
+parser.add_argument('--profile', action='store_true',
+                    help='Profile the NCS and OTG calls of the variation threads (same as EXPERIMENT_PROFILE=1)')
+parser.add_argument('--trace', action='store_true',
+                    help='Save a Chrome trace of every experiment to results/ (same as EXPERIMENT_TRACE=1)')
+parser.add_argument('--metrics-port', type=int, default=None,
+                    help='Serve Prometheus metrics on http://0.0.0.0:<port>/metrics (same as EXPERIMENT_METRICS_PORT)')
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+#########################################################################
+# Experiment spec
+
+# Flow definition modules available in the 'flow_definitions' package
+FLOW_DEFINITIONS = (
+    'fixed_packet_size_fixed_rate_mbps_continuous',
+    'fixed_packet_size_fixed_rate_mbps_interval',
+    'sequential_rate_test',
+    'repeated_fixed_rate_test'
+)
+
+# Spec keys and their default values (same meaning as the editable variables of ixia_GUI.py)
+SPEC_DEFAULTS = {
+    'name': None,                       # Experiment name, for the logs
+    'flow_definition': 'fixed_packet_size_fixed_rate_mbps_interval',
+    'packet_size': 669,                 # Bytes
+    'flow_rate': 21,                    # Mbps per flow (per session in scale mode)
+    'ncs_to_flow_delay': 2,             # Seconds between NCS request and flow start
+    'readiness_probe': True,            # Start flows as soon as NCS reports routes installed
+    'readiness_timeout': 10,            # Seconds
+    # Interval flow definition
+    'variation_interval': 60,           # Seconds between flow variations
+    'simultaneous_flows': None,         # Number of simultaneous flows at each interval step
+    'profile_latency': False,           # Record the route change latency profile
+    'record_flow_metrics': False,       # Save the flow metrics time series to results/flow_metrics_<timestamp>.csv
+    # Continuous flow definition
+    'duration': 60,                     # Seconds all flows are transmitted
+    # Scale mode (continuous and interval flow definitions)
+    'scale_mode': False,
+    'scale_flow_count': 10,
+    'sessions_per_flow': 100,
+    # Sequential and repeated rate tests
+    'rate_min': 210,
+    'rate_max': 70,
+    'rate_step': 1,
+    'flow_duration': 30,
+    # Queue
+    'pause_after': 0                    # Seconds to wait before the next experiment
+}
+
+
+def load_specs(path: str) -> list:
+    """
+    Load the experiments of a spec file.
+
+    A spec file holds a single experiment, a list of experiments, or a mapping with an
+    'experiments' list and optional 'defaults' applied to each of them. YAML files require
+    PyYAML, which is only imported for them.
+
+    Args:
+        path (str): Path of a .yaml/.yml or .json file
+
+    Returns:
+        list: Experiment dicts, not validated
+    """
+    with open(path) as f:
+        content = f.read()
+
+    if path.endswith(('.yaml', '.yml')):
+        import yaml
+        data = yaml.safe_load(content)
+    else:
+        data = json.loads(content)
+
+    if isinstance(data, dict) and 'experiments' in data:
+        defaults = data.get('defaults') or {}
+        return [{**defaults, **experiment} for experiment in data['experiments']]
+    if isinstance(data, list):
+        return data
+    return [data]
+
+
+def validate_spec(spec: dict, label: str) -> dict:
+    """
+    Check an experiment spec and fill in default values.
+
+    Args:
+        spec (dict): Experiment spec
+        label (str): Spec location used in error messages
+
+    Returns:
+        dict: Complete experiment spec
+
+    Raises:
+        ValueError: If the spec is not valid
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"{label}: experiment must be a mapping")
+
+    unknown = sorted(set(spec) - set(SPEC_DEFAULTS))
+    if unknown:
+        raise ValueError(f"{label}: unknown keys {unknown}")
+
+    spec = {**SPEC_DEFAULTS, **spec}
+    if spec['flow_definition'] not in FLOW_DEFINITIONS:
+        raise ValueError(f"{label}: unknown flow_definition '{spec['flow_definition']}', expected one of {FLOW_DEFINITIONS}")
+    if spec['flow_definition'] == 'fixed_packet_size_fixed_rate_mbps_interval':
+        if not spec['simultaneous_flows'] or not all(isinstance(n, int) and n >= 0 for n in spec['simultaneous_flows']):
+            raise ValueError(f"{label}: simultaneous_flows must be a non-empty list of flow counts")
+
+    spec['name'] = spec['name'] or label
+    return spec
+
+
+#########################################################################
+# Experiment execution
+
+class ExperimentRunner:
+    """
+    Run experiment specs against OTG and NCS without GUI.
+
+    Every experiment builds its own OTG configuration with the shared setup of ixia_GUI.py,
+    loads its flow definition module on demand and blocks until it has finished. Traffic is
+    stopped and routes are deleted after each experiment, whether it succeeded or not.
+    """
+
+    def __init__(self, config, force_config: bool = False):
+        """
+        Args:
+            config: Configuration module with the MAC/IP addresses and API locations
+            force_config (bool): Always push the OTG configuration
+        """
+        import snappi
+        import urllib3
+        from ncs_client import get_ncs_client
+
+        urllib3.disable_warnings()
+
+        self.config = config
+        self.force_config = force_config
+        self.api = snappi.api(location=config.IXIA_API_LOCATION)
+        self.ncs_client = get_ncs_client(config.NCS_API_LOCATION)
+        self.cs = self.api.control_state()
+        self.flows = []
+
+    def run(self, spec: dict):
+        """
+        Run one experiment until completion.
+
+        Args:
+            spec (dict): Validated experiment spec
+        """
+        from otg_config import push_config
+        from otg_setup import create_base_config, define_flows, get_configured_flows
+
+        config = self.config
+        flow_module = importlib.import_module(f"flow_definitions.{spec['flow_definition']}")
+
+        cfg, r1Ip, r2Ip = create_base_config(self.api, config.R1_MAC, config.R2_MAC, config.R1_IP, config.R2_IP,
+                                             config.R1_GATEWAY, config.R2_GATEWAY, config.IP_PREFIX)
+        define_flows(cfg, flow_module.define_flow, spec['flow_definition'], r1Ip, r2Ip, spec['packet_size'],
+                     spec['flow_rate'], config.SRC_IP, config.DST_IPS, config.DST_IP, config.SRC_MAC, config.DST_MAC,
+                     scale_mode=spec['scale_mode'], scale_flow_count=spec['scale_flow_count'],
+                     sessions_per_flow=spec['sessions_per_flow'])
+        push_config(self.api, cfg, config.IXIA_API_LOCATION, force=self.force_config)
+
+        self.flows = get_configured_flows(cfg)
+
+        recorder = None
+        if spec['record_flow_metrics']:
+            from flow_metrics_recorder import FlowMetricsRecorder
+            recorder = FlowMetricsRecorder()
+            recorder.start(self.api)
+
+        try:
+            if spec['flow_definition'] == 'fixed_packet_size_fixed_rate_mbps_interval':
+                self._run_interval(flow_module, cfg, spec)
+            elif spec['flow_definition'] == 'fixed_packet_size_fixed_rate_mbps_continuous':
+                self._run_continuous(spec)
+            else:
+                self._run_rate_test(flow_module, cfg, spec)
+        finally:
+            self.stop_all_flows()
+            if recorder is not None:
+                recorder.close()
+
+    def _wait_for_routes(self, dst_ips: list, requested_at: float, spec: dict):
+        """Wait until NCS reports the routes installed, or for the fixed delay"""
+        if spec['readiness_probe']:
+            self.ncs_client.wait_for_routes(dst_ips, requested_at, spec['ncs_to_flow_delay'],
+                                            timeout=spec['readiness_timeout'])
+        else:
+            time.sleep(max(0.0, spec['ncs_to_flow_delay'] - (time.monotonic() - requested_at)))
+
+    def _join(self, thread: threading.Thread, stop_event: threading.Event):
+        """Wait for a variation thread, stopping it on Ctrl+C"""
+        try:
+            while thread.is_alive():
+                thread.join(0.5)
+        except KeyboardInterrupt:
+            stop_event.set()
+            raise
+
+    def _run_interval(self, flow_module, cfg, spec: dict):
+        from minio_flow_uploader import create_initial_flows_file
+
+        initial_dst_ips = [ip for flow in self.flows[:spec['simultaneous_flows'][0]] for ip in flow['dst_ips']]
+
+        # The initial flows file is only uploaded once per session: queued experiments
+        # request their initial routes through the NCS API
+        upload = create_initial_flows_file(initial_dst_ips)
+        if upload is not None:
+            requested_at = upload.result(timeout=spec['readiness_timeout'])
+        else:
+            requested_at = time.monotonic()
+            self.ncs_client.post_flows(initial_dst_ips)
+        self._wait_for_routes(initial_dst_ips, requested_at, spec)
+
+        thread, stop_event = flow_module.variation_function(
+            self.api, cfg, self.config.NCS_API_LOCATION, spec['variation_interval'], spec['simultaneous_flows'],
+            ncs_lead_time=spec['ncs_to_flow_delay'], profile_latency=spec['profile_latency']
+        )
+        self._join(thread, stop_event)
+
+    def _run_continuous(self, spec: dict):
+        dst_ips = [ip for flow in self.flows for ip in flow['dst_ips']]
+        requested_at = time.monotonic()
+        self.ncs_client.post_flows(dst_ips)
+        self._wait_for_routes(dst_ips, requested_at, spec)
+
+        self.cs.traffic.flow_transmit.flow_names = []
+        self.cs.traffic.flow_transmit.state = self.cs.traffic.flow_transmit.START
+        self.api.set_control_state(self.cs)
+        logger.info(f"Started all flows for {spec['duration']}s")
+        time.sleep(spec['duration'])
+
+    def _run_rate_test(self, flow_module, cfg, spec: dict):
+        config = self.config
+        thread, stop_event = flow_module.variation_function(
+            self.api, cfg, config.NCS_API_LOCATION, spec['rate_min'], spec['rate_max'], spec['rate_step'],
+            spec['flow_duration'], spec['ncs_to_flow_delay'],
+            src_ip=config.SRC_IP, dst_ip=config.DST_IP, src_mac=config.SRC_MAC, dst_mac=config.DST_MAC,
+            packet_size=spec['packet_size'],
+            readiness_probe=spec['readiness_probe'], readiness_timeout=spec['readiness_timeout']
+        )
+        self._join(thread, stop_event)
+
+    def stop_all_flows(self):
+        """Stop all traffic and delete the routes of every configured flow"""
+        try:
+            self.cs.traffic.flow_transmit.flow_names = []
+            self.cs.traffic.flow_transmit.state = self.cs.traffic.flow_transmit.STOP
+            self.api.set_control_state(self.cs)
+        except Exception as e:
+            logger.error(f"Error stopping traffic: {e}")
+
+        dst_ips = [ip for flow in self.flows for ip in flow['dst_ips']]
+        for dst_ip, response in zip(dst_ips, self.ncs_client.delete_flows(dst_ips)):
+            if response is not None:
+                logger.debug(f"DELETE request sent to NCS API for flow (dst: {dst_ip}): {response.status_code}")
+        logger.info("Stopped all flows")
+
+
+def main() -> int:
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # Validate the whole queue before running anything, so an unattended run
+    # does not stop halfway because of a typo in a later spec
+    queue = []
+    for path in args.specs:
+        for i, spec in enumerate(load_specs(path)):
+            queue.append(validate_spec(spec, f"{os.path.basename(path)}[{i}]"))
+    logger.info(f"{len(queue)} experiments queued: {[spec['name'] for spec in queue]}")
+    if args.check:
+        return 0
+
+    if args.profile:
+        from profiling import PROFILE_ENV
+        os.environ.setdefault(PROFILE_ENV, "1")
+
+    from span_tracer import tracer, TRACE_RESULTS_DIR
+    if args.trace:
+        tracer.enable()
+
+    config = importlib.import_module(f"config.{args.config}")
+    runner = ExperimentRunner(config, force_config=args.force_config)
+
+    # The endpoint polls the flow metrics in its own thread, off the experiment threads
+    from metrics_endpoint import requested_port, start_metrics_server
+    metrics_port = requested_port(args.metrics_port)
+    if metrics_port is not None:
+        start_metrics_server(metrics_port, api=runner.api)
+
+    failed = []
+    for index, spec in enumerate(queue):
+        logger.info(f"========== Experiment {index + 1}/{len(queue)}: {spec['name']} ({spec['flow_definition']}) ==========")
+        started = time.monotonic()
+        tracer.clear()
+        try:
+            with tracer.span(spec['name'], "experiment", flow_definition=spec['flow_definition']):
+                runner.run(spec)
+            logger.info(f"Experiment {spec['name']} finished after {time.monotonic() - started:.1f}s")
+        except KeyboardInterrupt:
+            logger.info("Interrupted, stopping the experiment queue")
+            return 130
+        except Exception as e:
+            logger.exception(f"Experiment {spec['name']} failed: {e}")
+            failed.append(spec['name'])
+        finally:
+            if tracer.enabled:
+                tracer.save(os.path.join(TRACE_RESULTS_DIR, f"trace_{spec['name']}_{time.strftime('%Y%m%d_%H%M%S')}.json"))
+
+        if spec['pause_after'] and index < len(queue) - 1:
+            logger.info(f"Waiting {spec['pause_after']}s before the next experiment")
+            time.sleep(spec['pause_after'])
+
+    runner.ncs_client.log_latency_summary()
+    if failed:
+        logger.error(f"Failed experiments: {failed}")
+        return 1
+    logger.info("All experiments finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
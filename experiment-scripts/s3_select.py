@@ -0,0 +1,155 @@
+import os
+import json
+import logging
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Environment variable selecting how the aggregators read the ML outputs: "select" pushes the
+# projection to the server with S3 Select (full GETs if unavailable), "get" always downloads
+# the whole objects
+EXTRACTION_MODE_ENV = "S3_EXTRACTION_MODE"
+EXTRACTION_MODES = ("select", "get")
+
+# Fields of the ML outputs read by the aggregators, as (alias, path in the object)
+METRICS_FIELDS = (
+    ("experiment_id", "experiment_id"),
+    ("node_exporter", "node_exporter"),
+    ("metric_timestamp", "debug_params.metric_timestamp"),
+    ("collector_timestamp", "debug_params.collector_timestamp"),
+    ("process_timestamp", "debug_params.process_timestamp"),
+    ("ml_timestamp", "debug_params.ml_timestamp"),
+    ("epoch_timestamp", "epoch_timestamp"),
+    ("output_ml_metrics", "output_ml_metrics")
+)
+
+# S3 Select expression projecting METRICS_FIELDS
+METRICS_EXPRESSION = "SELECT " + ", ".join(f"s.{path} AS {alias}" for alias, path in METRICS_FIELDS) + " FROM S3Object s"
+
+# Keys of compacted objects, holding one ML output per line
+LINES_SUFFIXES = (".jsonl", ".ndjson")
+
+# Error codes of servers without S3 Select (MinIO, AWS and the HTTP status of servers that do not
+# know the request), after which only full GETs are used
+SELECT_UNSUPPORTED_CODES = ("NotImplemented", "XNotImplemented", "MethodNotAllowed", "UnsupportedSyntax",
+                            "405", "501")
+
+
+def extraction_mode() -> str:
+    """Extraction mode set by EXTRACTION_MODE_ENV (defaults to "select")"""
+    mode = os.environ.get(EXTRACTION_MODE_ENV, "select").strip().lower() or "select"
+    if mode not in EXTRACTION_MODES:
+        logger.warning(f"Unknown {EXTRACTION_MODE_ENV} value {mode}, using select")
+        return "select"
+    return mode
+
+
+def _nest(record: dict) -> dict:
+    """Rebuild the layout of an ML output from a record projected by METRICS_EXPRESSION"""
+    content = {}
+    for alias, path in METRICS_FIELDS:
+        if alias in record:
+            *parents, leaf = path.split(".")
+            target = content
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = record[alias]
+    return content
+
+
+def _parse(body: bytes, lines: bool) -> list:
+    text = body.decode("utf-8").strip()
+    if not lines:
+        return [json.loads(text)]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class MetricsExtractor:
+    """
+    Reader of the ML outputs of an experiment bucket, transferring only the fields aggregated.
+
+    In select mode every object is read with an S3 Select query projecting METRICS_FIELDS, so
+    the server streams back a few hundred bytes per ML output instead of the whole document
+    and the client only parses the projected fields. Compacted objects (LINES_SUFFIXES) are
+    queried as JSON Lines and return one record per line. If the server does not support
+    S3 Select, the extractor switches to full GETs for the rest of the run; any other failure
+    of a query falls back to a GET of that object only. Records have the layout of the ML
+    outputs whatever the mode, so the aggregators read them as the downloaded documents.
+    """
+
+    def __init__(self, s3_client, bucket: str, mode: str = None):
+        """
+        Args:
+            s3_client: boto3 S3 client
+            bucket (str): Experiment bucket
+            mode (str): "select" or "get" (defaults to EXTRACTION_MODE_ENV)
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.select_enabled = (mode or extraction_mode()) == "select"
+        self.selected = 0
+        self.fetched = 0
+        self.bytes_scanned = 0
+        self.bytes_returned = 0
+        self.bytes_downloaded = 0
+
+    def records(self, key: str) -> list:
+        """
+        Read the ML outputs of an object.
+
+        Args:
+            key (str): Object key (e.g. ML_r1/1762420500.123456.json)
+
+        Returns:
+            list: ML outputs of the object (one for single documents)
+        """
+        lines = key.endswith(LINES_SUFFIXES)
+        if self.select_enabled:
+            try:
+                return self._select(key, lines)
+            except Exception as e:
+                code = str(getattr(e, 'response', {}).get('Error', {}).get('Code', ''))
+                if code in SELECT_UNSUPPORTED_CODES:
+                    logger.warning(f"S3 Select not available ({code}: {e}), reading whole objects from now on")
+                    self.select_enabled = False
+                else:
+                    logger.warning(f"S3 Select of {key} failed ({e}), reading the whole object")
+        return self._get(key, lines)
+
+    def _select(self, key: str, lines: bool) -> list:
+        response = self.s3_client.select_object_content(
+            Bucket=self.bucket,
+            Key=key,
+            ExpressionType="SQL",
+            Expression=METRICS_EXPRESSION,
+            InputSerialization={"JSON": {"Type": "LINES" if lines else "DOCUMENT"}},
+            OutputSerialization={"JSON": {"RecordDelimiter": "\n"}}
+        )
+        # Records events may split a record, so the payload is parsed once the stream ends
+        payload = bytearray()
+        ended = False
+        for event in response["Payload"]:
+            if "Records" in event:
+                payload += event["Records"]["Payload"]
+            elif "Stats" in event:
+                details = event["Stats"]["Details"]
+                self.bytes_scanned += details.get("BytesScanned", 0)
+                self.bytes_returned += details.get("BytesReturned", 0)
+            elif "End" in event:
+                ended = True
+        if not ended:
+            raise IOError("Select stream ended before the End event")
+        self.selected += 1
+        return [_nest(json.loads(line)) for line in payload.decode("utf-8").splitlines() if line.strip()]
+
+    def _get(self, key: str, lines: bool) -> list:
+        data = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+        body = data["Body"].read()
+        self.fetched += 1
+        self.bytes_downloaded += len(body)
+        return _parse(body, lines)
+
+    def summary(self) -> str:
+        """Objects read in each mode and bytes transferred"""
+        return (f"{self.selected} objects read with S3 Select ({self.bytes_returned} of {self.bytes_scanned} bytes "
+                f"returned), {self.fetched} objects downloaded ({self.bytes_downloaded} bytes)")
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import functools
+import threading
+import collections
+import logging
+from datetime import datetime
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Environment variable enabling the tracer ("1", "true"...)
+TRACE_ENV = "EXPERIMENT_TRACE"
+
+# Directory of the saved traces
+TRACE_RESULTS_DIR = "results"
+
+# Maximum number of buffered events; the oldest ones are dropped beyond it
+# (a 24-step run with a few hundred flows records some tens of thousands)
+MAX_EVENTS = 1_000_000
+
+
+def tracing_requested() -> bool:
+    """True if the tracer is enabled by the environment"""
+    return os.environ.get(TRACE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class _Span:
+    """Span being measured, recorded as a complete event when it exits"""
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'SpanTracer', name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        """Add arguments to the span, e.g. the status of a response"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.monotonic_ns()
+        if exc_type is not None:
+            self.args['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer._record('X', self.name, self.category, self.start, end - self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    """Span of a disabled tracer"""
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class SpanTracer:
+    """
+    Lightweight recorder of named spans of an experiment, exported as a Chrome trace.
+
+    Spans, instant events and counters are appended as tuples to a bounded deque (thread-safe
+    without locking) with the native ID of the recording thread and monotonic timestamps, so
+    tracing costs one tuple per event while enabled and one attribute check while disabled.
+    The export follows the Chrome trace event format and opens in Perfetto
+    (https://ui.perfetto.dev) or chrome://tracing, with one track per thread showing the GUI
+    actions, schedule steps, NCS requests, OTG calls and S3 writes of a run side by side.
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = MAX_EVENTS):
+        """
+        Args:
+            enabled (bool): Record events from the start
+            max_events (int): Maximum number of buffered events
+        """
+        self.enabled = enabled
+        self.events = collections.deque(maxlen=max_events)
+        self.thread_names = {}
+        self.origin_ns = time.monotonic_ns()
+        self.origin_epoch = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        """Drop the recorded events and restart the time origin"""
+        self.events.clear()
+        self.origin_ns = time.monotonic_ns()
+        self.origin_epoch = time.time()
+
+    def _record(self, phase: str, name: str, category: str, start_ns: int, duration_ns: int, args: dict):
+        tid = threading.get_native_id()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        self.events.append((phase, name, category, start_ns, duration_ns, tid, args))
+
+    def span(self, name: str, category: str = "", **args):
+        """
+        Context manager recording the duration of a block.
+
+        Args:
+            name (str): Span name (e.g. "POST")
+            category (str): Category of the span (e.g. "ncs")
+            **args: JSON serializable arguments shown with the span
+
+        Returns:
+            Span with set(**args) to add arguments while it runs
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def instant(self, name: str, category: str = "", **args):
+        """Record a point in time (e.g. a button press)"""
+        if self.enabled:
+            self._record('i', name, category, time.monotonic_ns(), 0, args)
+
+    def counter(self, name: str, **values):
+        """Record the values of a counter track (e.g. the schedule skew)"""
+        if self.enabled:
+            self._record('C', name, "", time.monotonic_ns(), 0, values)
+
+    def traced(self, name: str = None, category: str = ""):
+        """Decorator recording every call of a function as a span"""
+        def decorator(function):
+            span_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Span(self, span_name, category, {}):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Recorded events in the Chrome trace event format.
+
+        Returns:
+            dict: Trace with traceEvents (timestamps in microseconds since the tracer origin)
+        """
+        pid = os.getpid()
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0, 'args': {'name': 'experiment'}}]
+        events.extend({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in list(self.thread_names.items()))
+
+        origin = self.origin_ns
+        for phase, name, category, start_ns, duration_ns, tid, args in list(self.events):
+            event = {'ph': phase, 'name': name, 'cat': category, 'ts': (start_ns - origin) / 1000,
+                     'pid': pid, 'tid': tid, 'args': args}
+            if phase == 'X':
+                event['dur'] = duration_ns / 1000
+            elif phase == 'i':
+                event['s'] = 't'
+            events.append(event)
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'origin_epoch': self.origin_epoch, 'buffer_full': len(self.events) == self.events.maxlen}
+        }
+
+    def save(self, path: str = None, results_dir: str = TRACE_RESULTS_DIR) -> str:
+        """
+        Save the trace as JSON.
+
+        Args:
+            path (str): Trace file (defaults to trace_<YYYYmmdd_HHMMSS>.json in results_dir)
+            results_dir (str): Directory of the default trace file
+
+        Returns:
+            str: Path of the trace file, or None if it could not be saved
+        """
+        if path is None:
+            path = os.path.join(results_dir, f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(self.to_chrome_trace(), f, default=str)
+            logger.info(f"Trace of {len(self.events)} events saved to: {path} (open it in https://ui.perfetto.dev)")
+            return path
+        except Exception as e:
+            logger.error(f"Failed to save trace: {e}")
+            return None
+
+
+# Tracer shared by all the modules of an experiment
+tracer = SpanTracer(enabled=tracing_requested())
@@ -0,0 +1,190 @@
+import re
+import json
+import argparse
+import logging
+
+import numpy as np
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Pseudo node of clab link endpoints attached to a multus network
+MULTUS_NODE = "multus"
+
+
+class Topology:
+    """
+    Compact undirected graph of a network topology.
+
+    Nodes are numbered in name order and the adjacency is held in CSR form: the neighbors of
+    node i are indices[indptr[i]:indptr[i + 1]] and the weights of those links are in the
+    same positions of weights. Parallel links between two nodes are merged, keeping the
+    lowest weight.
+    """
+
+    def __init__(self, nodes: list, links: list):
+        """
+        Args:
+            nodes (list): Node names
+            links (list): (node, node, weight) tuples
+        """
+        self.nodes = sorted(set(nodes))
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+
+        best = {}
+        for a, b, weight in links:
+            if a == b or a not in self.index or b not in self.index:
+                continue
+            for u, v in ((self.index[a], self.index[b]), (self.index[b], self.index[a])):
+                best[(u, v)] = min(weight, best.get((u, v), weight))
+
+        pairs = sorted(best)
+        sources = np.array([u for u, _ in pairs], dtype=np.int64)
+        self.indices = np.array([v for _, v in pairs], dtype=np.int64)
+        self.weights = np.array([best[pair] for pair in pairs], dtype=float)
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.nodes)), out=self.indptr[1:])
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def neighbors(self, node: str) -> list:
+        i = self.index[node]
+        return [self.nodes[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def links(self) -> list:
+        """(node, node, weight) of every link, once per direction pair"""
+        sources = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        return [(self.nodes[u], self.nodes[v], float(w))
+                for u, v, w in zip(sources, self.indices, self.weights) if u < v]
+
+    def subgraph(self, pattern: str) -> 'Topology':
+        """Topology restricted to the nodes whose name matches a regular expression"""
+        regex = re.compile(pattern)
+        return Topology([node for node in self.nodes if regex.match(node)], self.links())
+
+
+def read_clab(path: str) -> tuple:
+    """
+    Read the nodes and links of a containerlab file.
+
+    Links are taken from the 'endpoints' pairs ("node:interface") and from multus links:
+    all the node interfaces attached to the same multus network (host-interface of the
+    endpoint, or "multus:<network>" endpoints) are connected to each other.
+
+    Args:
+        path (str): Containerlab topology file (e.g. ixia.clab.yml)
+
+    Returns:
+        tuple: (node specs by name, list of (node, node, multus network or None) links)
+    """
+    import yaml
+
+    with open(path) as f:
+        topology = (yaml.safe_load(f) or {}).get('topology', {})
+
+    nodes = {name: spec or {} for name, spec in (topology.get('nodes') or {}).items()}
+    links = []
+    networks = {}
+    for link in topology.get('links') or []:
+        if link.get('type') == MULTUS_NODE:
+            networks.setdefault(link['host-interface'], []).append(link['endpoint']['node'])
+            continue
+        ends = [endpoint.split(':', 1) for endpoint in link.get('endpoints', [])]
+        if len(ends) != 2:
+            continue
+        attached = [node for node, interface in ends if node != MULTUS_NODE]
+        if len(attached) == 2:
+            links.append((attached[0], attached[1], None))
+        else:
+            network = next(interface for node, interface in ends if node == MULTUS_NODE)
+            networks.setdefault(network, []).extend(attached)
+
+    for network, members in networks.items():
+        links.extend((a, b, network) for i, a in enumerate(members) for b in members[i + 1:])
+    return nodes, links
+
+
+def load_clab(path: str) -> Topology:
+    """
+    Load the topology of a containerlab file (see read_clab).
+
+    Args:
+        path (str): Containerlab topology file (e.g. ixia.clab.yml)
+
+    Returns:
+        Topology: Unit-weight topology of the clab nodes
+    """
+    nodes, links = read_clab(path)
+    return Topology(list(nodes), [(a, b, 1.0) for a, b, _ in links])
+
+
+def load_networkinfo(path: str) -> Topology:
+    """
+    Load the connectivity graph of a NetworkInfo JSON file of the Network Control Stack.
+
+    The graph may be at the top level or under a 'graph' key, either as node-link data
+    ('nodes' and 'edges' or 'links', with source/target and optional cost or weight) or as
+    an adjacency dict (node to list of neighbors, or to dict of neighbor costs).
+
+    Args:
+        path (str): NetworkInfo JSON file
+
+    Returns:
+        Topology: Topology of the graph
+    """
+    with open(path) as f:
+        data = json.load(f)
+    graph = data.get('graph', data)
+
+    def name(node) -> str:
+        return str(node.get('id', node.get('name'))) if isinstance(node, dict) else str(node)
+
+    if 'nodes' in graph:
+        nodes = [name(node) for node in graph['nodes']]
+        links = []
+        for edge in graph.get('edges', graph.get('links', [])):
+            if isinstance(edge, dict):
+                links.append((name(edge['source']), name(edge['target']), float(edge.get('cost', edge.get('weight', 1.0)))))
+            else:
+                links.append((str(edge[0]), str(edge[1]), float(edge[2]) if len(edge) > 2 else 1.0))
+        return Topology(nodes, links)
+
+    nodes = list(graph)
+    links = []
+    for node, neighbors in graph.items():
+        if isinstance(neighbors, dict):
+            links.extend((node, str(neighbor), float(cost)) for neighbor, cost in neighbors.items())
+        else:
+            links.extend((node, str(neighbor), 1.0) for neighbor in neighbors)
+    return Topology(nodes + [b for _, b, _ in links], links)
+
+
+def load_topology(path: str, node_filter: str = None) -> Topology:
+    """
+    Load a topology from a containerlab (.yml/.yaml) or NetworkInfo (.json) file.
+
+    Args:
+        path (str): Topology file
+        node_filter (str): Regular expression of the node names kept (e.g. "^r" for the routers)
+
+    Returns:
+        Topology: Loaded topology
+    """
+    topology = load_networkinfo(path) if path.endswith('.json') else load_clab(path)
+    return topology.subgraph(node_filter) if node_filter else topology
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Print the nodes and links of a topology file')
+    parser.add_argument('path', help='Containerlab (.clab.yml) or NetworkInfo (.json) file')
+    parser.add_argument('--filter', help='Regular expression of the node names kept (e.g. "^r")')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    topology = load_topology(args.path, args.filter)
+    logger.info(f"{len(topology)} nodes, {len(topology.links())} links")
+    for node in topology.nodes:
+        print(f"{node}: {', '.join(topology.neighbors(node))}")
@@ -0,0 +1,339 @@
+import os
+import re
+import sys
+import json
+import argparse
+import logging
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topology.clab import read_clab
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Compute hosts of the cluster and their default allocatable CPU cores and memory (GiB)
+DEFAULT_HOSTS = ["compute1", "compute2", "compute3", "compute4"]
+DEFAULT_HOST_CAPACITY = (16.0, 32.0)
+
+# CPU cores and memory (GiB) of a node of each kind without 'cpu'/'memory' in the clab file
+DEFAULT_DEMANDS = {
+    "keysight_ixia-c-one": (4.0, 4.0),
+    "linux": (1.0, 0.5)
+}
+DEFAULT_DEMAND = (1.0, 1.0)
+
+# Node label used to pin the deployment of every clab node to its host
+HOSTNAME_LABEL = "kubernetes.io/hostname"
+
+# Linux bridge of each VLAN of the VlanNet network on the compute hosts (br-vlan.<vlan>)
+DEFAULT_BRIDGE_PREFIX = "br-vlan."
+
+# Maximum number of refinement passes, and steps of a pass without improvement before it ends
+MAX_PASSES = 100
+PASS_PATIENCE = 50
+
+# Nodes considered for swaps at every step of a pass
+SWAP_CANDIDATES = 64
+
+MEMORY_UNITS = {
+    "": 1, "k": 1e3, "kb": 1e3, "ki": 2 ** 10, "kib": 2 ** 10, "m": 1e6, "mb": 1e6, "mi": 2 ** 20, "mib": 2 ** 20,
+    "g": 1e9, "gb": 1e9, "gi": 2 ** 30, "gib": 2 ** 30, "t": 1e12, "tb": 1e12, "ti": 2 ** 40, "tib": 2 ** 40
+}
+
+
+def parse_memory(value) -> float:
+    """
+    Memory size in GiB from a clab/Kubernetes quantity (e.g. "512Mi", "1GB", "2Gi") or a number of GiB.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]*)\s*", str(value))
+    if not match or match.group(2).lower() not in MEMORY_UNITS:
+        raise ValueError(f"Invalid memory size: {value}")
+    return float(match.group(1)) * MEMORY_UNITS[match.group(2).lower()] / 2 ** 30
+
+
+def parse_resources(value: str) -> tuple:
+    """(cpu, memory GiB) from a "<cpu>:<memory>" string such as "2:4Gi" """
+    cpu, memory = value.split(':', 1)
+    return float(cpu), parse_memory(memory)
+
+
+def node_demands(nodes: dict, overrides: dict = None) -> np.ndarray:
+    """
+    CPU and memory demand of every clab node.
+
+    The 'cpu' and 'memory' fields of a node are used when present, then the override for its
+    name or kind, then the default of its kind.
+
+    Args:
+        nodes (dict): Node specs by name, as returned by read_clab
+        overrides (dict): (cpu, memory GiB) by node name or kind
+
+    Returns:
+        np.ndarray: (N, 2) demands in node order
+    """
+    overrides = overrides or {}
+    demands = []
+    for name, spec in nodes.items():
+        kind = spec.get('kind')
+        cpu, memory = overrides.get(name, overrides.get(kind, DEFAULT_DEMANDS.get(kind, DEFAULT_DEMAND)))
+        demands.append((float(spec.get('cpu', cpu)), parse_memory(spec['memory']) if 'memory' in spec else memory))
+    return np.array(demands, dtype=float).reshape(-1, 2)
+
+
+class PlacementPlanner:
+    """
+    Assign the nodes of a topology to compute hosts, minimizing the links between hosts.
+
+    Every link between nodes on different hosts crosses the VlanNet switch, adding latency
+    and bridge load, so the planner solves a capacity-constrained graph partitioning problem
+    with a fast heuristic. Hosts are first filled one at a time by greedy graph growing:
+    the unplaced node with most links to the host is added until it is full. The partition
+    is then refined with single-node moves and two-node swaps in Kernighan-Lin/Fiduccia-
+    Mattheyses passes, with the gains of all nodes and hosts computed at once from the link
+    matrix.
+    """
+
+    def __init__(self, nodes: list, links: list, demands: np.ndarray, hosts: list, capacities: np.ndarray,
+                 pinned: dict = None):
+        """
+        Args:
+            nodes (list): Node names
+            links (list): (node, node, ...) tuples; parallel links count once each
+            demands (np.ndarray): (N, R) resource demands of the nodes
+            hosts (list): Host names
+            capacities (np.ndarray): (H, R) resource capacities of the hosts
+            pinned (dict): Host of nodes that must not be moved
+        """
+        self.nodes = list(nodes)
+        self.hosts = list(hosts)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.demands = np.asarray(demands, dtype=float)
+        self.capacities = np.asarray(capacities, dtype=float)
+        self.pinned = {self.index[node]: self.hosts.index(host) for node, host in (pinned or {}).items()}
+
+        self.weights = np.zeros((len(self.nodes), len(self.nodes)))
+        for a, b, *_ in links:
+            if a != b and a in self.index and b in self.index:
+                self.weights[self.index[a], self.index[b]] += 1
+                self.weights[self.index[b], self.index[a]] += 1
+
+    def _usage(self, assignment: np.ndarray) -> np.ndarray:
+        usage = np.zeros_like(self.capacities)
+        np.add.at(usage, assignment, self.demands)
+        return usage
+
+    def _initial(self) -> np.ndarray:
+        n = len(self.nodes)
+        assignment = np.full(n, -1)
+        usage = np.zeros_like(self.capacities)
+        for i, host in self.pinned.items():
+            assignment[i] = host
+            usage[host] += self.demands[i]
+
+        # Grow one host at a time with the unplaced node most connected to it
+        for host in range(len(self.hosts)):
+            connections = self.weights[:, assignment == host].sum(axis=1)
+            while True:
+                unplaced = assignment < 0
+                fits = unplaced & np.all(usage[host] + self.demands <= self.capacities[host] + 1e-9, axis=1)
+                if not fits.any():
+                    break
+                if connections[fits].max() > 0:
+                    i = int(np.argmax(np.where(fits, connections, -np.inf)))
+                else:
+                    # Seed (or new component): the node with most links to unplaced nodes
+                    i = int(np.argmax(np.where(fits, self.weights[:, unplaced].sum(axis=1), -np.inf)))
+                assignment[i] = host
+                usage[host] += self.demands[i]
+                connections += self.weights[:, i]
+
+        if (assignment < 0).any():
+            raise ValueError(f"Node {self.nodes[int(np.argmax(assignment < 0))]} does not fit in any host")
+        return assignment
+
+    def _best_move(self, assignment: np.ndarray, usage: np.ndarray, connections: np.ndarray, free: np.ndarray) -> tuple:
+        n = len(self.nodes)
+        gain = connections - connections[np.arange(n), assignment][:, None]
+        fits = np.all(usage[None, :, :] + self.demands[:, None, :] <= self.capacities[None, :, :] + 1e-9, axis=2)
+        gain = np.where(fits & free[:, None], gain, -np.inf)
+        gain[np.arange(n), assignment] = -np.inf
+        i, host = np.unravel_index(np.argmax(gain), gain.shape)
+        return gain[i, host], int(i), int(host)
+
+    def _best_swap(self, assignment: np.ndarray, usage: np.ndarray, connections: np.ndarray, free: np.ndarray) -> tuple:
+        n = len(self.nodes)
+        own = connections[np.arange(n), assignment]
+        # Swaps are searched among the free nodes that gain most by leaving their host
+        leave = np.where(free, (connections - own[:, None]).max(axis=1), -np.inf)
+        candidates = np.argsort(-leave, kind='stable')[:min(SWAP_CANDIDATES, int(free.sum()))]
+        hosts = assignment[candidates]
+        demands = self.demands[candidates]
+
+        # to_host[i, j]: connections gained by moving candidate i to the host of candidate j
+        to_host = connections[candidates][:, hosts] - own[candidates][:, None]
+        gain = to_host + to_host.T - 2 * self.weights[np.ix_(candidates, candidates)]
+
+        delta = demands[None, :, :] - demands[:, None, :]                    # d_j - d_i
+        fits_i = np.all(usage[hosts][:, None, :] + delta <= self.capacities[hosts][:, None, :] + 1e-9, axis=2)
+        valid = fits_i & fits_i.T & (hosts[:, None] != hosts[None, :])
+        gain = np.where(valid, gain, -np.inf)
+        i, j = np.unravel_index(np.argmax(gain), gain.shape)
+        return gain[i, j], int(candidates[i]), int(candidates[j])
+
+    def _move(self, assignment: np.ndarray, usage: np.ndarray, connections: np.ndarray, i: int, host: int):
+        usage[assignment[i]] -= self.demands[i]
+        usage[host] += self.demands[i]
+        connections[:, assignment[i]] -= self.weights[:, i]
+        connections[:, host] += self.weights[:, i]
+        assignment[i] = host
+
+    def plan(self) -> dict:
+        """
+        Compute the placement.
+
+        Every refinement pass applies the best move or swap of unlocked nodes, even if it
+        adds cross-host links, and locks the nodes involved, so that the pass can leave local
+        minima. The placement is rolled back to the best point of the pass, and passes are
+        repeated while they reduce the links between hosts.
+
+        Returns:
+            dict: Host of every node
+        """
+        assignment = self._initial()
+        movable = np.ones(len(self.nodes), dtype=bool)
+        movable[list(self.pinned)] = False
+
+        for _ in range(MAX_PASSES):
+            usage = self._usage(assignment)
+            one_hot = np.zeros((len(self.nodes), len(self.hosts)))
+            one_hot[np.arange(len(self.nodes)), assignment] = 1
+            connections = self.weights @ one_hot                                 # (N, H) links of each node to each host
+
+            free = movable.copy()
+            history = []
+            total = best_total = 0.0
+            best_length = 0
+            while free.any() and len(history) - best_length < PASS_PATIENCE:
+                move_gain, i, host = self._best_move(assignment, usage, connections, free)
+                swap_gain, a, b = self._best_swap(assignment, usage, connections, free)
+                if np.isneginf(move_gain) and np.isneginf(swap_gain):
+                    break
+                if move_gain >= swap_gain:
+                    history.append([(i, assignment[i])])
+                    self._move(assignment, usage, connections, i, host)
+                    free[i] = False
+                    total += move_gain
+                else:
+                    host_a, host_b = assignment[a], assignment[b]
+                    history.append([(a, host_a), (b, host_b)])
+                    self._move(assignment, usage, connections, a, host_b)
+                    self._move(assignment, usage, connections, b, host_a)
+                    free[[a, b]] = False
+                    total += swap_gain
+                if total > best_total + 1e-9:
+                    best_total, best_length = total, len(history)
+
+            # Roll back the steps after the best point of the pass
+            for step in reversed(history[best_length:]):
+                for i, host in reversed(step):
+                    assignment[i] = host
+            if best_total <= 0:
+                break
+        return {node: self.hosts[host] for node, host in zip(self.nodes, assignment)}
+
+    def cross_links(self, placement: dict, links: list) -> list:
+        """Links whose nodes are placed on different hosts"""
+        return [link for link in links if placement.get(link[0]) != placement.get(link[1])]
+
+    def usage(self, placement: dict) -> dict:
+        """Resources used on every host by a placement"""
+        usage = self._usage(np.array([self.hosts.index(placement[node]) for node in self.nodes]))
+        return {host: usage[h].tolist() for h, host in enumerate(self.hosts)}
+
+
+def placement_patcher(placement: dict, namespace: str) -> str:
+    """
+    Shell script pinning the deployment of every node to its host, run after the topology
+    is deployed (as deployment-patcher.sh). Node names are deployment names with the
+    non-prefixed naming of clabverter.
+    """
+    lines = ["#!/bin/bash", f"NS={namespace}"]
+    for node, host in placement.items():
+        patch = json.dumps({'spec': {'template': {'spec': {'nodeSelector': {HOSTNAME_LABEL: host}}}}})
+        lines.append(f"kubectl patch deployment {node} -n $NS --patch '{patch}'")
+    return "\n".join(lines) + "\n"
+
+
+def network_attachment_definitions(networks: list, namespace: str, bridge_prefix: str = DEFAULT_BRIDGE_PREFIX) -> str:
+    """
+    Multus NetworkAttachmentDefinitions of the multus networks of a topology.
+
+    The VLAN bridge of every network is taken from the number in its name (net2100 uses
+    <bridge_prefix>2100), as in the VlanNet deployment of the scenario.
+    """
+    documents = []
+    for network in sorted(set(networks)):
+        vlan = re.sub(r"\D", "", network)
+        config = {"cniVersion": "0.3.0", "type": "macvlan", "master": f"{bridge_prefix}{vlan}", "mode": "bridge", "ipam": {}}
+        documents.append("\n".join([
+            'apiVersion: "k8s.cni.cncf.io/v1"',
+            "kind: NetworkAttachmentDefinition",
+            "metadata:",
+            f"  name: {network}",
+            f"  namespace: {namespace}",
+            "spec:",
+            f"  config: '{json.dumps(config)}'"
+        ]))
+    return "\n---\n".join(documents) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Plan the compute host of every node of a clabernetes topology')
+    parser.add_argument('topology', help='Containerlab topology file (e.g. ixia.clab.yml)')
+    parser.add_argument('--hosts', nargs='+', default=DEFAULT_HOSTS,
+                        help='Compute hosts as <name> or <name>=<cpu>:<memory> (default capacity: '
+                             f'{DEFAULT_HOST_CAPACITY[0]:g}:{DEFAULT_HOST_CAPACITY[1]:g}Gi)')
+    parser.add_argument('--demand', nargs='+', default=[], help='Demand of nodes or kinds as <node|kind>=<cpu>:<memory>')
+    parser.add_argument('--pin', nargs='+', default=[], help='Fixed hosts as <node>=<host>')
+    parser.add_argument('--namespace', default="c9s-ixia", help='Namespace of the topology')
+    parser.add_argument('--bridge-prefix', default=DEFAULT_BRIDGE_PREFIX, help='Bridge of each VLAN without the VLAN number')
+    parser.add_argument('-o', '--output', default="placement", help='Output directory')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+
+    hosts = []
+    capacities = []
+    for value in args.hosts:
+        name, _, resources = value.partition('=')
+        hosts.append(name)
+        capacities.append(parse_resources(resources) if resources else DEFAULT_HOST_CAPACITY)
+    overrides = {name: parse_resources(resources) for name, resources in (value.split('=', 1) for value in args.demand)}
+    pinned = dict(value.split('=', 1) for value in args.pin)
+
+    nodes, links = read_clab(args.topology)
+    planner = PlacementPlanner(list(nodes), links, node_demands(nodes, overrides), hosts, np.array(capacities), pinned)
+    placement = planner.plan()
+    cross = planner.cross_links(placement, links)
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "placement.json"), 'w') as f:
+        json.dump({'placement': placement, 'cross_host_links': [list(link) for link in cross], 'usage': planner.usage(placement)},
+                  f, indent=4)
+    with open(os.path.join(args.output, "placement-patcher.sh"), 'w') as f:
+        f.write(placement_patcher(placement, args.namespace))
+    with open(os.path.join(args.output, "network-attachments.yaml"), 'w') as f:
+        f.write(network_attachment_definitions([network for _, _, network in links if network], args.namespace,
+                                               args.bridge_prefix))
+
+    logger.info(f"{len(nodes)} nodes on {len(set(placement.values()))} hosts, {len(cross)}/{len(links)} links between hosts")
+    for host, used in planner.usage(placement).items():
+        members = [node for node, node_host in placement.items() if node_host == host]
+        print(f"{host}: {used[0]:g} CPU, {used[1]:g} GiB - {', '.join(members)}")
+    logger.info(f"Placement files saved to {args.output}")
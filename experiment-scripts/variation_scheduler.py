@@ -0,0 +1,205 @@
+import time
+import threading
+import logging
+from dataclasses import dataclass, field
+
+# Import span tracer of the experiment timeline
+from span_tracer import tracer
+
+# Import metrics exposed on the /metrics endpoint of the traffic drivers
+from metrics_endpoint import controller_metrics
+
+# Create logger for this module
+logger = logging.getLogger(__name__)
+
+# Action kinds handled by the scheduler
+STEP = "step"
+NCS_POST = "ncs_post"
+START = "start"
+STOP = "stop"
+NCS_DELETE = "ncs_delete"
+
+# Order of actions sharing the same deadline
+_KIND_ORDER = {STEP: 0, STOP: 1, NCS_DELETE: 2, NCS_POST: 3, START: 4}
+
+
+@dataclass
+class ScheduledAction:
+    """
+    Single action of a precomputed variation timeline.
+
+    Attributes:
+        deadline (float): Planned execution time in seconds since the schedule start
+        kind (str): One of STEP, NCS_POST, START, STOP or NCS_DELETE
+        step (int): Index of the simultaneous_flows step the action belongs to
+        target_flows (int): Number of active flows once the step is applied
+        flow_names (list): Flow names affected by the action (empty list means all flows)
+    """
+    deadline: float
+    kind: str
+    step: int
+    target_flows: int
+    flow_names: list = field(default_factory=list)
+
+
+def build_timeline(
+    flow_names: list,
+    variation_interval: float,
+    simultaneous_flows: list,
+    ncs_lead_time: float = 0.0,
+    use_ncs: bool = True,
+    final_hold: float = 0.0
+) -> list:
+    """
+    Compile a simultaneous_flows schedule into an ordered list of actions.
+
+    Step 'i' of simultaneous_flows is applied at 'i * variation_interval' seconds. Flows are
+    always started and stopped in configuration order, so step changes only touch the flows
+    between the previous and the new active count. NCS POST requests for flows about to start
+    are scheduled 'ncs_lead_time' seconds ahead of their start, but never before the previous
+    step, so routes are installed by the time traffic begins. After the last step the
+    remaining flows are stopped 'final_hold' seconds later.
+
+    The initial flows (step 0) are only started: their routes are expected to be requested
+    beforehand (e.g. through the initial flows file).
+
+    Args:
+        flow_names (list): Names of the configured flows, in start order
+        variation_interval (float): Time interval in seconds between flow changes
+        simultaneous_flows (list): Array of flow counts per interval
+        ncs_lead_time (float): Seconds NCS POST requests are sent ahead of the flow start
+        use_ncs (bool): Whether NCS_POST/NCS_DELETE actions are generated
+        final_hold (float): Seconds the last step is held before stopping all traffic
+
+    Returns:
+        list: ScheduledAction objects sorted by deadline
+    """
+    timeline = []
+    current_active_flows = 0
+
+    for step, target_flows in enumerate(simultaneous_flows):
+        target_flows = min(target_flows, len(flow_names))
+        deadline = step * variation_interval
+        timeline.append(ScheduledAction(deadline, STEP, step, target_flows))
+
+        if target_flows > current_active_flows:
+            flows_to_start = flow_names[current_active_flows:target_flows]
+            if use_ncs and step > 0:
+                previous_deadline = (step - 1) * variation_interval
+                prepare_deadline = max(previous_deadline, deadline - ncs_lead_time)
+                timeline.append(ScheduledAction(prepare_deadline, NCS_POST, step, target_flows, flows_to_start))
+            timeline.append(ScheduledAction(deadline, START, step, target_flows, flows_to_start))
+
+        elif target_flows < current_active_flows:
+            flows_to_stop = flow_names[target_flows:current_active_flows]
+            timeline.append(ScheduledAction(deadline, STOP, step, target_flows, flows_to_stop))
+            if use_ncs:
+                timeline.append(ScheduledAction(deadline, NCS_DELETE, step, target_flows, flows_to_stop))
+
+        current_active_flows = target_flows
+
+    # Stop all remaining flows at the end
+    if simultaneous_flows and current_active_flows > 0:
+        final_step = len(simultaneous_flows)
+        deadline = (final_step - 1) * variation_interval + final_hold
+        remaining_flows = flow_names[:current_active_flows]
+        timeline.append(ScheduledAction(deadline, STOP, final_step, 0, []))
+        if use_ncs:
+            timeline.append(ScheduledAction(deadline, NCS_DELETE, final_step, 0, remaining_flows))
+
+    # Stable sort keeps POSTs prepared at a previous step deadline after that step's actions
+    timeline.sort(key=lambda action: (action.deadline, action.step, _KIND_ORDER[action.kind]))
+    return timeline
+
+
+class TimelineScheduler:
+    """
+    Execute a precomputed timeline against the monotonic clock.
+
+    Every action is fired at 'start + deadline', independently of how long previous actions
+    took, so latency of NCS requests or control-state calls never accumulates into drift.
+    The actual versus planned execution time of each action is recorded as skew.
+    """
+
+    def __init__(self, timeline: list, handlers: dict, stop_event: threading.Event = None):
+        """
+        Args:
+            timeline (list): ScheduledAction objects sorted by deadline
+            handlers (dict): Callable per action kind, receiving the ScheduledAction
+            stop_event (threading.Event): Event that aborts the schedule when set
+        """
+        self.timeline = timeline
+        self.handlers = handlers
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.records = []
+        self.start_time = None
+
+    def elapsed(self) -> float:
+        """Seconds elapsed since the schedule started"""
+        return time.monotonic() - self.start_time if self.start_time is not None else 0.0
+
+    def run(self) -> bool:
+        """
+        Run the timeline until completion or until the stop event is set.
+
+        Returns:
+            bool: True if every action was executed, False if the schedule was stopped
+        """
+        self.start_time = time.monotonic()
+
+        for action in self.timeline:
+            planned = self.start_time + action.deadline
+            remaining = planned - time.monotonic()
+            if remaining > 0 and self.stop_event.wait(remaining):
+                return False
+            if self.stop_event.is_set():
+                return False
+
+            fired = time.monotonic()
+            tracer.counter("schedule skew", skew_ms=(fired - planned) * 1000)
+            controller_metrics.observe_skew(fired - planned)
+            handler = self.handlers.get(action.kind)
+            if handler is not None:
+                with tracer.span(action.kind, "schedule", step=action.step, planned=action.deadline,
+                                 skew_ms=(fired - planned) * 1000, flows=len(action.flow_names)):
+                    try:
+                        handler(action)
+                    except Exception as e:
+                        logger.error(f"Error executing {action.kind} action of step {action.step}: {e}")
+            finished = time.monotonic()
+
+            self.records.append({
+                'step': action.step,
+                'kind': action.kind,
+                'planned': action.deadline,
+                'actual': fired - self.start_time,
+                'skew': fired - planned,
+                'duration': finished - fired
+            })
+
+        return True
+
+    def skew_summary(self) -> dict:
+        """
+        Summarize the execution skew of the executed actions.
+
+        Returns:
+            dict: Count, mean, median, p95 and maximum skew in milliseconds
+        """
+        skews = sorted(record['skew'] * 1000 for record in self.records)
+        if not skews:
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+
+        return {
+            'count': len(skews),
+            'mean_ms': sum(skews) / len(skews),
+            'p50_ms': skews[int(0.50 * (len(skews) - 1))],
+            'p95_ms': skews[int(0.95 * (len(skews) - 1))],
+            'max_ms': skews[-1]
+        }
+
+    def log_skew_summary(self):
+        """Log the skew summary of the executed actions"""
+        summary = self.skew_summary()
+        logger.info(f"Schedule skew over {summary['count']} actions: mean={summary['mean_ms']:.2f}ms, "
+                    f"p50={summary['p50_ms']:.2f}ms, p95={summary['p95_ms']:.2f}ms, max={summary['max_ms']:.2f}ms")
@@ -1,16 +1,25 @@
+import os
+import sys
 import time
 import snappi
 import urllib3
 import json
 
+# Config reuse shared with the drivers in 'experiment-scripts'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "experiment-scripts"))
+from otg_config import push_config
+
 urllib3.disable_warnings()
 
 src_mac= "02:00:00:00:01:aa"
 dst_mac= "02:00:00:00:02:aa"
 
+# Location of the OTG API, also the key of the pushed configuration cache
+IXIA_API_LOCATION = "https://172.20.20.5:8443"
+
 # Create a new API handle to make API calls against OTG
 # with HTTP as default transport protocol
-api = snappi.api(location="https://172.20.20.5:8443")
+api = snappi.api(location=IXIA_API_LOCATION)
 
 # Create a new traffic configuration that will be set on OTG
 cfg = api.config()
@@ -90,8 +99,9 @@ tcp.dst_port.value = 1234
 
 #########################################################################
 
-# Push traffic configuration constructed so far to OTG
-api.set_config(cfg)
+# Push traffic configuration constructed so far to OTG, unless it already holds it
+if not push_config(api, cfg, IXIA_API_LOCATION):
+    print("OTG already holds this configuration, skipping set_config")
 
 # Start transmitting the packets from configured flow
 cs = api.control_state()
@@ -1,8 +1,14 @@
+import os
+import sys
 import time
 import snappi
 import urllib3
 import keyboard
 
+# Config reuse shared with the drivers in 'experiment-scripts'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "experiment-scripts"))
+from otg_config import push_config
+
 urllib3.disable_warnings()
 
 src_mac= "02:00:00:00:01:aa"
@@ -13,11 +19,14 @@ dst_mac = "02:00:00:00:02:aa"  # Add the missing mac address
 src_ip= "fd00:0:1::3"
 dst_ips =  [f"fd00:0:2::b{str(i)}" for i in range(2, 9)]
 
+# Location of the OTG API, also the key of the pushed configuration cache
+#IXIA_API_LOCATION = "https://172.20.20.5:8443"
+#IXIA_API_LOCATION = "https://138.4.21.11:31114"
+IXIA_API_LOCATION = "https://138.4.21.11:31121"
+
 # Create a new API handle to make API calls against OTG
 # with HTTP as default transport protocol
-#api = snappi.api(location="https://172.20.20.5:8443")
-#api = snappi.api(location="https://138.4.21.11:31114")
-api = snappi.api(location="https://138.4.21.11:31121")
+api = snappi.api(location=IXIA_API_LOCATION)
 
 
 # Create a new traffic configuration that will be set on OTG
@@ -101,8 +110,9 @@ define_flow(f"flow_{dst_ips[5]}", r1Ip, r2Ip, packet_size, 20, dst_ips[5])
 define_flow(f"flow_{dst_ips[6]}", r1Ip, r2Ip, packet_size, 17, dst_ips[6])
 
 
-# Push traffic configuration constructed so far to OTG
-api.set_config(cfg)
+# Push traffic configuration constructed so far to OTG, unless it already holds it
+if not push_config(api, cfg, IXIA_API_LOCATION):
+    print("OTG already holds this configuration, skipping set_config")
 
 # Start transmitting the packets from configured flow
 cs = api.control_state()
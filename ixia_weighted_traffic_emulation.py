@@ -1,7 +1,16 @@
+import os
+import sys
 import time
+import threading
 import snappi
 import urllib3
 
+# Timeline engine, size distribution encoder and config reuse shared with the drivers in 'experiment-scripts'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "experiment-scripts"))
+from variation_scheduler import build_timeline, TimelineScheduler, STEP, START, STOP
+from packet_size_distribution import encode_size_distribution, format_report
+from otg_config import push_config
+
 urllib3.disable_warnings()
 
 # MAC address of Ixia tx port
@@ -18,9 +27,12 @@ src_ip= "fd00:0:1::2"
 # fd00:0:2::b0/124
 dst_ips =  [f"fd00:0:2::b{str(i)}" for i in range(2, 3)]
 
+# Location of the OTG API, also the key of the pushed configuration cache
+IXIA_API_LOCATION = "https://172.20.20.5:8443"
+
 # Create a new API handle to make API calls against OTG
 # with HTTP as default transport protocol
-api = snappi.api(location="https://172.20.20.5:8443")
+api = snappi.api(location=IXIA_API_LOCATION)
 
 # Create a new traffic configuration that will be set on OTG
 cfg = api.config()
@@ -78,6 +90,11 @@ packets = [{"size": size, "weight": weight_per_size} for size in range(min_size,
 
 weighted_packet_sizes.extend(packets)
 
+# Encode the size mix into the smallest set of weight pairs within the error bounds
+# instead of pushing one weight pair per size of the uniform component in every flow
+weighted_packet_sizes, size_encoding_report = encode_size_distribution(weighted_packet_sizes)
+print(format_report(size_encoding_report))
+
 simultaenous_flows = [7,6,5,4,3,4,5,6,7,8,8,8,8,8,8,8,8,9,9,9,10,10,9,8]
 
 #########################################################################
@@ -121,32 +138,43 @@ def define_flow(name, tx_device, rx_device, weighted_packet_sizes, rate_mbps, ds
 for dst_ip in dst_ips:
     define_flow(f"flow_{dst_ip}", r1Ip, r2Ip, weighted_packet_sizes, 10, dst_ip)
 
-# Push traffic configuration constructed so far to OTG
-api.set_config(cfg)
+# Push traffic configuration constructed so far to OTG, unless it already holds it
+if not push_config(api, cfg, IXIA_API_LOCATION):
+    print("OTG already holds this configuration, skipping set_config")
 
 # Assign control state api method to variable
 cs = api.control_state()
 
-# Get the first value from simultaneous_flows array
-initial_flows_count = simultaenous_flows[0]
-
-# Select only the first N flows from the configuration
-flow_names = [flow.name for flow in cfg.flows[:initial_flows_count]]
-
-# Set these flows to be transmitted
-cs.traffic.flow_transmit.flow_names = flow_names
-
-print(f"Starting {initial_flows_count} flows: {flow_names}")
+# Compile the flow count schedule into a timeline of start/stop actions ahead of time.
+# The timeline runs on the monotonic clock, so control state calls do not add drift,
+# and the last configuration is held for a full interval before stopping all traffic.
+flow_names = [flow.name for flow in cfg.flows]
+timeline = build_timeline(flow_names, variation_interval, simultaenous_flows,
+                          use_ncs=False, final_hold=variation_interval)
+
+def print_step(action):
+    if action.step == 0:
+        print(f"Starting {action.target_flows} flows: {flow_names[:action.target_flows]}")
+    else:
+        print(f"Time {scheduler.elapsed():.1f}s: Updated to {action.target_flows} flows: 1 to {action.target_flows}")
+
+def start_flows(action):
+    cs.traffic.flow_transmit.flow_names = action.flow_names
+    cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
+    api.set_control_state(cs)
 
-# Set flows to start transmitting
-cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
+def stop_flows(action):
+    if action.step == len(simultaenous_flows):
+        print("No more flow configurations to apply, stopping traffic.")
+    cs.traffic.flow_transmit.flow_names = action.flow_names
+    cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
+    api.set_control_state(cs)
 
-# Storage experiment start time 
-start_time = time.time()
-flow_list_index = 0
+scheduler = TimelineScheduler(timeline, {STEP: print_step, START: start_flows, STOP: stop_flows})
 
-# Send updated control state to OTG
-api.set_control_state(cs)
+# Run the timeline in the background while metrics are printed from the main thread
+scheduler_thread = threading.Thread(target=scheduler.run, daemon=True)
+scheduler_thread.start()
 
 # Check flows are transmitting and print metrics
 def metrics_ok():
@@ -204,70 +232,20 @@ def metrics_ok():
     print('\n')
     return m[0].transmit == m[0].STOPPED
 
-# Keep printing metrics until experiment is stopped or all flows are stopped
+# Keep printing metrics until the whole timeline has been executed
 try:
-    while not metrics_ok():
-        current_time = time.time()
-        # Check if a variation interval has passed
-        if current_time - start_time >= variation_interval * (flow_list_index + 1):
-
-            # Check if we have more flow configurations to apply
-            if flow_list_index+1 >= len(simultaenous_flows):
-                print("No more flow configurations to apply, stopping traffic.")
-                
-                cs.traffic.flow_transmit.flow_names = []
-                cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
-                api.set_control_state(cs)
-                print("Experiment finished, stopping all traffic...")
-                time.sleep(5)
-                exit()
-
-            # Get currently running flows
-            current_flows = simultaenous_flows[flow_list_index]
-
-            # Move to next flow configuration
-            flow_list_index = flow_list_index + 1
-            new_flow_count = simultaenous_flows[flow_list_index]
-
-            # Get which flows to start/stop based on new count
-            flow_difference = new_flow_count - current_flows
-
-            # Set flows to start or stop based on the difference
-            starting_flows = []
-            stopping_flows = []
-
-            if flow_difference > 0:
-                for i in range(current_flows + 1, new_flow_count + 1):
-                    starting_flows.append(cfg.flows[i-1].name)
-
-            elif flow_difference < 0:
-                for i in range(new_flow_count + 1, current_flows + 1):
-                    stopping_flows.append(cfg.flows[i-1].name)
-
-            else:
-                print(f"Time {current_time - start_time:.1f}s: No change in flow count ({new_flow_count})")
-                continue
-            
-            # Get currently running flows
-            current_flows = set(cs.traffic.flow_transmit.flow_names)
-            
-            # Stop flows that are no longer needed
-            if len(stopping_flows) > 0:
-                cs.traffic.flow_transmit.flow_names = stopping_flows
-                cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
-                api.set_control_state(cs)
-
-            # Start new flows
-            if len(starting_flows) > 0:
-                cs.traffic.flow_transmit.flow_names = starting_flows
-                cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.START
-                api.set_control_state(cs)
-            
-            print(f"Time {current_time - start_time:.1f}s: Updated to {new_flow_count} flows: 1 to {new_flow_count}")
-
-        time.sleep(1)
+    while scheduler_thread.is_alive():
+        metrics_ok()
+        scheduler_thread.join(1)
+
+    skew = scheduler.skew_summary()
+    print(f"Schedule skew over {skew['count']} actions: mean={skew['mean_ms']:.2f}ms, "
+          f"p95={skew['p95_ms']:.2f}ms, max={skew['max_ms']:.2f}ms")
+    print("Experiment finished, stopping all traffic...")
+    time.sleep(5)
 
 except KeyboardInterrupt:
+    scheduler.stop_event.set()
     cs.traffic.flow_transmit.flow_names = []
     cs.traffic.flow_transmit.state = cs.traffic.flow_transmit.STOP
     api.set_control_state(cs)